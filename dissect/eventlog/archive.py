@@ -0,0 +1,431 @@
+"""A compact archive format for parsed records, to store them between collection and analysis.
+
+The keys of every schema, i.e. every distinct set of keys, are stored once. Records are stored as the values of their
+schema only, in blocks of records that are optionally compressed with :mod:`zlib`. Within a block, the values of the
+records of a schema are stored per column, which is both smaller after compression and faster to read back.
+
+An archive starts with the signature and the format version, as a little endian ``uint32``, followed by the blocks.
+Every block has a header with its flags, the size of its data and its number of records, as little endian ``uint32``
+values. The data of a block is a UTF-8 encoded JSON array of:
+
+- The schemas that are used for the first time in the block, as ``[schema_id, keys]``.
+- The schema ID of every record, in order.
+- The columns of the records of every schema, as ``[schema_id, count, columns]``, where ``count`` is the number of
+  records of the schema. The count is needed for schemas without keys, which have no columns.
+
+Values are stored as integers, floats, strings, booleans, arrays or ``null``. Floats that aren't finite are stored as
+``NaN``, ``Infinity`` and ``-Infinity``, like :mod:`json` does. Other values are stored as objects with a single key
+that tells their type:
+
+- ``{"datetime": us}`` and ``{"naive_datetime": us}``, with the microseconds since the epoch.
+- ``{"guid": "6b4d8d16-b0a7-4ab1-a1a4-9ae6d1de4f3e"}``.
+- ``{"hex": "00ff"}`` for hexlified binary values, and ``{"bytes": "AP8="}`` for all other bytes, in base64.
+
+Substitution values are unwrapped, and values of any other type are stored as their string. Records are read back as
+:class:`~dissect.eventlog.utils.CompactRecord` objects, with the same keys as they were written with.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import os
+import struct
+import uuid
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import islice, repeat
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from dissect.eventlog.bxml.bxml import BxmlSub, HexBytes
+from dissect.eventlog.evt.evt import Record
+from dissect.eventlog.exceptions import Error, UnknownSignatureException
+from dissect.eventlog.timestamps import UNIX_EPOCH, datetime_to_us
+from dissect.eventlog.utils import DEFAULT_BATCH_SIZE, CompactRecord, get_schema
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Mapping
+
+    from typing_extensions import Self
+
+    from dissect.eventlog.utils import RecordSchema
+
+log = logging.getLogger(__name__)
+log.setLevel(os.getenv("DISSECT_LOG_ARCHIVE", "CRITICAL"))
+
+ARCHIVE_SIGNATURE = b"DEVTARCH"
+FORMAT_VERSION = 2
+
+# The block flags
+BLOCK_ZLIB = 0x1
+
+# The zlib compression level of blocks, lower levels are a lot faster and barely larger for columns of values
+COMPRESSION_LEVEL = 1
+
+_HEADER = struct.Struct("<8sI")
+_BLOCK_HEADER = struct.Struct("<III")
+
+# The tags of values that JSON can't store by itself
+_TAG_DATETIME = "datetime"
+_TAG_NAIVE_DATETIME = "naive_datetime"
+_TAG_GUID = "guid"
+_TAG_HEX = "hex"
+_TAG_BYTES = "bytes"
+
+# The types that are stored as they are
+_PLAIN_TYPES = frozenset((type(None), bool, int, float, str))
+
+_encode_json = json.JSONEncoder(check_circular=False, separators=(",", ":")).encode
+
+# The schema of EVT records, without the raw record header that is their last field
+_EVT_SCHEMA = get_schema(Record._fields[:-1])
+
+_US = timedelta(microseconds=1)
+_NAIVE_EPOCH = UNIX_EPOCH.replace(tzinfo=None)
+
+
+def _encode(value: Any) -> Any:
+    """Encode a value to types that :mod:`json` can store."""
+    return _get_encoder(type(value))(value)
+
+
+def _get_encoder(cls: type) -> Callable[[Any], Any]:
+    encoder = _ENCODERS.get(cls)
+    if encoder is None:
+        if issubclass(cls, bool):
+            encoder = bool
+        elif issubclass(cls, int):
+            encoder = int
+        elif issubclass(cls, str):
+            encoder = str.__str__
+        elif issubclass(cls, float):
+            encoder = float
+        elif issubclass(cls, HexBytes):
+            encoder = _encode_hex
+        elif issubclass(cls, (bytes, bytearray)):
+            encoder = _encode_bytes
+        elif issubclass(cls, datetime):
+            encoder = _encode_datetime
+        elif issubclass(cls, uuid.UUID):
+            encoder = _encode_guid
+        elif issubclass(cls, BxmlSub):
+            encoder = _encode_sub
+        elif issubclass(cls, (list, tuple)):
+            encoder = _encode_list
+        else:
+            encoder = str
+        _ENCODERS[cls] = encoder
+    return encoder
+
+
+def _encode_datetime(value: datetime) -> dict[str, int]:
+    return {(_TAG_DATETIME if value.tzinfo is not None else _TAG_NAIVE_DATETIME): datetime_to_us(value)}
+
+
+def _encode_guid(value: uuid.UUID) -> dict[str, str]:
+    return {_TAG_GUID: str(value)}
+
+
+def _encode_hex(value: HexBytes) -> dict[str, str]:
+    return {_TAG_HEX: value.decode()}
+
+
+def _encode_bytes(value: bytes | bytearray) -> dict[str, str]:
+    return {_TAG_BYTES: base64.b64encode(value).decode()}
+
+
+def _encode_sub(value: BxmlSub) -> Any:
+    return _encode(value.value)
+
+
+def _encode_list(value: list[Any]) -> list[Any]:
+    return [_encode(item) for item in value]
+
+
+def _encode_column(column: tuple[Any, ...]) -> list[Any]:
+    types = set(map(type, column))
+    if types <= _PLAIN_TYPES:
+        return list(column)
+
+    if len(types) == 1:
+        return list(map(_get_encoder(types.pop()), column))
+
+    encoders = _ENCODERS
+    return [(encoders.get(type(value)) or _get_encoder(type(value)))(value) for value in column]
+
+
+_ENCODERS: dict[type, Callable[[Any], Any]] = {cls: (lambda value: value) for cls in _PLAIN_TYPES}
+
+
+def _decode(value: dict[str, Any]) -> Any:
+    """Decode a JSON object of a value that was encoded by :func:`_encode`."""
+    if len(value) != 1:
+        raise ValueError(f"Invalid value {value!r}")
+
+    ((tag, data),) = value.items()
+    if type(data) is not (int if tag in (_TAG_DATETIME, _TAG_NAIVE_DATETIME) else str):
+        raise ValueError(f"Invalid value {value!r}")
+
+    if tag == _TAG_DATETIME:
+        return UNIX_EPOCH + data * _US
+    if tag == _TAG_NAIVE_DATETIME:
+        return _NAIVE_EPOCH + data * _US
+    if tag == _TAG_GUID:
+        return uuid.UUID(data)
+    if tag == _TAG_HEX:
+        return HexBytes(data, "ascii")
+    if tag == _TAG_BYTES:
+        return base64.b64decode(data, validate=True)
+    raise ValueError(f"Unknown value tag {tag!r}")
+
+
+_decode_json = json.JSONDecoder(object_hook=_decode).decode
+
+
+class ArchiveWriter:
+    """Writes records to an archive, see the module documentation for the format.
+
+    Records are collected in blocks of ``block_size`` records, which are compressed with :mod:`zlib` if ``compress``
+    is set. Records can be :class:`~collections.abc.Mapping` objects, such as those of
+    :class:`~dissect.eventlog.evtx.Evtx`, or the records of :class:`~dissect.eventlog.evt.Evt`.
+
+    The last block is written when the writer is closed, which doesn't close ``fh``.
+
+    Example:
+        >>> with open("records.arc", "wb") as fh, ArchiveWriter(fh) as writer:
+        ...     writer.write(Evtx(evtx_fh, compact=True))
+    """
+
+    def __init__(self, fh: BinaryIO, block_size: int = DEFAULT_BATCH_SIZE, compress: bool = True):
+        self.fh = fh
+        self.block_size = block_size
+        self.compress = compress
+
+        self._schema_ids: dict[RecordSchema, int] = {}
+        self._new_schemas: list[tuple[int, tuple[str, ...]]] = []
+        self._order: list[int] = []
+        self._rows: dict[int, list[tuple[Any, ...]]] = {}
+
+        self.fh.write(_HEADER.pack(ARCHIVE_SIGNATURE, FORMAT_VERSION))
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Write the last block."""
+        self.flush()
+
+    def write(self, records: Iterable[Mapping[str, Any] | Record]) -> int:
+        """Add ``records`` to the archive. Returns the number of records that were added."""
+        count = 0
+        for record in records:
+            if isinstance(record, CompactRecord):
+                schema = record.schema
+                row = record.row
+            elif isinstance(record, Record):
+                schema = _EVT_SCHEMA
+                row = record[:-1]
+            else:
+                schema = get_schema(tuple(record))
+                row = tuple(record.values())
+
+            schema_id = self._schema_ids.get(schema)
+            if schema_id is None:
+                schema_id = self._add_schema(schema)
+
+            self._order.append(schema_id)
+            self._rows[schema_id].append(row)
+            count += 1
+
+            if len(self._order) >= self.block_size:
+                self.flush()
+        return count
+
+    def flush(self) -> None:
+        """Write the records that were added so far as a block."""
+        if not self._order:
+            return
+
+        groups = []
+        for schema_id, rows in self._rows.items():
+            if not rows:
+                continue
+
+            columns = [_encode_column(column) for column in zip(*rows, strict=True)]
+            groups.append((schema_id, len(rows), columns))
+            rows.clear()
+
+        data = _encode_json((self._new_schemas, self._order, groups)).encode()
+        flags = 0
+        if self.compress:
+            data = zlib.compress(data, COMPRESSION_LEVEL)
+            flags |= BLOCK_ZLIB
+
+        self.fh.write(_BLOCK_HEADER.pack(flags, len(data), len(self._order)) + data)
+        self._new_schemas = []
+        self._order = []
+
+    def _add_schema(self, schema: RecordSchema) -> int:
+        schema_id = self._schema_ids[schema] = len(self._schema_ids)
+        self._new_schemas.append((schema_id, schema.raw_keys))
+        self._rows[schema_id] = []
+        return schema_id
+
+
+class _Block:
+    """A block of records that was read from an archive."""
+
+    __slots__ = ("columns", "counts", "order", "size")
+
+    def __init__(self, order: list[int], counts: dict[int, int], columns: dict[int, list[list[Any]]]):
+        self.order = order
+        self.counts = counts
+        self.columns = columns
+        self.size = len(order)
+
+
+class ArchiveReader:
+    """Reads the records of an archive that was written by :class:`ArchiveWriter`.
+
+    Blocks are read one at a time, so archives of any size can be streamed. Records are returned as
+    :class:`~dissect.eventlog.utils.CompactRecord` objects, or as batches of columns by :meth:`iter_batches`.
+
+    Example:
+        >>> with open("records.arc", "rb") as fh:
+        ...     for record in ArchiveReader(fh):
+        ...         print(record["EventID"])
+    """
+
+    def __init__(self, fh: BinaryIO):
+        self.fh = fh
+
+        self.fh.seek(0)
+        signature, version = _HEADER.unpack(self._read(_HEADER.size))
+        if signature != ARCHIVE_SIGNATURE:
+            raise UnknownSignatureException(f"Invalid signature, expected {ARCHIVE_SIGNATURE} got {signature}")
+        if version != FORMAT_VERSION:
+            raise Error(f"Unsupported archive version {version}")
+
+        self.schemas: dict[int, RecordSchema] = {}
+
+    def __iter__(self) -> Iterator[CompactRecord]:
+        for block in self._iter_blocks():
+            schemas = self.schemas
+            rows = {
+                schema_id: iter(zip(*columns, strict=True) if columns else [()] * block.counts[schema_id])
+                for schema_id, columns in block.columns.items()
+            }
+
+            # Take the next row of the schema of every record, without a loop in Python. The number of rows of every
+            # schema is checked when the block is read, so map() can't stop early on a StopIteration of next()
+            order = block.order
+            records = list(map(CompactRecord, map(schemas.__getitem__, order), map(next, map(rows.__getitem__, order))))
+            if len(records) != block.size:
+                raise Error(f"Expected {block.size} records in block, got {len(records)}")
+            yield from records
+
+    def iter_batches(self, columns: Iterable[str] | None = None) -> Iterator[dict[str, list]]:
+        """Yield the records in batches of columns, one batch per block.
+
+        Every batch maps the column names to lists of values. Records that don't have a column have ``None`` as
+        value. If ``columns`` is not given, a batch has a column for every key of its records.
+        """
+        fixed = columns is not None
+        if fixed:
+            columns = list(columns)
+
+        for block in self._iter_blocks():
+            keys = columns if fixed else self._block_keys(block)
+            batch = {}
+            for key in keys:
+                iterators = {}
+                for schema_id, schema_columns in block.columns.items():
+                    position = self.schemas[schema_id].index.get(key)
+                    iterators[schema_id] = repeat(None) if position is None else iter(schema_columns[position])
+
+                if len(iterators) == 1:
+                    batch[key] = list(islice(*iterators.values(), block.size))
+                else:
+                    batch[key] = list(map(next, map(iterators.__getitem__, block.order)))
+
+                if len(batch[key]) != block.size:
+                    raise Error(f"Expected {block.size} values of {key} in block, got {len(batch[key])}")
+            yield batch
+
+    def _block_keys(self, block: _Block) -> list[str]:
+        keys = {}
+        for schema_id in block.columns:
+            keys.update(dict.fromkeys(self.schemas[schema_id].keys))
+        return list(keys)
+
+    def _iter_blocks(self) -> Iterator[_Block]:
+        self.fh.seek(_HEADER.size)
+        while True:
+            header = self.fh.read(_BLOCK_HEADER.size)
+            if not header:
+                return
+            if len(header) != _BLOCK_HEADER.size:
+                raise Error("Truncated block header")
+
+            flags, size, count = _BLOCK_HEADER.unpack(header)
+            data = self._read(size)
+            try:
+                if flags & BLOCK_ZLIB:
+                    data = zlib.decompress(data)
+                block = self._parse_block(data, count)
+            except (zlib.error, ValueError, TypeError, OverflowError) as e:
+                raise Error(f"Corrupt block at offset 0x{self.fh.tell() - size:x}") from e
+
+            yield block
+
+    def _parse_block(self, data: bytes, count: int) -> _Block:
+        new_schemas, order, groups = _decode_json(data.decode())
+        if len(order) != count:
+            raise Error(f"Expected {count} records in block, got {len(order)}")
+
+        for schema_id, keys in new_schemas:
+            if not all(type(key) is str for key in keys):
+                raise ValueError(f"Invalid keys of schema {schema_id}")
+            self.schemas[schema_id] = get_schema(tuple(keys))
+
+        counts = Counter(order)
+        block_counts = {}
+        block_columns = {}
+        for schema_id, schema_count, columns in groups:
+            schema = self.schemas.get(schema_id)
+            if schema is None:
+                raise Error(f"Unknown schema {schema_id} in block")
+            if len(columns) != len(schema.raw_keys):
+                raise Error(f"Expected {len(schema.raw_keys)} columns of schema {schema_id} in block")
+            if counts[schema_id] != schema_count or any(len(column) != schema_count for column in columns):
+                raise Error(f"Expected {counts[schema_id]} records of schema {schema_id} in block")
+
+            block_counts[schema_id] = schema_count
+            block_columns[schema_id] = columns
+
+        if block_counts.keys() != counts.keys():
+            raise Error("Records of unknown schemas in block")
+
+        return _Block(order, block_counts, block_columns)
+
+    def _read(self, size: int) -> bytes:
+        data = self.fh.read(size)
+        if len(data) != size:
+            raise Error("Truncated archive")
+        return data
+
+
+def write_archive(records: Iterable[Mapping[str, Any] | Record], fh: BinaryIO, compress: bool = True) -> int:
+    """Write ``records`` to ``fh`` as an archive, see :class:`ArchiveWriter`."""
+    with ArchiveWriter(fh, compress=compress) as writer:
+        return writer.write(records)
+
+
+def read_archive(fh: BinaryIO) -> Iterator[CompactRecord]:
+    """Read the records of the archive in ``fh``, see :class:`ArchiveReader`."""
+    return iter(ArchiveReader(fh))
@@ -2,8 +2,10 @@ from __future__ import annotations
 
 from dissect.eventlog.bxml.bxml import (
     Bxml,
+    BxmlFragment,
     BxmlNameReader,
     BxmlSub,
+    BxmlTag,
     BxmlToken,
     BxmlType,
     EvtxNameReader,
@@ -11,15 +13,19 @@ from dissect.eventlog.bxml.bxml import (
     WevtNameReader,
     parse_bxml,
 )
+from dissect.eventlog.bxml.templates import TemplateDictionary
 
 __all__ = (
     "Bxml",
+    "BxmlFragment",
     "BxmlNameReader",
     "BxmlSub",
+    "BxmlTag",
     "BxmlToken",
     "BxmlType",
     "EvtxNameReader",
     "Template",
+    "TemplateDictionary",
     "WevtNameReader",
     "parse_bxml",
 )
@@ -3,23 +3,39 @@
 from __future__ import annotations
 
 import binascii
+import io
+import logging
+import os
+import struct
 import uuid
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from enum import IntEnum
+from functools import partial
 from io import BytesIO
 from typing import TYPE_CHECKING, Any, BinaryIO
 
-from dissect.util.ts import wintimestamp
-
 from dissect.eventlog.bxml.c_bxml import c_bxml
 from dissect.eventlog.exceptions import BxmlException
-from dissect.eventlog.utils import KeyValueCollection
+from dissect.eventlog.timestamps import filetime_to_datetime
+from dissect.eventlog.utils import (
+    CompactRecord,
+    DeferredCompactRecord,
+    DeferredKeyValueCollection,
+    KeyValueCollection,
+    get_schema,
+)
 
 if TYPE_CHECKING:
     from collections.abc import Callable, Iterable, Iterator
 
     from typing_extensions import Self
 
+    from dissect.eventlog.bxml.templates import TemplateDictionary
+    from dissect.eventlog.utils import RecordSchema
+
+log = logging.getLogger(__name__)
+log.setLevel(os.getenv("DISSECT_LOG_BXML", "CRITICAL"))
+
 
 class BxmlToken(IntEnum):
     BXML_END = 0x00
@@ -37,6 +53,20 @@ class BxmlToken(IntEnum):
     BXML_FRAGMENT_HEADER = 0x0F
 
 
+# The FILETIME epoch and its proleptic Gregorian ordinal
+FILETIME_EPOCH = datetime(1601, 1, 1)  # noqa: DTZ001
+FILETIME_EPOCH_ORDINAL = FILETIME_EPOCH.toordinal()
+
+# The maximum number of formatted GUIDs that are cached by read_guid
+GUID_CACHE_SIZE = 4096
+
+_GUIDS: dict[bytes, str] = {}
+
+_SYSTEMTIME = struct.Struct("<8H")
+_UINT32 = struct.Struct("<I")
+_UINT64 = struct.Struct("<Q")
+
+
 class BxmlType(IntEnum):
     NULL = 0x00
     STRING = 0x01
@@ -81,21 +111,72 @@ class BxmlType(IntEnum):
 
 def read_systemtime(stream: BinaryIO) -> datetime:
     """Read systemtime from stream."""
-    st = c_bxml.SYSTEMTIME(stream)
+    year, month, _, day, hour, minute, second, milliseconds = _SYSTEMTIME.unpack(stream.read(_SYSTEMTIME.size))
     return datetime(  # noqa: DTZ001
-        year=st.wYear,
-        month=st.wMonth,
-        day=st.wDay,
-        hour=st.wHour,
-        minute=st.wMinute,
-        second=st.wSecond,
-        microsecond=st.wMilliseconds * 1000,
+        year=year,
+        month=month,
+        day=day,
+        hour=hour,
+        minute=minute,
+        second=second,
+        microsecond=milliseconds * 1000,
     )
 
 
+def read_systemtime_ticks(stream: BinaryIO) -> int:
+    """Read systemtime from stream as the number of 100 nanosecond intervals since 1601-01-01, like a FILETIME."""
+    year, month, _, day, hour, minute, second, milliseconds = _SYSTEMTIME.unpack(stream.read(_SYSTEMTIME.size))
+    days = date(year, month, day).toordinal() - FILETIME_EPOCH_ORDINAL
+    seconds = ((days * 24 + hour) * 60 + minute) * 60 + second
+    return seconds * 10_000_000 + milliseconds * 10_000
+
+
+def read_filetime(stream: BinaryIO) -> datetime:
+    """Read filetime from stream."""
+    return filetime_to_datetime(_UINT64.unpack(stream.read(8))[0])
+
+
 def read_guid(stream: BinaryIO) -> str:
-    """Read guid from stream."""
-    guid = uuid.UUID(bytes=stream.read(16))
+    """Read guid from stream.
+
+    The same GUIDs are read over and over again, such as the provider GUIDs, so the formatted GUIDs are cached.
+    """
+    return _read_guid_bytes(stream.read(16))
+
+
+def _read_guid_bytes(data: bytes) -> str:
+    guid = _GUIDS.get(data)
+    if guid is None:
+        if len(data) != 16:
+            raise ValueError(f"Expected 16 bytes for a GUID, got {len(data)}")
+
+        if len(_GUIDS) >= GUID_CACHE_SIZE:
+            _GUIDS.clear()
+
+        # The same string as that of uuid.UUID(bytes=data), without creating the UUID
+        guid = _GUIDS[data] = (
+            f"{{{data[:4].hex()}-{data[4:6].hex()}-{data[6:8].hex()}-{data[8:10].hex()}-{data[10:].hex()}}}"
+        ).upper()
+    return guid
+
+
+class HexBytes(bytes):
+    """The hexlified data of a binary value, as it's parsed by default.
+
+    Serializers write these as text, unlike the bytes of values that are parsed with ``raw_types``, which they always
+    write as hex.
+    """
+
+    __slots__ = ()
+
+
+def hexlify(data: bytes) -> HexBytes:
+    """Hexlify the data of a binary value."""
+    return HexBytes(binascii.hexlify(data))
+
+
+def format_guid(guid: uuid.UUID) -> str:
+    """Format a GUID like Windows does, in upper case and between braces."""
     guid_str = str(guid).upper()
     return f"{{{guid_str}}}"
 
@@ -124,18 +205,70 @@ TYPE_READERS: dict[BxmlType, Callable[[BinaryIO], Any]] = {
     BxmlType.FLOAT: c_bxml.float.read,
     BxmlType.DOUBLE: c_bxml.double.read,
     BxmlType.BOOL: lambda stream: c_bxml.uint8.read(stream),
-    BxmlType.BINARY: lambda stream: binascii.hexlify(stream.read()),
+    BxmlType.BINARY: lambda stream: hexlify(stream.read()),
     BxmlType.GUID: read_guid,
     BxmlType.SIZET: (
         lambda stream: f"0x{c_bxml.uint32(stream):x}" if len(stream.getvalue()) == 4 else f"0x{c_bxml.uint64(stream):x}"
     ),
-    BxmlType.FILETIME: lambda stream: wintimestamp(c_bxml.uint64(stream)),
+    BxmlType.FILETIME: read_filetime,
     BxmlType.SYSTEMTIME: lambda stream: read_systemtime(stream),
     BxmlType.SID: read_sid,
     BxmlType.HEXINT32: lambda stream: f"0x{c_bxml.uint32(stream):x}",
     BxmlType.HEXINT64: lambda stream: f"0x{c_bxml.uint64(stream):x}",
 }
 
+# The readers of the types that differ when values are parsed with raw_types, which skips all formatting
+RAW_TYPE_READERS: dict[BxmlType, Callable[[BinaryIO], Any]] = {
+    **TYPE_READERS,
+    BxmlType.BINARY: lambda stream: stream.read(),
+    BxmlType.GUID: lambda stream: uuid.UUID(bytes=stream.read(16)),
+    BxmlType.SIZET: lambda stream: c_bxml.uint32(stream) if len(stream.getvalue()) == 4 else c_bxml.uint64(stream),
+    BxmlType.FILETIME: c_bxml.uint64.read,
+    BxmlType.SYSTEMTIME: read_systemtime_ticks,
+    BxmlType.HEXINT32: c_bxml.uint32.read,
+    BxmlType.HEXINT64: c_bxml.uint64.read,
+}
+
+# Convert values that were parsed with raw_types to the values that are parsed by default
+TYPE_FORMATTERS: dict[BxmlType, Callable[[Any], Any]] = {
+    BxmlType.BINARY: hexlify,
+    BxmlType.GUID: format_guid,
+    BxmlType.SIZET: lambda value: f"0x{value:x}",
+    BxmlType.FILETIME: filetime_to_datetime,
+    BxmlType.SYSTEMTIME: lambda value: FILETIME_EPOCH + timedelta(microseconds=value // 10),
+    BxmlType.HEXINT32: lambda value: f"0x{value:x}",
+    BxmlType.HEXINT64: lambda value: f"0x{value:x}",
+}
+
+
+# The struct formats of the types of which arrays are decoded in bulk
+ARRAY_FORMATS: dict[BxmlType, str] = {
+    BxmlType.INT8: "b",
+    BxmlType.UINT8: "B",
+    BxmlType.INT16: "h",
+    BxmlType.UINT16: "H",
+    BxmlType.INT32: "i",
+    BxmlType.UINT32: "I",
+    BxmlType.INT64: "q",
+    BxmlType.UINT64: "Q",
+    BxmlType.FLOAT: "f",
+    BxmlType.DOUBLE: "d",
+    BxmlType.BOOL: "B",
+    BxmlType.FILETIME: "Q",
+    BxmlType.HEXINT32: "I",
+    BxmlType.HEXINT64: "Q",
+}
+
+
+def format_value(type_id: BxmlType, value: Any) -> Any:
+    """Format a value of type ``type_id`` that was parsed with ``raw_types``, see :data:`TYPE_FORMATTERS`."""
+    formatter = TYPE_FORMATTERS.get(type_id)
+    if formatter is None or value is None:
+        return value
+    if isinstance(value, list):
+        return [formatter(item) for item in value]
+    return formatter(value)
+
 
 class BxmlTag:
     name: str
@@ -169,6 +302,8 @@ class BxmlTag:
 
 
 class BxmlSub:
+    __slots__ = ("sub_id", "value")
+
     def __init__(self, sub_id: int):
         self.sub_id = sub_id
         self.value = None
@@ -185,15 +320,99 @@ class BxmlSub:
     def get(self) -> Any:
         return self.value
 
+    def copy(self) -> BxmlSub:
+        sub = BxmlSub(self.sub_id)
+        sub.value = self.value
+        return sub
+
+
+class BxmlFragment:
+    """A BinXML fragment in a substitution value, of which the parsing is deferred until its values are needed.
+
+    The fragment is parsed in the context of the BinXML data it was read from, so names and templates that are
+    defined elsewhere in the chunk can still be resolved.
+    """
+
+    __slots__ = ("bxml", "data", "offset")
+
+    def __init__(self, bxml: Bxml, offset: int, data: bytes):
+        self.bxml = bxml
+        self.offset = offset
+        self.data = data
+
+    def __repr__(self) -> str:
+        return f"<BxmlFragment offset=0x{self.offset:x} size={len(self.data)}>"
+
+    def parse(self) -> Template | BxmlTag | Any:
+        """Parse the fragment.
+
+        The templates that the fragment instantiates are shared with other records, so the result has to be mapped
+        before anything else is parsed.
+        """
+        return read_binxml_fragment(self._create_bxml(), None, len(self.data))
+
+    def parse_or_corrupt(self) -> Template | BxmlTag | Any:
+        """Parse the fragment, or return ``"<CORRUPT DATA>"`` if it can't be parsed.
+
+        Fragments are parsed when the values of a record are used, outside of the error handling of the chunk, so
+        every error is caught like the errors of records that are parsed in full are.
+        """
+        try:
+            return self.parse()
+        except Exception as e:
+            log.debug("Can't parse BinXML fragment at offset 0x%x", self.offset, exc_info=e)
+            return "<CORRUPT DATA>"
+
+    def read_definition(self) -> None:
+        """Read the definition of the template that the fragment instantiates, if it is defined in the fragment.
+
+        Other records can refer to the template, so it is added to the templates of the chunk without parsing the
+        values of the fragment.
+        """
+        data = self.data
+        pos = 4 if data[:1] == b"\x0f" else 0
+        if len(data) < pos + 10 or data[pos] & Token.TOKEN_MASK != BxmlToken.BXML_TEMPLATE_INSTANCE:
+            return
+
+        bxml = self._create_bxml()
+        template_offset = _UINT32.unpack_from(data, pos + 6)[0]
+        if template_offset != bxml.data_offset + pos + 10 or template_offset in bxml.templates:
+            return
+
+        bxml.bxml_stream.seek(pos + 1)
+        bxml._read_template_reference_and_data()
+
+    def _create_bxml(self) -> Bxml:
+        parent = self.bxml
+
+        bxml = Bxml(bxml_stream=BytesIO(self.data), elf_chunk_stream=parent.elf_chunk_stream)
+        bxml.data_offset = (parent.data_offset or 0) + self.offset
+        bxml.templates = parent.templates
+        bxml.template_dictionary = parent.template_dictionary
+        bxml.raw_types = parent.raw_types
+        bxml.set_name_reader(type(parent._reader)(bxml))
+        return bxml
+
+
+# The steps of a compiled template map
+_STEP_VALUE = object()
+_STEP_ATTRIBUTE = object()
+_STEP_CONSTANT = object()
+
 
 class Template:
     element: BxmlTag
 
     def __init__(self):
+        self.identifier: uuid.UUID | None = None
         self.subs: dict[int, BxmlSub] = {}
         self.mapping = {}
         self.element = None
         self.child_templates: list[Template] = []
+        self._plan = None
+        self._schema = None
+        self._head_schemas: dict[int, RecordSchema] = {}
+        self._column_plans: dict[tuple[str, ...], tuple[tuple[int | None, ...] | None, tuple[BxmlSub, ...]]] = {}
 
     def __str__(self) -> str:
         return str(self.element)
@@ -228,22 +447,232 @@ class Template:
 
     def as_map(self) -> dict[str, Any]:
         result_dict = {}
+        fragment_maps = []
 
         for key, value in self.mapping.items():
-            result_dict[key] = self.subs[value].get()
+            value = self.subs[value].get()
+            if isinstance(value, BxmlFragment):
+                value = value.parse_or_corrupt()
+                if isinstance(value, Template):
+                    fragment_maps.append(value.as_map())
+            result_dict[key] = value
 
         for template in self.child_templates:
             result_dict.update(template.as_map())
 
+        for fragment_map in fragment_maps:
+            result_dict.update(fragment_map)
+
         return result_dict
 
     def as_full_map(self) -> KeyValueCollection:
+        if self._plan is None:
+            self._plan = self._compile_map()
+
         key_value_pair = KeyValueCollection()
-        self._get_map_recursive(self.element, [], key_value_pair)
+        for position, (step, key, item, path) in enumerate(self._plan):
+            if step is _STEP_VALUE:
+                value = item.value
+                if type(value) is BxmlFragment:
+                    return self._defer_map(key_value_pair, position)
+                if key is None or isinstance(value, (Template, BxmlSub, BxmlTag)):
+                    self._get_map_recursive(value, path, key_value_pair)
+                else:
+                    key_value_pair[key] = value
+            elif step is _STEP_ATTRIBUTE:
+                key_value_pair[key] = item.copy()
+            else:
+                key_value_pair[key] = item
         return key_value_pair
 
+    def _defer_map(self, collection: KeyValueCollection, position: int) -> DeferredKeyValueCollection:
+        """Defer the steps of the plan from ``position`` on, which starts at a BinXML fragment.
+
+        The values of the remaining steps are taken now, as the substitutions of this template are overwritten by the
+        next record. The fragment itself is only parsed when the keys that follow it are needed.
+        """
+        deferred = DeferredKeyValueCollection(partial(self._map_deferred_steps, self._take_steps(position)))
+        dict.update(deferred, collection)
+        deferred.idx = collection.idx
+        return deferred
+
+    def _take_steps(self, position: int) -> list[tuple[object, str | None, Any, list[BxmlTag]]]:
+        """Return the steps of the plan from ``position`` on, with the values of the substitutions of this record."""
+        steps = []
+        for step, key, item, path in self._plan[position:]:
+            if step is _STEP_VALUE:
+                item = item.value
+            elif step is _STEP_ATTRIBUTE:
+                item = item.copy()
+            steps.append((step, key, item, path))
+        return steps
+
+    def _map_deferred_steps(
+        self, steps: list[tuple[object, str | None, Any, list[BxmlTag]]], collection: KeyValueCollection
+    ) -> None:
+        for step, key, value, path in steps:
+            if step is _STEP_VALUE and (key is None or isinstance(value, (Template, BxmlSub, BxmlTag, BxmlFragment))):
+                self._get_map_recursive(value, path, collection)
+            else:
+                collection[key] = value
+
+    def as_record(self) -> CompactRecord:
+        """Return the same keys and values as :meth:`as_full_map`, as a :class:`~dissect.eventlog.utils.CompactRecord`.
+
+        All records of this template share one schema, unless a substitution contains a BinXML fragment or another
+        template, in which case the keys of the record are determined from its own values. Like with
+        :meth:`as_full_map`, a BinXML fragment is only parsed when the keys that follow it are needed.
+        """
+        if self._plan is None:
+            self._plan = self._compile_map()
+
+        values = []
+        for position, (step, key, item, _) in enumerate(self._plan):
+            if step is _STEP_VALUE:
+                value = item.value
+                if type(value) is BxmlFragment:
+                    return self._defer_record(tuple(values), position)
+                if key is None or isinstance(value, (Template, BxmlSub, BxmlTag, BxmlFragment)):
+                    return CompactRecord.from_mapping(self.as_full_map())
+                values.append(value)
+            elif step is _STEP_ATTRIBUTE:
+                values.append(item.copy())
+            else:
+                values.append(item)
+
+        if self._schema is None:
+            self._schema = get_schema(tuple(key for _, key, _, _ in self._plan))
+        return CompactRecord(self._schema, tuple(values))
+
+    def _defer_record(self, values: tuple[Any, ...], position: int) -> DeferredCompactRecord:
+        """Defer the steps of the plan from ``position`` on, like :meth:`_defer_map`."""
+        schema = self._head_schemas.get(position)
+        if schema is None:
+            schema = self._head_schemas[position] = get_schema(tuple(key for _, key, _, _ in self._plan[:position]))
+        return DeferredCompactRecord(
+            schema, values, partial(self._fill_record, schema, values, self._take_steps(position))
+        )
+
+    def _fill_record(
+        self, schema: RecordSchema, values: tuple[Any, ...], steps: list[tuple[object, str | None, Any, list[BxmlTag]]]
+    ) -> CompactRecord:
+        collection = KeyValueCollection()
+        for key, value in zip(schema.raw_keys, values, strict=True):
+            collection[key] = value
+        self._map_deferred_steps(steps, collection)
+        return CompactRecord.from_mapping(collection)
+
+    def as_row(self, columns: tuple[str, ...]) -> tuple[Any, ...]:
+        """Return the values of ``columns`` in the record of :meth:`as_record`, or ``None`` for missing columns.
+
+        The values are taken straight from the plan, without creating a record. The record is only created if a
+        substitution before a column, or any substitution if a column is not in the plan, contains a BinXML fragment
+        or another template, as the keys of its values are not known up front.
+        """
+        if self._plan is None:
+            self._plan = self._compile_map()
+
+        column_plan = self._column_plans.get(columns)
+        if column_plan is None:
+            column_plan = self._column_plans[columns] = self._compile_columns(columns)
+        positions, subs = column_plan
+
+        if positions is None:
+            return self._select(columns)
+        for sub in subs:
+            if isinstance(sub.value, _NESTED_TYPES):
+                return self._select(columns)
+
+        plan = self._plan
+        row = []
+        for position in positions:
+            if position is None:
+                row.append(None)
+                continue
+
+            step, _, item, _ = plan[position]
+            if step is _STEP_VALUE:
+                row.append(item.value)
+            elif step is _STEP_ATTRIBUTE:
+                row.append(item.copy())
+            else:
+                row.append(item)
+        return tuple(row)
+
+    def _compile_columns(self, columns: tuple[str, ...]) -> tuple[tuple[int | None, ...] | None, tuple[BxmlSub, ...]]:
+        """Return the positions of ``columns`` in the plan, and the substitutions that have to be checked first.
+
+        The positions are ``None`` if the record always has to be created, because a substitution that has to be
+        checked isn't mapped to a key.
+        """
+        index = KeyValueCollection()
+        for position, (_, key, _, _) in enumerate(self._plan):
+            if key is None:
+                break
+            index[key] = position
+
+        positions = tuple(index.get(column) for column in columns)
+        end = len(self._plan) if None in positions else max(positions, default=-1) + 1
+
+        subs = []
+        for step, key, item, _ in self._plan[:end]:
+            if step is _STEP_VALUE:
+                if key is None:
+                    return None, ()
+                subs.append(item)
+        return positions, tuple(subs)
+
+    def _select(self, columns: tuple[str, ...]) -> tuple[Any, ...]:
+        record = self.as_record()
+        return tuple(record.get(column) for column in columns)
+
+    def _compile_map(self) -> list[tuple[object, str | None, Any, list[BxmlTag]]]:
+        """Flatten the element tree into the steps that :meth:`_get_map_recursive` takes for this template.
+
+        Only the values of the substitutions differ between records, so the keys of all values can be determined
+        once. Substitutions that contain BinXML fragments or other templates are still mapped recursively.
+        """
+        plan = []
+        self._compile_map_recursive(self.element, [], plan)
+        return plan
+
+    def _compile_map_recursive(self, obj: BxmlSub | BxmlTag | Any, path: list[BxmlTag], plan: list) -> None:
+        if isinstance(obj, BxmlSub):
+            plan.append((_STEP_VALUE, self._get_key(path), obj, path))
+
+        elif isinstance(obj, BxmlTag):
+            for child in obj.children:
+                self._compile_map_recursive(child, [*path, obj], plan)
+
+            if obj.name == "Event":
+                return
+
+            for key, value in obj.attributes.items():
+                if obj.name == "Data" and key == "Name":
+                    continue
+
+                step = _STEP_ATTRIBUTE if isinstance(value, BxmlSub) else _STEP_CONSTANT
+                plan.append((step, obj.name + "_" + key, value, path))
+        else:
+            key = self._get_key(path)
+            if key is not None:
+                plan.append((_STEP_CONSTANT, key, obj, path))
+
+    def _get_key(self, path: list[BxmlTag]) -> str | None:
+        """Return the key under which a value at ``path`` is mapped, see :meth:`_get_map_recursive`."""
+        if not path or not isinstance(path[-1], BxmlTag):
+            return None
+
+        previous_tag: BxmlTag = path[-1]
+        if previous_tag.name == "Data" and "Name" in previous_tag.attributes:
+            return previous_tag.attributes["Name"]
+        return "_".join([val.name for val in path[2:]])
+
     def _get_map_recursive(
-        self, obj: Template | BxmlSub | BxmlTag | Any, path: list[BxmlTag | Any], collection: KeyValueCollection
+        self,
+        obj: Template | BxmlSub | BxmlFragment | BxmlTag | Any,
+        path: list[BxmlTag | Any],
+        collection: KeyValueCollection,
     ) -> None:
         if isinstance(obj, Template):
             self._get_map_recursive(obj.element, path, collection)
@@ -251,6 +680,9 @@ class Template:
         elif isinstance(obj, BxmlSub):
             self._get_map_recursive(obj.get(), path, collection)
 
+        elif isinstance(obj, BxmlFragment):
+            self._get_map_recursive(obj.parse_or_corrupt(), path, collection)
+
         elif isinstance(obj, BxmlTag):
             for child in obj.children:
                 self._get_map_recursive(child, [*path, obj], collection)
@@ -262,6 +694,10 @@ class Template:
                 if obj.name == "Data" and key == "Name":
                     continue
 
+                if isinstance(value, BxmlSub):
+                    # The substitution belongs to a template that is shared with other records, so take a snapshot
+                    value = value.copy()
+
                 collection[obj.name + "_" + key] = value
         elif isinstance(path[-1], BxmlTag):
             previous_tag: BxmlTag = path[-1]
@@ -276,6 +712,10 @@ class Template:
         self.child_templates.append(tpl)
 
 
+# The values of substitutions that are mapped to keys of their own
+_NESTED_TYPES = (Template, BxmlSub, BxmlTag, BxmlFragment)
+
+
 class Bxml:
     """An object that keeps track of the BXML streams."""
 
@@ -285,6 +725,9 @@ class Bxml:
         self.data_offset: int = None
         self.template: Template = None
         self.templates: dict[int, Template] = None
+        self.template_dictionary: TemplateDictionary | None = None
+        # Whether to skip the formatting of values, see RAW_TYPE_READERS
+        self.raw_types = False
 
     @property
     def current_offset(self) -> int:
@@ -365,19 +808,107 @@ class Bxml:
         reference = c_bxml.BXML_TEMPLATE_REFERENCE(self.bxml_stream)
 
         if reference.offset == self.current_offset:
-            template = self._create_and_fill_template()
+            template = self.templates.get(reference.offset)
+            if template is not None:
+                # The definition was already read, e.g. from the chunk before this fragment was parsed
+                definition = c_bxml.BXML_TEMPLATE_DEFINITION(self.bxml_stream)
+                self.bxml_stream.seek(definition.data_size, io.SEEK_CUR)
+                return template
+
+            if self.template_dictionary is not None and self.template_dictionary.skip_definitions:
+                template = self._skip_known_template()
+
+            if template is None:
+                template = self._create_and_fill_template()
 
             self.templates[reference.offset] = template
-        else:
+            if self.template_dictionary is not None:
+                self.template_dictionary.add(template)
+        elif reference.offset in self.templates:
             template = self.templates[reference.offset]
+        else:
+            template = self._read_chunk_template(reference.template_id, reference.offset)
+
+        return template
+
+    def _read_chunk_template(self, template_id: int, offset: int) -> Template:
+        """Read the template definition at ``offset`` in the chunk.
+
+        Templates can be defined in BinXML fragments of earlier records, which are only parsed once their values are
+        needed. Those definitions are read from the chunk directly. Templates that are in the template dictionary
+        are not parsed again, they are looked up by the full identifier of the definition.
 
+        If the definition is not in the chunk, e.g. for a carved record without its chunk, the template is looked up
+        in the template dictionary by ``template_id``, the first 4 bytes of its identifier.
+        """
+        stream = self.elf_chunk_stream
+        if stream is None:
+            return self._get_known_template(template_id, offset)
+
+        bxml = Bxml(bxml_stream=stream, elf_chunk_stream=stream)
+        bxml.data_offset = 0
+        bxml.templates = self.templates
+        bxml.template_dictionary = self.template_dictionary
+        bxml.raw_types = self.raw_types
+        bxml.set_name_reader(type(self._reader)(bxml))
+
+        pos = stream.tell()
+        try:
+            stream.seek(offset)
+            definition = c_bxml.BXML_TEMPLATE_DEFINITION(stream)
+
+            identifier = uuid.UUID(bytes_le=definition.identifier)
+
+            # The offset can also refer to a template that has since been overwritten, e.g. in carved records
+            if identifier.time_low != template_id:
+                return self._get_known_template(template_id, offset)
+
+            template = None
+            if self.template_dictionary is not None:
+                template = self.template_dictionary.get(identifier)
+
+            if template is None:
+                stream.seek(offset)
+                template = bxml._create_and_fill_template()
+        except EOFError:
+            return self._get_known_template(template_id, offset)
+        finally:
+            stream.seek(pos)
+
+        self.templates[offset] = template
+        if self.template_dictionary is not None:
+            self.template_dictionary.add(template)
+        return template
+
+    def _get_known_template(self, template_id: int, offset: int) -> Template:
+        """Return the template of the template dictionary that ``template_id`` refers to, if it's unambiguous."""
+        template = None
+        if self.template_dictionary is not None:
+            template = self.template_dictionary.get_by_id(template_id)
+
+        if template is None:
+            raise BxmlException(f"Unknown template 0x{template_id:08x} at offset 0x{offset:x}")
+        return template
+
+    def _skip_known_template(self) -> Template | None:
+        """Skip the template definition at the current offset, if the template is in the template dictionary."""
+        pos = self.bxml_stream.tell()
+        definition = c_bxml.BXML_TEMPLATE_DEFINITION(self.bxml_stream)
+
+        template = self.template_dictionary.get(uuid.UUID(bytes_le=definition.identifier))
+        if template is None:
+            self.bxml_stream.seek(pos)
+            return None
+
+        self.bxml_stream.seek(definition.data_size, io.SEEK_CUR)
         return template
 
     def _create_and_fill_template(self) -> Template:
-        c_bxml.BXML_TEMPLATE_DEFINITION(self.bxml_stream)
+        definition = c_bxml.BXML_TEMPLATE_DEFINITION(self.bxml_stream)
         c_bxml.BXML_FRAGMENT_HEADER(self.bxml_stream)
 
         template = Template()
+        template.identifier = uuid.UUID(bytes_le=definition.identifier)
 
         tag = self.read_token(template)
         if tag == BxmlToken.BXML_FRAGMENT_HEADER:
@@ -449,9 +980,6 @@ class Bxml:
         for index, descriptor in enumerate(descriptors):
             value = _read_descriptor_value(self, descriptor)
 
-            if isinstance(value, Template):
-                _template.add_child_template(value)
-
             if index in _template.subs:
                 _template.subs[index].set(value)
 
@@ -544,7 +1072,15 @@ class Token:
         return False
 
 
-def parse_bxml(bxml: Bxml) -> KeyValueCollection:
+def parse_bxml(
+    bxml: Bxml, compact: bool = False, columns: tuple[str, ...] | None = None
+) -> KeyValueCollection | CompactRecord | tuple[Any, ...]:
+    """Parse the next BinXML fragment of ``bxml``.
+
+    If ``compact`` is set, a :class:`~dissect.eventlog.utils.CompactRecord` is returned instead of a
+    :class:`~dissect.eventlog.utils.KeyValueCollection`. If ``columns`` is given, only the values of these keys are
+    returned, see :meth:`Template.as_row`.
+    """
     while True:
         token = bxml.read_token(bxml.template)
         if token == BxmlToken.BXML_END:
@@ -556,11 +1092,15 @@ def parse_bxml(bxml: Bxml) -> KeyValueCollection:
         if isinstance(token, BxmlTag):
             key_collection = KeyValueCollection()
             Template()._get_map_recursive(token, [], key_collection)
-            return key_collection
+            if columns is not None:
+                return tuple(key_collection.get(column) for column in columns)
+            return CompactRecord.from_mapping(key_collection) if compact else key_collection
         if bxml.read_token() != BxmlToken.BXML_END:
             pass
 
-        return token.as_full_map()
+        if columns is not None:
+            return token.as_row(columns)
+        return token.as_record() if compact else token.as_full_map()
 
 
 class BxmlTemplateDescriptor:
@@ -582,6 +1122,10 @@ class BxmlTemplateDescriptor:
     def value_type(self) -> Any:
         return TYPE_READERS[self.type_id]
 
+    @property
+    def raw_value_type(self) -> Any:
+        return RAW_TYPE_READERS[self.type_id]
+
     @classmethod
     def read_descriptors_from_stream(cls, stream: BytesIO) -> Iterator[Self]:
         """Read a range of BXML descriptors from stream."""
@@ -636,9 +1180,13 @@ def read_value(binxml: Bxml, descriptor: BxmlTemplateDescriptor, template: Templ
     if descriptor.has_type_reader:
         data = binxml.bxml_stream.read(descriptor.size)
         stream = BytesIO(data)
+        reader = descriptor.raw_value_type if binxml.raw_types else descriptor.value_type
 
         if descriptor.is_array:
-            return list(read_descriptor_array(stream, descriptor))
+            values = read_array(data, descriptor.type_id, binxml.raw_types)
+            if values is None:
+                values = list(read_descriptor_array(stream, descriptor, reader))
+            return values
 
         if descriptor.type_id == BxmlType.STRING:
             return data.decode("utf-16-le").rstrip("\x00")
@@ -646,17 +1194,58 @@ def read_value(binxml: Bxml, descriptor: BxmlTemplateDescriptor, template: Templ
         if descriptor.type_id == BxmlType.ANSITRING:
             return data.rstrip(b"\x00")
 
-        return descriptor.value_type(stream)
+        return reader(stream)
 
     if descriptor.type_id == BxmlType.BINXML:
-        return read_binxml_fragment(binxml, template, descriptor.size)
+        fragment = BxmlFragment(binxml, binxml.bxml_stream.tell(), binxml.bxml_stream.read(descriptor.size))
+        if binxml.templates is not None:
+            fragment.read_definition()
+        return fragment
 
     raise BxmlException(f"Unknown value type 0x{descriptor.type_id:x}")
 
 
-def read_descriptor_array(stream: BinaryIO, descriptor: BxmlTemplateDescriptor) -> list[Any]:
+def read_array(data: bytes, type_id: BxmlType, raw_types: bool = False) -> list[Any] | None:
+    """Decode an array of values of type ``type_id`` at once.
+
+    Returns ``None`` if the values of ``type_id`` can't be decoded in bulk, in which case they have to be read one by
+    one with :func:`read_descriptor_array`.
+    """
+    if type_id == BxmlType.STRING:
+        values = data.decode("utf-16-le").split("\x00")
+    elif type_id == BxmlType.ANSITRING:
+        values = data.split(b"\x00")
+    elif type_id == BxmlType.GUID:
+        if len(data) % 16:
+            return None
+        return [
+            uuid.UUID(bytes=data[i : i + 16]) if raw_types else _read_guid_bytes(data[i : i + 16])
+            for i in range(0, len(data), 16)
+        ]
+    else:
+        fmt = ARRAY_FORMATS.get(type_id)
+        if fmt is None or len(data) % struct.calcsize(fmt):
+            return None
+
+        values = list(struct.unpack(f"<{len(data) // struct.calcsize(fmt)}{fmt}", data))
+        if not raw_types:
+            formatter = TYPE_FORMATTERS.get(type_id)
+            if formatter is not None:
+                values = list(map(formatter, values))
+        return values
+
+    # Every string is terminated, so the last separator is followed by nothing
+    if values and not values[-1]:
+        values.pop()
+    return values
+
+
+def read_descriptor_array(
+    stream: BinaryIO, descriptor: BxmlTemplateDescriptor, reader: Callable[[BinaryIO], Any] | None = None
+) -> Iterator[Any]:
+    reader = reader or descriptor.value_type
     while stream.tell() != descriptor.size:
-        yield descriptor.value_type(stream)
+        yield reader(stream)
 
 
 def read_binxml_fragment(bxml: Bxml, template: Template, length: int) -> Any:
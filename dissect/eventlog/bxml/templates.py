@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, TextIO
+from uuid import UUID
+
+from dissect.eventlog.bxml.bxml import BxmlSub, BxmlTag, Template
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+log = logging.getLogger(__name__)
+log.setLevel(os.getenv("DISSECT_LOG_BXML", "CRITICAL"))
+
+DEFAULT_MAX_SIZE = 10_000
+FORMAT_VERSION = 1
+
+
+class TemplateDictionary:
+    """A dictionary of BinXML templates, keyed by their identifier.
+
+    EVTX records only refer to their template by its offset in the chunk and the first 4 bytes of its identifier.
+    Records that are carved without their chunk can't be parsed, unless the template is known from elsewhere.
+    By passing a template dictionary to :class:`~dissect.eventlog.evtx.Evtx` or :func:`~dissect.eventlog.evtx.carve`,
+    the templates of all parsed chunks are learned and used to parse such records. If multiple known templates start
+    with the same 4 bytes, these records are not parsed, instead of possibly parsing them with the wrong template.
+
+    The dictionary holds at most ``max_size`` templates. If it grows beyond that, the least recently used
+    templates are evicted. It can be saved to and loaded from a JSON file.
+
+    If ``skip_definitions`` is set, templates that are defined in a log but are already in the dictionary are not
+    parsed again, the template from the dictionary is used instead.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, skip_definitions: bool = False):
+        self.max_size = max_size
+        self.skip_definitions = skip_definitions
+        self._templates: OrderedDict[UUID, Template] = OrderedDict()
+        # The first 4 bytes of the identifier are used to refer to a template, these can collide
+        self._by_id: dict[int, list[UUID]] = {}
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def __contains__(self, identifier: UUID) -> bool:
+        return identifier in self._templates
+
+    def __iter__(self) -> Iterator[UUID]:
+        return iter(self._templates)
+
+    def __reduce__(self) -> tuple:
+        return _from_state, (self.max_size, self.skip_definitions, self.dumps())
+
+    def add(self, template: Template) -> None:
+        """Add a template to the dictionary, if it's not known yet."""
+        identifier = template.identifier
+        if identifier is None:
+            return
+
+        if identifier in self._templates:
+            self._templates.move_to_end(identifier)
+            return
+
+        try:
+            # Store a copy that is independent of the chunk it was read from
+            template = decode_template(identifier, encode_template(template))
+        except TypeError:
+            log.debug("Can't add template %s to the template dictionary", identifier, exc_info=True)
+            return
+
+        self._add(template)
+
+    def _add(self, template: Template) -> None:
+        identifier = template.identifier
+        if identifier not in self._templates:
+            self._by_id.setdefault(identifier.time_low, []).append(identifier)
+        self._templates[identifier] = template
+
+        while len(self._templates) > self.max_size:
+            identifier, _ = self._templates.popitem(last=False)
+            identifiers = self._by_id[identifier.time_low]
+            identifiers.remove(identifier)
+            if not identifiers:
+                del self._by_id[identifier.time_low]
+
+    def get(self, identifier: UUID) -> Template | None:
+        """Return the template with the given identifier."""
+        template = self._templates.get(identifier)
+        if template is not None:
+            self._templates.move_to_end(identifier)
+        return template
+
+    def get_by_id(self, template_id: int) -> Template | None:
+        """Return the template of which the identifier starts with ``template_id``.
+
+        Returns ``None`` if no template or more than one template starts with ``template_id``.
+        """
+        identifiers = self._by_id.get(template_id)
+        if identifiers is None or len(identifiers) != 1:
+            return None
+        return self.get(identifiers[0])
+
+    def update(self, templates: Iterable[Template]) -> None:
+        """Add multiple templates to the dictionary."""
+        for template in templates:
+            self.add(template)
+
+    def dumps(self) -> str:
+        """Serialize the dictionary to a JSON string."""
+        return json.dumps(
+            {
+                "version": FORMAT_VERSION,
+                "templates": [[str(identifier), encode_template(tpl)] for identifier, tpl in self._templates.items()],
+            },
+            separators=(",", ":"),
+        )
+
+    def save(self, fh: TextIO) -> None:
+        """Write the dictionary to a file as JSON."""
+        fh.write(self.dumps())
+
+    @classmethod
+    def loads(cls, data: str, max_size: int = DEFAULT_MAX_SIZE, skip_definitions: bool = False) -> TemplateDictionary:
+        """Load a dictionary from a JSON string."""
+        obj = json.loads(data)
+        if obj.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported template dictionary version: {obj.get('version')}")
+
+        dictionary = cls(max_size, skip_definitions)
+        for identifier, element in obj["templates"]:
+            dictionary._add(decode_template(UUID(identifier), element))
+        return dictionary
+
+    @classmethod
+    def load(cls, fh: TextIO, max_size: int = DEFAULT_MAX_SIZE, skip_definitions: bool = False) -> TemplateDictionary:
+        """Load a dictionary from a JSON file."""
+        return cls.loads(fh.read(), max_size, skip_definitions)
+
+
+def _from_state(max_size: int, skip_definitions: bool, data: str) -> TemplateDictionary:
+    return TemplateDictionary.loads(data, max_size, skip_definitions)
+
+
+def encode_template(template: Template) -> Any:
+    """Encode the element tree of a template to JSON compatible types.
+
+    Tags are encoded as a list of their name, attributes and children, substitutions as their ID and text as is.
+    """
+    return _encode(template.element)
+
+
+def _encode(obj: Any) -> Any:
+    if isinstance(obj, BxmlTag):
+        return [
+            str(obj.name),
+            [[str(key), _encode(value)] for key, value in obj.attributes.items()],
+            [_encode(child) for child in obj.children],
+        ]
+
+    if isinstance(obj, BxmlSub):
+        return int(obj.sub_id)
+
+    if isinstance(obj, str):
+        return str(obj)
+
+    if obj is None:
+        return None
+
+    raise TypeError(f"Can't encode {type(obj).__name__} in a template")
+
+
+def decode_template(identifier: UUID, element: Any) -> Template:
+    """Create a template from an element tree that was encoded with :func:`encode_template`."""
+    template = Template()
+    template.identifier = identifier
+    template.element = _decode(template, element)
+    template.create_map()
+    return template
+
+
+def _decode(template: Template, obj: Any) -> Any:
+    if isinstance(obj, list):
+        name, attributes, children = obj
+        tag = BxmlTag(name)
+        tag.add_attributes({key: _decode(template, value) for key, value in attributes})
+        tag.add_children(_decode(template, child) for child in children)
+        return tag
+
+    if isinstance(obj, int):
+        sub = BxmlSub(obj)
+        template.add_sub(obj, sub)
+        return sub
+
+    return obj
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from dissect.eventlog.evt.carve import carve
 from dissect.eventlog.evt.evt import Evt, parse_chunk, parse_record
 
-__all__ = ("Evt", "parse_chunk", "parse_record")
+__all__ = ("Evt", "carve", "parse_chunk", "parse_record")
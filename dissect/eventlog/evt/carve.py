@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import io
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
+
+from dissect.eventlog.evt.c_evt import c_evt
+from dissect.eventlog.evt.evt import EVENTLOGRECORD_SIZE, parse_record
+from dissect.eventlog.utils import SCAN_BLOCK_SIZE, get_size, iter_parallel, iter_windows, split_ranges
+
+if TYPE_CHECKING:
+    import mmap
+    from collections.abc import Iterable, Iterator
+
+    from dissect.eventlog.evt.evt import Record
+
+# The Reserved field of EVENTLOGRECORD always contains the "LfLe" signature
+RECORD_SIGNATURE = b"LfLe"
+RECORD_SIGNATURE_OFFSET = 4
+
+MAX_RECORD_SIZE = 0x10000
+CARVE_RANGE_SIZE = 256 * 1024 * 1024
+
+log = logging.getLogger(__name__)
+log.setLevel(os.getenv("DISSECT_LOG_EVT", "CRITICAL"))
+
+_EVENTLOGRECORD = struct.Struct("<6I4H6I")
+_UINT32 = struct.Struct("<I")
+
+
+def carve(
+    fh: BinaryIO,
+    start: int = 0,
+    end: int | None = None,
+    workers: int | None = None,
+    block_size: int = SCAN_BLOCK_SIZE,
+    range_size: int = CARVE_RANGE_SIZE,
+) -> Iterator[tuple[int, Record]]:
+    """Carve EVT records from the range ``[start, end)`` of ``fh``, for example a disk image.
+
+    Yields tuples of the offset of the record in ``fh`` and the parsed record, in order of offset.
+    Hits that fall inside an earlier carved record are ignored, as are records that can't be parsed.
+
+    If ``workers`` is given, the range is split into ranges of ``range_size`` bytes that are scanned in a pool of
+    ``workers`` processes. This requires ``fh`` to be a file on disk, so the workers can open it themselves.
+    """
+    end = get_size(fh) if end is None else end
+
+    if workers and workers > 1:
+        path = _get_path(fh)
+        ranges = [(path, *rng, block_size) for rng in split_ranges(start, end, range_size)]
+        hits = (hit for result in iter_parallel(_carve_path_range, ranges, workers) for hit in result)
+    else:
+        hits = carve_range(fh, start, end, block_size)
+
+    last_end = -1
+    for offset, data in hits:
+        # Skip the hits that start inside the previous record
+        if offset < last_end:
+            continue
+
+        record = _parse_record(offset, data)
+        if record is not None:
+            last_end = offset + len(data)
+            yield offset, record
+
+
+def _parse_record(offset: int, data: bytes) -> Record | None:
+    buf = io.BytesIO(data)
+    try:
+        return parse_record(c_evt.EVENTLOGRECORD(buf), buf)
+    except Exception:
+        log.debug("Failed to parse the record at 0x%x", offset, exc_info=True)
+        return None
+
+
+def carve_range(
+    fh: BinaryIO, start: int = 0, end: int | None = None, block_size: int = SCAN_BLOCK_SIZE
+) -> Iterator[tuple[int, bytes]]:
+    """Find valid EVT records that start in the range ``[start, end)`` of ``fh``.
+
+    Yields tuples of the offset and raw data of every record. Records may overlap.
+    """
+    for base, buf, lo, hi in iter_windows(fh, start, end, block_size, MAX_RECORD_SIZE):
+        for pos in validate_records(buf, find_candidates(buf, lo, hi)):
+            length = _UINT32.unpack_from(buf, pos)[0]
+            yield base + pos, buf[pos : pos + length]
+
+
+def find_candidates(buf: bytes | mmap.mmap, lo: int, hi: int) -> list[int]:
+    """Return the positions in ``buf`` of all possible EVT records that start in the window ``[lo, hi)``."""
+    candidates = []
+
+    # The signature is not at the start of the record, so shift the window to find records that start inside it
+    find = buf.find
+    sig_lo = lo + RECORD_SIGNATURE_OFFSET
+    sig_hi = min(hi + RECORD_SIGNATURE_OFFSET + len(RECORD_SIGNATURE) - 1, len(buf))
+
+    pos = find(RECORD_SIGNATURE, sig_lo, sig_hi)
+    while pos != -1:
+        candidates.append(pos - RECORD_SIGNATURE_OFFSET)
+        pos = find(RECORD_SIGNATURE, pos + 1, sig_hi)
+
+    return candidates
+
+
+def validate_records(buf: bytes | mmap.mmap, candidates: Iterable[int]) -> list[int]:
+    """Return the positions of the ``candidates`` in ``buf`` that contain a plausible ``EVENTLOGRECORD``."""
+    unpack_header = _EVENTLOGRECORD.unpack_from
+    unpack_uint32 = _UINT32.unpack_from
+    buf_size = len(buf)
+
+    result = []
+    for pos in candidates:
+        if pos + EVENTLOGRECORD_SIZE > buf_size:
+            continue
+
+        header = unpack_header(buf, pos)
+        length = header[0]
+        string_offset, sid_length, sid_offset, data_length, data_offset = header[11:]
+
+        if (
+            length < EVENTLOGRECORD_SIZE + 4
+            or length > MAX_RECORD_SIZE
+            or length % 4
+            or pos + length > buf_size
+            # Every record ends with a copy of its length
+            or unpack_uint32(buf, pos + length - 4)[0] != length
+            or not EVENTLOGRECORD_SIZE <= sid_offset <= length
+            or sid_offset + sid_length > length
+            or not EVENTLOGRECORD_SIZE <= data_offset <= length
+            or data_offset + data_length > length
+            or string_offset > length
+            or (string_offset and string_offset < EVENTLOGRECORD_SIZE)
+        ):
+            continue
+
+        result.append(pos)
+
+    return result
+
+
+def _carve_path_range(path: Path, start: int, end: int, block_size: int) -> list[tuple[int, bytes]]:
+    with path.open("rb") as fh:
+        return list(carve_range(fh, start, end, block_size))
+
+
+def _get_path(fh: BinaryIO) -> Path:
+    name = getattr(fh, "name", None)
+    if not isinstance(name, str) or not Path(name).is_file():
+        raise ValueError("Carving with multiple workers requires a file handle of a file on disk")
+    return Path(name)
@@ -2,19 +2,26 @@
 # https://github.com/libyal/libevt/blob/main/documentation/Windows%20Event%20Log%20(EVT)%20format.asciidoc
 from __future__ import annotations
 
+import array
 import io
+import math
 import struct
+from bisect import bisect_left
 from collections import namedtuple
-from datetime import datetime, timezone
-from typing import TYPE_CHECKING, BinaryIO
+from datetime import timezone
+from operator import attrgetter, itemgetter
+from typing import TYPE_CHECKING, Any, BinaryIO
 
 from dissect.eventlog.evt.c_evt import c_evt
 from dissect.eventlog.exceptions import Error
+from dissect.eventlog.timestamps import UNITS, convert_epochs, epoch_to_datetime
+from dissect.eventlog.utils import DEFAULT_BATCH_SIZE
 
 EVENTLOGRECORD_SIZE = len(c_evt.EVENTLOGRECORD)
 
 if TYPE_CHECKING:
-    from collections.abc import Iterator
+    from collections.abc import Callable, Iterable, Iterator
+    from datetime import datetime
 
 # Should be refactored to a NamedTuple, but this requires fix all typing in the project
 Record = namedtuple(  # noqa: PYI024
@@ -39,6 +46,39 @@ Record = namedtuple(  # noqa: PYI024
     ],
 )
 
+# The columns that are returned as an array by Evt.iter_batches, with the timestamps as seconds since the epoch
+INTEGER_COLUMNS = frozenset(
+    (
+        "RecordNumber",
+        "TimeGenerated",
+        "TimeWritten",
+        "EventID",
+        "EventCode",
+        "EventFacility",
+        "EventCustomerFlag",
+        "EventSeverity",
+        "EventType",
+        "EventCategory",
+    )
+)
+
+TIMESTAMP_COLUMNS = ("TimeGenerated", "TimeWritten")
+
+# The columns that Evt.iter_batches reads from the record header, without reading the record body
+_HEADER_COLUMNS: dict[str, Callable[[c_evt.EVENTLOGRECORD], Any]] = {
+    "RecordNumber": attrgetter("RecordNumber"),
+    "TimeGenerated": attrgetter("TimeGenerated"),
+    "TimeWritten": attrgetter("TimeWritten"),
+    "EventID": attrgetter("EventID"),
+    "EventCode": lambda record: record.EventID & 0x0000FFFF,
+    "EventFacility": lambda record: record.EventID & 0x0FFF0000,
+    "EventCustomerFlag": lambda record: record.EventID & 0x20000000,
+    "EventSeverity": lambda record: record.EventID & 0xC0000000,
+    "EventType": attrgetter("EventType"),
+    "EventCategory": attrgetter("EventCategory"),
+    "record": lambda record: record,
+}
+
 BLOCK_SIZE = 4096
 DIRTY_NEEDLE = b"\x28\x00\x00\x00" + (b"\x11" * 4) + (b"\x22" * 4) + (b"\x33" * 4) + (b"\x44" * 4)
 
@@ -70,6 +110,9 @@ class Evt:
         self.oldest_record_number = self.header.OldestRecordNumber
         self.flags = self.header.Flags
 
+        self._index: dict[int, tuple[int, c_evt.EVENTLOGRECORD]] | None = None
+        self._time_index: list[tuple[int, int, c_evt.EVENTLOGRECORD]] | None = None
+
         # In the case of a "dirty" not-finalised file, the header might be outdated.
         # We can't trust header.StartOffset and header.EndOffset values, so we
         # need to look for end-of-file record
@@ -92,6 +135,71 @@ class Evt:
         self.oldest_record_number = eof_record.OldestRecordNumber
 
     def __iter__(self) -> Iterator[Record]:
+        for offset, record in self._iter_headers():
+            yield self._read_record(offset, record)
+
+    def iter_batches(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        columns: Iterable[str] | None = None,
+        timestamp_unit: str | None = None,
+    ) -> Iterator[dict[str, list | array.array]]:
+        """Yield the records in batches of columns, for loading into a dataframe.
+
+        Every batch maps the names of the ``Record`` fields in ``columns`` to lists of at most ``batch_size`` values.
+        By default, all fields except ``record`` are returned. The columns in :data:`INTEGER_COLUMNS` are returned as
+        an :class:`array.array`, with ``TimeGenerated`` and ``TimeWritten`` as seconds since the epoch, or in
+        ``timestamp_unit`` (``ns`` or ``us``) if it is given.
+
+        The columns of the record header are read from the header directly. The record bodies are only read if
+        one of the columns is in the body.
+        """
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch size: {batch_size}")
+        if timestamp_unit is not None and timestamp_unit not in UNITS:
+            raise ValueError(f"Unknown timestamp unit: {timestamp_unit}")
+
+        columns = [name for name in Record._fields if name != "record"] if columns is None else list(columns)
+        unknown = set(columns).difference(Record._fields)
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+
+        # The positions of the columns that are read from the record header and from the record body
+        header_getters = []
+        body_getters = []
+        for position, name in enumerate(columns):
+            getter = _HEADER_COLUMNS.get(name)
+            if getter is None:
+                body_getters.append((position, itemgetter(Record._fields.index(name))))
+            else:
+                header_getters.append((position, getter))
+
+        batch = [[] for _ in columns]
+        size = 0
+
+        for offset, header in self._iter_headers():
+            if size == batch_size:
+                yield _finish_batch(columns, batch, timestamp_unit)
+                batch = [[] for _ in columns]
+                size = 0
+
+            for position, getter in header_getters:
+                batch[position].append(getter(header))
+
+            if body_getters:
+                record = self._read_record(offset, header)
+                for position, getter in body_getters:
+                    batch[position].append(getter(record))
+            size += 1
+
+        if size:
+            yield _finish_batch(columns, batch, timestamp_unit)
+
+    def _iter_headers(self) -> Iterator[tuple[int, c_evt.EVENTLOGRECORD]]:
+        """Walk the ring of records and yield the offset and header of every record.
+
+        Only the fixed size ``EVENTLOGRECORD`` headers are read, the record bodies are skipped.
+        """
         fh = self.fh
         fh.seek(self.start_offset)
 
@@ -148,25 +256,11 @@ class Evt:
 
             next_pos = pos + record.Length
 
-            buffer = fh
             if next_pos > self.size:
                 # if record is truncated (record length is below the file size),
                 # the log file might've been rotated. It means missing record data
                 # will start from the beginning of the file.
-                #
-                # Read first part of the record, jump back to the header
-                # and read the second part of the record.
-
-                part1_size = self.size - pos
-                part2_size = record.Length - part1_size
-
-                data_part1 = fh.read(part1_size)
-
-                fh.seek(self._post_header_offset)
-                data_part2 = fh.read(part2_size)
-
-                buffer = io.BytesIO(data_part1 + data_part2)
-                next_pos = self._post_header_offset + part2_size
+                next_pos = self._post_header_offset + record.Length - (self.size - pos)
 
             elif next_pos == self.size:
                 # jump back to after the header for the next record
@@ -178,11 +272,91 @@ class Evt:
                 fh.seek(pos + record.Length)
                 continue
 
-            yield parse_record(record, buffer)
+            yield pos, record
 
             last_pos = pos
             fh.seek(next_pos)
 
+    def _read_record(self, offset: int, record: c_evt.EVENTLOGRECORD) -> Record:
+        """Read the body of the record with the given header at ``offset``."""
+        fh = self.fh
+        fh.seek(offset + EVENTLOGRECORD_SIZE)
+
+        buffer = fh
+        if offset + record.Length > self.size:
+            # Read first part of the record, jump back to the header
+            # and read the second part of the record.
+            part1_size = self.size - offset
+            part2_size = record.Length - part1_size
+
+            data_part1 = fh.read(part1_size - EVENTLOGRECORD_SIZE)
+
+            fh.seek(self._post_header_offset)
+            data_part2 = fh.read(part2_size)
+
+            buffer = io.BytesIO(data_part1 + data_part2)
+
+        return parse_record(record, buffer)
+
+    def build_index(self) -> None:
+        """Build an index of the record numbers and timestamps in this file.
+
+        Only the record headers are read, so this is a lot cheaper than iterating over all records.
+        The index is used by :meth:`get` and :meth:`iter_between`, which build it on first use.
+        """
+        self._index = {}
+        time_index = []
+
+        for offset, record in self._iter_headers():
+            self._index[record.RecordNumber] = (offset, record)
+            time_index.append((record.TimeGenerated, offset, record))
+
+        time_index.sort()
+        self._time_index = time_index
+
+    def get(self, record_number: int) -> Record:
+        """Return the record with the given record number."""
+        if self._index is None:
+            self.build_index()
+
+        try:
+            offset, record = self._index[record_number]
+        except KeyError:
+            raise Error(f"Record number {record_number} not found")
+
+        return self._read_record(offset, record)
+
+    def iter_between(self, start: datetime | None = None, end: datetime | None = None) -> Iterator[Record]:
+        """Yield all records that were generated between ``start`` (inclusive) and ``end`` (exclusive).
+
+        Records are yielded in order of ``TimeGenerated``. Naive datetimes are interpreted as UTC.
+        """
+        if self._time_index is None:
+            self.build_index()
+
+        time_index = self._time_index
+        lo = 0 if start is None else bisect_left(time_index, (_to_epoch(start),))
+        hi = len(time_index) if end is None else bisect_left(time_index, (_to_epoch(end),))
+
+        for _, offset, record in time_index[lo:hi]:
+            yield self._read_record(offset, record)
+
+
+def _finish_batch(columns: list[str], batch: list[list], timestamp_unit: str | None) -> dict[str, list | array.array]:
+    result = {}
+    for name, values in zip(columns, batch, strict=True):
+        if timestamp_unit is not None and name in TIMESTAMP_COLUMNS:
+            result[name] = convert_epochs(values, timestamp_unit)
+        else:
+            result[name] = array.array("q", values) if name in INTEGER_COLUMNS else values
+    return result
+
+
+def _to_epoch(ts: datetime) -> int:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return math.ceil(ts.timestamp())
+
 
 def find_needle(fh: BinaryIO, needle: bytes) -> Iterator[int]:
     needle_len = len(needle)
@@ -229,8 +403,8 @@ def parse_record(record: c_evt.EVENTLOGRECORD, buf: BinaryIO) -> Record:
 
     return Record(
         record.RecordNumber,
-        datetime.fromtimestamp(record.TimeGenerated, tz=timezone.utc),
-        datetime.fromtimestamp(record.TimeWritten, tz=timezone.utc),
+        epoch_to_datetime(record.TimeGenerated),
+        epoch_to_datetime(record.TimeWritten),
         record.EventID,
         record.EventID & 0x0000FFFF,
         record.EventID & 0x0FFF0000,
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from dissect.eventlog.evtx.carve import carve
 from dissect.eventlog.evtx.evtx import ElfChnk, Evtx
 
-__all__ = ("ElfChnk", "Evtx")
+__all__ = ("ElfChnk", "Evtx", "carve")
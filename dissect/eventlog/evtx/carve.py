@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import copy
+import io
+import logging
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from dissect.eventlog.bxml import BxmlSub
+from dissect.eventlog.evtx.c_evtx import c_evtx
+from dissect.eventlog.evtx.evtx import ElfChnk, parse_record
+from dissect.eventlog.utils import SCAN_BLOCK_SIZE, get_size, iter_parallel, iter_windows, split_ranges
+
+if TYPE_CHECKING:
+    import mmap
+    from collections.abc import Iterable, Iterator
+
+    from dissect.eventlog.bxml import Template, TemplateDictionary
+    from dissect.eventlog.utils import KeyValueCollection
+
+log = logging.getLogger(__name__)
+log.setLevel(os.getenv("DISSECT_LOG_EVTX", "CRITICAL"))
+
+CHUNK_SIGNATURE = b"ElfChnk\x00"
+CHUNK_SIZE = 0x10000
+CHUNK_HEADER_SIZE = 0x200
+
+RECORD_SIGNATURE = b"**\x00\x00"
+RECORD_HEADER_SIZE = 24
+MIN_RECORD_SIZE = RECORD_HEADER_SIZE + 8
+MAX_RECORD_SIZE = CHUNK_SIZE - CHUNK_HEADER_SIZE
+
+CARVE_RANGE_SIZE = 256 * 1024 * 1024
+
+# A record starts with a fragment header and a template instance token. The offset of the template reference
+# and of the template definition that directly follows it, if the template is defined in the record itself.
+_TEMPLATE_INSTANCE_PREFIX = b"\x0f\x01\x01\x00\x0c"
+_TEMPLATE_REFERENCE_OFFSET = RECORD_HEADER_SIZE + 10
+_TEMPLATE_DEFINITION_OFFSET = RECORD_HEADER_SIZE + 14
+_TEMPLATE_DEFINITION_SIZE = 24
+
+_UINT32 = struct.Struct("<I")
+
+# A group of carved records: the offset and end offset of the area they cover, and the records themselves
+CarvedGroup = tuple[int, int, list[tuple[int, "KeyValueCollection"]]]
+
+
+def carve(
+    fh: BinaryIO,
+    start: int = 0,
+    end: int | None = None,
+    workers: int | None = None,
+    block_size: int = SCAN_BLOCK_SIZE,
+    range_size: int = CARVE_RANGE_SIZE,
+    template_dictionary: TemplateDictionary | None = None,
+) -> Iterator[tuple[int, KeyValueCollection]]:
+    """Carve EVTX records from the range ``[start, end)`` of ``fh``, for example a disk image.
+
+    Yields tuples of the offset of the record in ``fh`` and the parsed record, in order of offset.
+
+    Chunks are only parsed if their header checksum is valid. Records outside of these intact chunks are
+    carved on their own. Their names and templates are resolved using the data around them, if the chunk
+    they belong to can be determined, or by looking up their template in ``template_dictionary``.
+    The templates of all parsed chunks and records are added to ``template_dictionary``.
+
+    If ``workers`` is given, the range is split into ranges of ``range_size`` bytes that are carved in a pool of
+    ``workers`` processes. This requires ``fh`` to be a file on disk, so the workers can open it themselves.
+    The workers get a copy of ``template_dictionary``, the templates they learn are not added to it.
+    """
+    end = get_size(fh) if end is None else end
+
+    if workers and workers > 1:
+        path = _get_path(fh)
+        ranges = [(path, *rng, block_size, template_dictionary) for rng in split_ranges(start, end, range_size)]
+        groups = (group for result in iter_parallel(_carve_path_range, ranges, workers) for group in result)
+    else:
+        groups = carve_range(fh, start, end, block_size, template_dictionary)
+
+    last_end = -1
+    for offset, group_end, records in groups:
+        # Skip anything that was already carved as part of an earlier chunk or record
+        if offset < last_end:
+            continue
+
+        last_end = group_end
+        yield from records
+
+
+def carve_range(
+    fh: BinaryIO,
+    start: int = 0,
+    end: int | None = None,
+    block_size: int = SCAN_BLOCK_SIZE,
+    template_dictionary: TemplateDictionary | None = None,
+) -> Iterator[CarvedGroup]:
+    """Carve the EVTX chunks and loose records that start in the range ``[start, end)`` of ``fh``.
+
+    Yields a tuple per intact chunk or loose record, with the offset and end offset of the area that it covers
+    and a list of the offsets and parsed data of the records in it.
+    """
+    context = _ChunkContext(fh, template_dictionary)
+    covered = -1
+
+    for base, buf, lo, hi in iter_windows(fh, start, end, block_size, CHUNK_SIZE):
+        context.set_buffer(base, buf)
+
+        chunks = validate_chunks(buf, find_signatures(buf, CHUNK_SIGNATURE, lo, hi))
+        records = validate_records(buf, find_signatures(buf, RECORD_SIGNATURE, lo, hi))
+        hits = sorted([(pos, True) for pos in chunks] + [(pos, False) for pos in records])
+
+        for pos, is_chunk in hits:
+            offset = base + pos
+            if offset < covered:
+                continue
+
+            if is_chunk:
+                chunk_end, result = _read_chunk(context, offset, buf[pos : pos + CHUNK_SIZE])
+            else:
+                size = _UINT32.unpack_from(buf, pos + 4)[0]
+                chunk_end = offset + size
+                result = _read_record(context, offset, buf[pos : pos + size])
+
+            covered = chunk_end
+            if result:
+                yield offset, chunk_end, result
+
+
+def find_signatures(buf: bytes | mmap.mmap, signature: bytes, lo: int, hi: int) -> list[int]:
+    """Return the positions of ``signature`` in ``buf`` that start in the window ``[lo, hi)``."""
+    candidates = []
+
+    find = buf.find
+    sig_hi = min(hi + len(signature) - 1, len(buf))
+
+    pos = find(signature, lo, sig_hi)
+    while pos != -1:
+        candidates.append(pos)
+        pos = find(signature, pos + 1, sig_hi)
+
+    return candidates
+
+
+def validate_chunks(buf: bytes | mmap.mmap, candidates: Iterable[int]) -> list[int]:
+    """Return the positions of the ``candidates`` in ``buf`` that contain a chunk header with a valid checksum."""
+    unpack_uint32 = _UINT32.unpack_from
+    buf_size = len(buf)
+
+    result = []
+    for pos in candidates:
+        if pos + CHUNK_HEADER_SIZE > buf_size:
+            continue
+
+        # The checksum covers the first 120 bytes of the header and the string and template tables
+        checksum = zlib.crc32(buf[pos : pos + 120])
+        checksum = zlib.crc32(buf[pos + 128 : pos + CHUNK_HEADER_SIZE], checksum)
+        if checksum != unpack_uint32(buf, pos + 124)[0]:
+            continue
+
+        result.append(pos)
+
+    return result
+
+
+def validate_records(buf: bytes | mmap.mmap, candidates: Iterable[int]) -> list[int]:
+    """Return the positions of the ``candidates`` in ``buf`` that contain a complete EVTX record."""
+    unpack_uint32 = _UINT32.unpack_from
+    buf_size = len(buf)
+
+    result = []
+    for pos in candidates:
+        if pos + RECORD_HEADER_SIZE > buf_size:
+            continue
+
+        size = unpack_uint32(buf, pos + 4)[0]
+        if (
+            size < MIN_RECORD_SIZE
+            or size > MAX_RECORD_SIZE
+            or pos + size > buf_size
+            # Every record ends with a copy of its size
+            or unpack_uint32(buf, pos + size - 4)[0] != size
+        ):
+            continue
+
+        result.append(pos)
+
+    return result
+
+
+class _ChunkContext:
+    """Keeps track of the chunk that loose records most likely belong to."""
+
+    def __init__(self, fh: BinaryIO, template_dictionary: TemplateDictionary | None):
+        self.fh = fh
+        self.template_dictionary = template_dictionary
+        self.base = None
+        self.buf = None
+        self.offset = None
+        self.stream = None
+        self.templates = None
+
+    def set_buffer(self, base: int, buf: bytes | mmap.mmap) -> None:
+        self.base = base
+        self.buf = buf
+
+    def set_chunk(self, offset: int, stream: BinaryIO, templates: dict[int, Template]) -> None:
+        self.offset = offset
+        self.stream = stream
+        self.templates = templates
+
+    def contains(self, offset: int) -> bool:
+        return self.offset is not None and self.offset <= offset < self.offset + CHUNK_SIZE
+
+    def read(self, offset: int, size: int) -> bytes:
+        pos = offset - self.base
+        if pos >= 0 and pos + size <= len(self.buf):
+            return self.buf[pos : pos + size]
+
+        self.fh.seek(offset)
+        return self.fh.read(size)
+
+
+def _read_chunk(context: _ChunkContext, offset: int, data: bytes) -> tuple[int, list[tuple[int, KeyValueCollection]]]:
+    chunk = ElfChnk(data, template_dictionary=context.template_dictionary)
+    context.set_chunk(offset, chunk.stream, chunk.templates)
+
+    result = [(offset + record_offset, rec) for record_offset, rec in chunk.iter_records()]
+
+    # Old records may still be present in the free space of the chunk, carve those on their own
+    return offset + chunk.records_end, result
+
+
+def _read_record(context: _ChunkContext, offset: int, data: bytes) -> list[tuple[int, KeyValueCollection]]:
+    chunk_offset = _find_chunk_offset(offset, data)
+    if chunk_offset is not None and chunk_offset != context.offset:
+        # This record defines its own template, which tells us where its chunk starts
+        chunk_data = context.read(chunk_offset, CHUNK_SIZE)
+        context.set_chunk(chunk_offset, io.BytesIO(chunk_data), {})
+    elif not context.contains(offset):
+        if context.template_dictionary is None:
+            log.debug("Can't determine the chunk of the record at 0x%x", offset)
+            return []
+
+        # Parse the record without its chunk, so its template can only come from the template dictionary
+        return _parse_record(context, offset, data, 0, io.BytesIO(b""), {})
+
+    return _parse_record(context, offset, data, offset - context.offset, context.stream, context.templates)
+
+
+def _parse_record(
+    context: _ChunkContext,
+    offset: int,
+    data: bytes,
+    chunk_offset: int,
+    chunk_stream: BinaryIO,
+    templates: dict[int, Template],
+) -> list[tuple[int, KeyValueCollection]]:
+    try:
+        rec = parse_record(c_evtx.EVTX_RECORD(data), chunk_offset, chunk_stream, templates, context.template_dictionary)
+    except Exception:
+        log.debug("Failed to parse the record at 0x%x", offset, exc_info=True)
+        return []
+
+    return [(offset, rec)] if rec is not None else []
+
+
+def _find_chunk_offset(offset: int, data: bytes) -> int | None:
+    """Determine the offset of the chunk of the record at ``offset``, if the record defines its own template.
+
+    A template definition directly follows the template reference, which contains its offset in the chunk.
+    """
+    fragment_offset = _TEMPLATE_DEFINITION_OFFSET + _TEMPLATE_DEFINITION_SIZE
+    if (
+        len(data) <= fragment_offset
+        or data[RECORD_HEADER_SIZE : RECORD_HEADER_SIZE + len(_TEMPLATE_INSTANCE_PREFIX)] != _TEMPLATE_INSTANCE_PREFIX
+    ):
+        return None
+
+    definition_offset = _UINT32.unpack_from(data, _TEMPLATE_REFERENCE_OFFSET)[0]
+    data_size = _UINT32.unpack_from(data, fragment_offset - 4)[0]
+    if (
+        definition_offset >= CHUNK_SIZE
+        or definition_offset < CHUNK_HEADER_SIZE + _TEMPLATE_DEFINITION_OFFSET
+        or fragment_offset + data_size > len(data)
+        or data[fragment_offset] != 0x0F
+    ):
+        return None
+
+    return offset + _TEMPLATE_DEFINITION_OFFSET - definition_offset
+
+
+def _carve_path_range(
+    path: Path, start: int, end: int, block_size: int, template_dictionary: TemplateDictionary | None
+) -> list[CarvedGroup]:
+    with path.open("rb") as fh:
+        # Start a chunk early, so the chunk of loose records at the start of the range is known
+        groups = carve_range(fh, max(0, start - CHUNK_SIZE), end, block_size, template_dictionary)
+        return [
+            (offset, group_end, [(rec_offset, _to_builtin(rec)) for rec_offset, rec in records])
+            for offset, group_end, records in groups
+            if offset >= start
+        ]
+
+
+def _to_builtin(value: Any) -> Any:
+    """Convert the cstruct types in a parsed record to builtin types, so it can be sent back from a worker."""
+    if isinstance(value, dict):
+        result = copy.copy(value)
+        dict.clear(result)
+        dict.update(result, {_to_builtin(key): _to_builtin(item) for key, item in value.items()})
+        return result
+
+    if isinstance(value, BxmlSub):
+        sub = BxmlSub(int(value.sub_id))
+        sub.set(_to_builtin(value.get()))
+        return sub
+
+    if isinstance(value, list):
+        return [_to_builtin(item) for item in value]
+
+    for builtin in (int, float, str, bytes):
+        if isinstance(value, builtin) and type(value) is not builtin and not isinstance(value, bool):
+            return builtin(value)
+
+    return value
+
+
+def _get_path(fh: BinaryIO) -> Path:
+    name = getattr(fh, "name", None)
+    if not isinstance(name, str) or not Path(name).is_file():
+        raise ValueError("Carving with multiple workers requires a file handle of a file on disk")
+    return Path(name)
@@ -5,25 +5,80 @@ from __future__ import annotations
 import io
 import logging
 import os
-from typing import TYPE_CHECKING, BinaryIO
+import struct
+from typing import TYPE_CHECKING, Any, BinaryIO
 
 from dissect.eventlog.bxml import Bxml, BxmlSub, EvtxNameReader, parse_bxml
 from dissect.eventlog.evtx.c_evtx import c_evtx
 from dissect.eventlog.exceptions import MalformedElfChnkException
+from dissect.eventlog.timestamps import UNITS, convert_filetimes
+from dissect.eventlog.utils import DEFAULT_BATCH_SIZE, to_array
 
 if TYPE_CHECKING:
-    from collections.abc import Iterator
+    import array
+    from collections.abc import Iterable, Iterator
     from pathlib import Path
 
-    from dissect.eventlog.utils import KeyValueCollection
+    from dissect.eventlog.bxml import Template, TemplateDictionary
+    from dissect.eventlog.utils import CompactRecord, KeyValueCollection, RecordSchema
 
 log = logging.getLogger(__name__)
 log.setLevel(os.getenv("DISSECT_LOG_EVTX", "CRITICAL"))
 
+CHUNK_HEADER_SIZE = len(c_evtx.EVTX_CHUNK)
+
+RECORD_SIGNATURE = b"**\x00\x00"
+# The record header and the size copy at the end of the record
+MIN_RECORD_SIZE = 28
+
+_UINT32 = struct.Struct("<I")
+
+# The columns that are returned as an array by Evtx.iter_batches, with their array type. Keywords and timestamps are
+# only integers if the records are parsed with raw_types
+INTEGER_COLUMNS = {
+    "EventID": "q",
+    "EventRecordID": "q",
+    "Execution_ProcessID": "q",
+    "Execution_ThreadID": "q",
+    "Keywords": "Q",
+    "Level": "q",
+    "Opcode": "q",
+    "Task": "q",
+    "TimeCreated_SystemTime": "q",
+    "Version": "q",
+}
+
+# The columns that are converted by Evtx.iter_batches if a timestamp unit is given
+TIMESTAMP_COLUMNS = frozenset(("TimeCreated_SystemTime",))
+
 
 class ElfChnk:
-    def __init__(self, d: bytes, path: Path | None = None):
+    """An EVTX chunk.
+
+    Records that can't be parsed are skipped, after which reading continues at the next valid record in the chunk.
+    The number of records and bytes that were skipped while reading are kept in ``skipped_records`` and
+    ``skipped_bytes``.
+
+    If ``compact`` is set, records are returned as :class:`~dissect.eventlog.utils.CompactRecord` objects. If
+    ``raw_types`` is set, values are not formatted, see :func:`parse_record`. If ``columns`` is given, only the values
+    of these keys are returned, as a tuple.
+    """
+
+    def __init__(
+        self,
+        d: bytes,
+        path: Path | None = None,
+        template_dictionary: TemplateDictionary | None = None,
+        compact: bool = False,
+        raw_types: bool = False,
+        columns: tuple[str, ...] | None = None,
+    ):
         self.path = path
+        self.template_dictionary = template_dictionary
+        self.compact = compact
+        self.raw_types = raw_types
+        self.columns = columns
+        self.data = d
         self.stream = io.BytesIO(d)
         self.header = c_evtx.EVTX_CHUNK(self.stream)
 
@@ -33,67 +88,228 @@ class ElfChnk:
 
             raise MalformedElfChnkException("Bad ElfChnk magic")
 
-        self.empty = self.header.free_space_offset == 512
+        self.empty = self.header.free_space_offset == CHUNK_HEADER_SIZE
 
         self.names = {}
         self.templates = {}
         self.data_offset = 0
 
+        self.skipped_records = 0
+        self.skipped_bytes = 0
+
+    @property
+    def records_end(self) -> int:
+        """The offset in the chunk up to which records were written."""
+        free_space_offset = self.header.free_space_offset
+        if CHUNK_HEADER_SIZE <= free_space_offset <= len(self.data):
+            return free_space_offset
+        return len(self.data)
+
     def read(self, records: bool = True) -> Iterator[KeyValueCollection]:
-        try:
-            while True:
-                offset = self.stream.tell()
-                try:
-                    r = c_evtx.EVTX_RECORD(self.stream)
-                except EOFError:
-                    break
+        for _, rec in self.iter_records():
+            yield rec
+
+    def iter_records(self) -> Iterator[tuple[int, KeyValueCollection]]:
+        """Yield the offset in the chunk and the parsed data of every record in this chunk."""
+        records_end = self.records_end
+
+        offset = CHUNK_HEADER_SIZE
+        while True:
+            self.stream.seek(offset)
+            try:
+                r = c_evtx.EVTX_RECORD(self.stream)
+            except EOFError:
+                r = None
 
-                if r.signature != 0x2A2A:
+            if r is None or r.signature != 0x2A2A:
+                if offset >= records_end:
                     break
 
+                rec = None
+            elif r.size != r.size_copy:
                 # Truncated or partially written record
-                if r.size != r.size_copy:
-                    continue
-
+                rec = None
+            else:
                 self.data_offset = offset + 24
 
-                bxml_data = io.BytesIO(r.data)
-                bxml = Bxml(bxml_stream=bxml_data, elf_chunk_stream=self.stream)
-                bxml.data_offset = self.data_offset
-                bxml.templates = self.templates
-                bxml.template = None
-                bxml.set_name_reader(EvtxNameReader(bxml))
-                rec = parse_bxml(bxml)
-
-                # Validate record
-                if (
-                    "TimeCreated_SystemTime" not in rec
-                    or (
-                        isinstance(rec["TimeCreated_SystemTime"], BxmlSub)
-                        and rec["TimeCreated_SystemTime"].get() is None
+                try:
+                    rec = parse_record(
+                        r,
+                        offset,
+                        self.stream,
+                        self.templates,
+                        self.template_dictionary,
+                        self.compact,
+                        self.raw_types,
+                        self.columns,
                     )
-                    or rec["TimeCreated_SystemTime"] is None
-                ):
-                    log.warning("Missing timestamp in record")
+                except Exception:
+                    log.debug("%s: Exception when processing record at 0x%x", self.path, offset, exc_info=True)
+                    rec = None
+
+                if rec is not None:
+                    yield offset, rec
+                    offset += r.size
                     continue
 
-                yield rec
-        except Exception:
-            if not self.empty:
-                log.exception("Exception when processing chunk")
-                raise MalformedElfChnkException
+                if self._is_valid_record(offset):
+                    # The record itself is intact, so the next record starts right after it
+                    self.skipped_records += 1
+                    self.skipped_bytes += r.size
+                    offset += r.size
+                    continue
+
+            self.skipped_records += 1
+
+            # Resynchronize at the next valid record
+            next_offset = self._find_next_record(offset + 1, records_end)
+            if next_offset is None:
+                self.skipped_bytes += max(records_end - offset, 0)
+                break
+
+            log.warning("%s: Skipped 0x%x bytes of corrupt data at 0x%x", self.path, next_offset - offset, offset)
+            self.skipped_bytes += next_offset - offset
+            offset = next_offset
+
+    def _is_valid_record(self, offset: int) -> bool:
+        """Return whether there is a record with a matching size and size copy at ``offset``."""
+        data = self.data
+        if offset + 8 > len(data):
+            return False
+
+        size = _UINT32.unpack_from(data, offset + 4)[0]
+        return (
+            data[offset : offset + 4] == RECORD_SIGNATURE
+            and MIN_RECORD_SIZE <= size <= len(data) - offset
+            and _UINT32.unpack_from(data, offset + size - 4)[0] == size
+        )
+
+    def _find_next_record(self, start: int, end: int) -> int | None:
+        """Find the offset of the next valid record that starts in ``[start, end)``."""
+        offset = self.data.find(RECORD_SIGNATURE, start, end)
+        while offset != -1:
+            if self._is_valid_record(offset):
+                return offset
+            offset = self.data.find(RECORD_SIGNATURE, offset + 1, end)
+        return None
 
 
 class Evtx:
-    """Microsoft Event logs."""
+    """Microsoft Event logs.
+
+    If a :class:`~dissect.eventlog.bxml.TemplateDictionary` is given, the templates of all parsed chunks
+    are added to it.
+
+    If ``compact`` is set, records are returned as :class:`~dissect.eventlog.utils.CompactRecord` objects. Records
+    that are parsed from the same template share their keys, which takes a lot less memory when buffering records.
+
+    If ``raw_types`` is set, values are not formatted, see :func:`parse_record`.
+    """
 
-    def __init__(self, fh: BinaryIO, path: Path | None = None):
+    def __init__(
+        self,
+        fh: BinaryIO,
+        path: Path | None = None,
+        template_dictionary: TemplateDictionary | None = None,
+        compact: bool = False,
+        raw_types: bool = False,
+    ):
         self.path = path
+        self.template_dictionary = template_dictionary
+        self.compact = compact
+        self.raw_types = raw_types
         self.fh = fh
         self.header = c_evtx.EVTX_HEADER(self.fh)
         self.count = 0
+        self.skipped_records = 0
+        self.skipped_bytes = 0
 
-    def __iter__(self) -> Iterator[KeyValueCollection]:
+    def __iter__(self) -> Iterator[KeyValueCollection | CompactRecord]:
+        return self._iter_records(self.compact)
+
+    def iter_batches(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        columns: Iterable[str] | None = None,
+        timestamp_unit: str | None = None,
+    ) -> Iterator[dict[str, list | array.array]]:
+        """Yield the records in batches of columns, for loading into a dataframe.
+
+        Every batch maps the column names to lists of at most ``batch_size`` values. Records that don't have a
+        column have ``None`` as value. If ``columns`` is not given, a batch has a column for every key of its records.
+        Substitution values are unwrapped, and the columns in :data:`INTEGER_COLUMNS` are returned as an
+        :class:`array.array` if all their values are integers.
+
+        If ``timestamp_unit`` is ``ns`` or ``us``, the timestamps in :data:`TIMESTAMP_COLUMNS` are converted to
+        integers since the epoch, see :func:`~dissect.eventlog.timestamps.convert_filetimes`.
+
+        The columns are filled from the values of the compiled templates, records are not mapped to keys first. If
+        ``columns`` is given, BinXML fragments are only parsed if one of the columns can be in them.
+        """
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch size: {batch_size}")
+        if timestamp_unit is not None and timestamp_unit not in UNITS:
+            raise ValueError(f"Unknown timestamp unit: {timestamp_unit}")
+
+        if columns is not None:
+            yield from self._iter_column_batches(batch_size, tuple(columns), timestamp_unit)
+            return
+
+        # The columns of every schema with the position of their value
+        plans: dict[RecordSchema, list[tuple[str, int]]] = {}
+        batch: dict[str, list] = {}
+        size = 0
+
+        for record in self._iter_records(True):
+            if size == batch_size:
+                yield _finish_batch(batch, size, None, timestamp_unit)
+                batch = {}
+                size = 0
+
+            schema = record.schema
+            plan = plans.get(schema)
+            if plan is None:
+                index = schema.index
+                plan = plans[schema] = [(key, index[key]) for key in schema.keys]
+
+            row = record.row
+            for key, position in plan:
+                column = batch.get(key)
+                if column is None:
+                    column = batch[key] = []
+                if len(column) != size:
+                    column.extend([None] * (size - len(column)))
+
+                value = row[position]
+                column.append(value.value if type(value) is BxmlSub else value)
+            size += 1
+
+        if size:
+            yield _finish_batch(batch, size, None, timestamp_unit)
+
+    def _iter_column_batches(
+        self, batch_size: int, columns: tuple[str, ...], timestamp_unit: str | None
+    ) -> Iterator[dict[str, list | array.array]]:
+        """Yield batches of ``columns``, of which the values are read from the records without creating them."""
+        batch = [[] for _ in columns]
+        size = 0
+
+        for row in self._iter_records(True, columns):
+            if size == batch_size:
+                yield _finish_batch(dict(zip(columns, batch, strict=True)), size, columns, timestamp_unit)
+                batch = [[] for _ in columns]
+                size = 0
+
+            for column, value in zip(batch, row, strict=True):
+                column.append(value.value if type(value) is BxmlSub else value)
+            size += 1
+
+        if size:
+            yield _finish_batch(dict(zip(columns, batch, strict=True)), size, columns, timestamp_unit)
+
+    def _iter_records(
+        self, compact: bool, columns: tuple[str, ...] | None = None
+    ) -> Iterator[KeyValueCollection | CompactRecord | tuple[Any, ...]]:
         chunk_offset = self.header.header_block_size
 
         skip = self.header.header_block_size - len(c_evtx.EVTX_HEADER)
@@ -105,12 +321,102 @@ class Evtx:
             if len(chunk) != 0x10000:
                 break
 
+            offset = chunk_offset
+            chunk_offset += 0x10000
+
             try:
-                c = ElfChnk(chunk, self.path)
+                c = ElfChnk(chunk, self.path, self.template_dictionary, compact, self.raw_types, columns)
                 for r in c.read():
                     yield r
                     self.count += 1
             except MalformedElfChnkException:
                 continue
 
-            chunk_offset += 0x10000
+            if c.skipped_records:
+                log.warning(
+                    "%s: Skipped %d records and 0x%x bytes in chunk at 0x%x",
+                    self.path,
+                    c.skipped_records,
+                    c.skipped_bytes,
+                    offset,
+                )
+            self.skipped_records += c.skipped_records
+            self.skipped_bytes += c.skipped_bytes
+
+
+def _finish_batch(
+    batch: dict[str, list], size: int, columns: list[str] | None, timestamp_unit: str | None
+) -> dict[str, list | array.array]:
+    result = {}
+    for key in batch if columns is None else columns:
+        column = batch.get(key, [])
+        if len(column) != size:
+            column.extend([None] * (size - len(column)))
+
+        if timestamp_unit is not None and key in TIMESTAMP_COLUMNS:
+            result[key] = convert_filetimes(column, timestamp_unit)
+            continue
+
+        typecode = INTEGER_COLUMNS.get(key)
+        result[key] = column if typecode is None else to_array(typecode, column)
+    return result
+
+
+def parse_record(
+    record: c_evtx.EVTX_RECORD,
+    offset: int,
+    chunk_stream: BinaryIO,
+    templates: dict[int, Template],
+    template_dictionary: TemplateDictionary | None = None,
+    compact: bool = False,
+    raw_types: bool = False,
+    columns: tuple[str, ...] | None = None,
+) -> KeyValueCollection | CompactRecord | tuple[Any, ...] | None:
+    """Parse the BinXML data of an EVTX record.
+
+    Args:
+        record: The record to parse.
+        offset: The offset of the record in its chunk.
+        chunk_stream: A stream of the chunk data, used to look up names that are defined outside of the record.
+        templates: The templates that were defined in the chunk so far, mapped by their offset in the chunk.
+            Templates that are defined in this record are added to it.
+        template_dictionary: An optional dictionary to learn templates from this record and to look up templates
+            that are not defined in the chunk.
+        compact: Whether to return a :class:`~dissect.eventlog.utils.CompactRecord`.
+        raw_types: Whether to skip the formatting of values. Hexadecimal and size values are returned as ``int``,
+            binary values as ``bytes``, GUIDs as :class:`~uuid.UUID` and timestamps as ``int`` FILETIME ticks.
+            Use :func:`~dissect.eventlog.bxml.bxml.format_value` to format them afterwards.
+        columns: The keys of which to return the values as a tuple, instead of the record. Missing keys are ``None``.
+
+    Returns:
+        The parsed record, or ``None`` if it has no valid timestamp.
+    """
+    bxml_data = io.BytesIO(record.data)
+    bxml = Bxml(bxml_stream=bxml_data, elf_chunk_stream=chunk_stream)
+    bxml.data_offset = offset + 24
+    bxml.templates = templates
+    bxml.template_dictionary = template_dictionary
+    bxml.raw_types = raw_types
+    bxml.template = None
+    bxml.set_name_reader(EvtxNameReader(bxml))
+
+    if columns is not None:
+        row = parse_bxml(bxml, columns=(*columns, "TimeCreated_SystemTime"))
+        timestamp = row[-1]
+        if timestamp is None or (isinstance(timestamp, BxmlSub) and timestamp.get() is None):
+            log.warning("Missing timestamp in record")
+            return None
+        return row[:-1]
+
+    rec = parse_bxml(bxml, compact)
+
+    # Validate record
+    if (
+        "TimeCreated_SystemTime" not in rec
+        or (isinstance(rec["TimeCreated_SystemTime"], BxmlSub) and rec["TimeCreated_SystemTime"].get() is None)
+        or rec["TimeCreated_SystemTime"] is None
+    ):
+        log.warning("Missing timestamp in record")
+        return None
+
+    return rec
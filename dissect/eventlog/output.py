@@ -0,0 +1,289 @@
+"""Serializers that write parsed records as JSON Lines or as Splunk ``key="value"`` events.
+
+Values are formatted the same way by both serializers:
+
+- Datetimes are written in ISO 8601, with a ``Z`` suffix if they are in UTC.
+- Substitution values are unwrapped.
+- Binary values that are hexlified, as they are parsed by default, are written as text. All other bytes, such as the
+  binary values that are parsed with ``raw_types``, are written as hex.
+- GUIDs that were parsed with ``raw_types`` are formatted like Windows does.
+
+The function that formats a value is looked up by the exact type of the value, so the ``int`` and ``str`` subclasses
+of :mod:`dissect.cstruct` are formatted as fast as the built-in types are.
+"""
+
+from __future__ import annotations
+
+import json
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any
+
+from dissect.eventlog.bxml.bxml import BxmlSub, HexBytes, format_guid
+from dissect.eventlog.utils import CompactRecord
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Mapping
+    from typing import BinaryIO
+
+    from dissect.eventlog.utils import RecordSchema
+
+# The number of characters that are collected before they are written to the output
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# The maximum number of keys and schemas of which the formatted prefixes are cached
+PREFIX_CACHE_SIZE = 4096
+
+# The key of the value that Splunk events start with
+TIMESTAMP_KEY = "TimeCreated_SystemTime"
+
+
+def format_timestamp(dt: datetime) -> str:
+    """Format a datetime in ISO 8601. Naive datetimes are assumed to be in UTC, like all timestamps of event logs."""
+    if dt.tzinfo is timezone.utc:
+        return dt.isoformat()[:-6] + "Z"
+    if dt.tzinfo is None:
+        return dt.isoformat() + "Z"
+    if not dt.utcoffset():
+        return dt.replace(tzinfo=None).isoformat() + "Z"
+    return dt.isoformat()
+
+
+def format_bytes(value: bytes) -> str:
+    """Format bytes as hex, or as text if they are already hexlified."""
+    if isinstance(value, HexBytes):
+        return value.decode()
+    return value.hex()
+
+
+def _format_text(value: Any) -> str | None:
+    """Format a value as text, or return ``None`` if it has no value."""
+    return _get_text_formatter(type(value))(value)
+
+
+def _get_text_formatter(cls: type) -> Callable[[Any], str | None]:
+    formatter = _TEXT_FORMATTERS.get(cls)
+    if formatter is None:
+        if issubclass(cls, bool):
+            formatter = str
+        elif issubclass(cls, int):
+            formatter = int.__repr__
+        elif issubclass(cls, str):
+            formatter = str.__str__
+        elif issubclass(cls, datetime):
+            formatter = format_timestamp
+        elif issubclass(cls, HexBytes):
+            formatter = bytes.decode
+        elif issubclass(cls, (bytes, bytearray)):
+            formatter = bytes.hex if issubclass(cls, bytes) else bytearray.hex
+        elif issubclass(cls, uuid.UUID):
+            formatter = format_guid
+        elif issubclass(cls, BxmlSub):
+            formatter = _format_sub_text
+        else:
+            formatter = str
+        _TEXT_FORMATTERS[cls] = formatter
+    return formatter
+
+
+def _format_sub_text(value: BxmlSub) -> str | None:
+    return _format_text(value.value)
+
+
+def _json_default(value: Any) -> Any:
+    """Convert a value that :mod:`json` can't encode by itself."""
+    if isinstance(value, BxmlSub):
+        return value.value
+    return _format_text(value)
+
+
+def _quote(value: str) -> str:
+    """Quote a value like the ``repr`` of a string, but always between double quotes."""
+    if value.isprintable() and "\\" not in value and '"' not in value:
+        return '"' + value + '"'
+
+    result = repr(value)
+    if result[0] == '"':
+        return result
+    return '"' + result[1:-1].replace('"', '\\"') + '"'
+
+
+_TEXT_FORMATTERS: dict[type, Callable[[Any], str | None]] = {
+    type(None): lambda value: None,
+    str: str.__str__,
+    int: int.__repr__,
+    datetime: format_timestamp,
+}
+
+
+class Serializer(ABC):
+    """Writes records as lines of text, see :class:`JsonLinesSerializer` and :class:`SplunkSerializer`.
+
+    The formatted prefixes of the keys of records are cached, per schema for
+    :class:`~dissect.eventlog.utils.CompactRecord` and per key for other records.
+    """
+
+    def __init__(self, buffer_size: int = WRITE_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._prefixes: dict[str, str] = {}
+        self._schema_prefixes: dict[RecordSchema, tuple[tuple[str, ...], tuple[int, ...] | None]] = {}
+
+    @abstractmethod
+    def format(self, record: Mapping[str, Any]) -> str:
+        """Format a record as a single line, without the line ending."""
+
+    def write(self, records: Iterable[Mapping[str, Any]], fh: BinaryIO) -> int:
+        """Write ``records`` to ``fh`` as UTF-8, one per line. Returns the number of records that were written.
+
+        Lines are collected until there are ``buffer_size`` characters, so ``fh`` is written to in large blocks.
+        """
+        count = 0
+        lines = []
+        size = 0
+
+        for record in records:
+            line = self.format(record)
+            lines.append(line)
+            size += len(line)
+            count += 1
+
+            if size >= self.buffer_size:
+                self._write_lines(lines, fh)
+                lines = []
+                size = 0
+
+        if lines:
+            self._write_lines(lines, fh)
+        return count
+
+    def _write_lines(self, lines: list[str], fh: BinaryIO) -> None:
+        lines.append("")
+        fh.write("\n".join(lines).encode("utf-8", "backslashreplace"))
+
+    @abstractmethod
+    def _format_prefix(self, key: str) -> str:
+        """Format the prefix that the value of ``key`` is written after."""
+
+    def _get_prefix(self, key: str) -> str:
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            if len(self._prefixes) >= PREFIX_CACHE_SIZE:
+                self._prefixes.clear()
+            prefix = self._prefixes[key] = self._format_prefix(key)
+        return prefix
+
+    def _get_schema_prefixes(self, schema: RecordSchema) -> tuple[tuple[str, ...], tuple[int, ...] | None]:
+        """Return the prefixes of the keys of a schema, and the positions of their values if they are not in order."""
+        result = self._schema_prefixes.get(schema)
+        if result is None:
+            if len(self._schema_prefixes) >= PREFIX_CACHE_SIZE:
+                self._schema_prefixes.clear()
+
+            prefixes = tuple(self._format_prefix(key) for key in schema.keys)
+            positions = tuple(schema.index[key] for key in schema.keys)
+            if positions == tuple(range(len(schema.raw_keys))):
+                positions = None
+            result = self._schema_prefixes[schema] = (prefixes, positions)
+        return result
+
+    def _iter_items(self, record: Mapping[str, Any]) -> Iterable[tuple[str, Any]]:
+        """Return the prefixes and values of a record."""
+        if isinstance(record, CompactRecord):
+            prefixes, positions = self._get_schema_prefixes(record.schema)
+            row = record.row
+            if positions is None:
+                return zip(prefixes, row, strict=False)
+            return zip(prefixes, [row[position] for position in positions], strict=False)
+
+        prefixes = self._prefixes
+        return [(prefixes.get(key) or self._get_prefix(key), value) for key, value in record.items()]
+
+
+class JsonLinesSerializer(Serializer):
+    """Writes records as JSON objects, one per line.
+
+    Records are encoded by the C encoder of :mod:`json`, which only calls back into Python for values it can't encode
+    by itself, such as datetimes and substitution values.
+
+    Example:
+        >>> with open("records.jsonl", "wb") as fh:
+        ...     JsonLinesSerializer().write(Evtx(evtx_fh), fh)
+    """
+
+    def __init__(self, buffer_size: int = WRITE_BUFFER_SIZE):
+        super().__init__(buffer_size)
+        self._encode = json.JSONEncoder(
+            ensure_ascii=False, check_circular=False, separators=(",", ":"), default=_json_default
+        ).encode
+
+    def format(self, record: Mapping[str, Any]) -> str:
+        if not isinstance(record, dict):
+            record = dict(self._iter_items(record))
+        return self._encode(record)
+
+    def _format_prefix(self, key: str) -> str:
+        return key
+
+
+class SplunkSerializer(Serializer):
+    """Writes records as Splunk events of ``key="value"`` pairs, one per line.
+
+    Every event starts with the time the event was created, or ``Unknown`` if it's missing. The values of lists are
+    written as ``key_0``, ``key_1`` and so on, and values that are ``None`` are left out.
+
+    Example:
+        >>> with open("records.log", "wb") as fh:
+        ...     SplunkSerializer().write(Evtx(evtx_fh), fh)
+    """
+
+    def __init__(self, buffer_size: int = WRITE_BUFFER_SIZE, timestamp_key: str = TIMESTAMP_KEY):
+        super().__init__(buffer_size)
+        self.timestamp_key = timestamp_key
+        self._timestamp_prefix = self._format_prefix(timestamp_key)
+        self._list_prefixes: dict[tuple[str, int], str] = {}
+
+    def format(self, record: Mapping[str, Any]) -> str:
+        timestamp = "Unknown"
+        timestamp_prefix = self._timestamp_prefix
+        result = []
+
+        formatters = _TEXT_FORMATTERS
+        for prefix, value in self._iter_items(record):
+            cls = type(value)
+            if cls is list:
+                for index, item in enumerate(value):
+                    text = _format_text(item)
+                    if text is not None:
+                        result.append(self._get_list_prefix(prefix, index) + _quote(text))
+                continue
+
+            text = (formatters.get(cls) or _get_text_formatter(cls))(value)
+            if prefix == timestamp_prefix:
+                timestamp = text or timestamp
+            elif text is not None:
+                result.append(prefix + _quote(text))
+
+        return timestamp + " " + " ".join(result)
+
+    def _format_prefix(self, key: str) -> str:
+        return key + "="
+
+    def _get_list_prefix(self, prefix: str, index: int) -> str:
+        key = (prefix, index)
+        list_prefix = self._list_prefixes.get(key)
+        if list_prefix is None:
+            if len(self._list_prefixes) >= PREFIX_CACHE_SIZE:
+                self._list_prefixes.clear()
+            list_prefix = self._list_prefixes[key] = f"{prefix[:-1]}_{index}="
+        return list_prefix
+
+
+def write_jsonl(records: Iterable[Mapping[str, Any]], fh: BinaryIO) -> int:
+    """Write ``records`` to ``fh`` as JSON Lines, see :class:`JsonLinesSerializer`."""
+    return JsonLinesSerializer().write(records, fh)
+
+
+def write_splunk(records: Iterable[Mapping[str, Any]], fh: BinaryIO) -> int:
+    """Write ``records`` to ``fh`` as Splunk events, see :class:`SplunkSerializer`."""
+    return SplunkSerializer().write(records, fh)
@@ -0,0 +1,364 @@
+"""A sink that writes parsed records into a SQLite database, for repeated ad-hoc queries over collected logs.
+
+Records are stored in one table per schema, i.e. per distinct set of keys, which means one table per template for
+EVTX files and a single table for EVT files. Every key is a column of its table. Records with more keys than
+``max_columns`` are stored in the long ``record_values`` table instead, as one row per key and value. Records without
+keys have no values to store and are skipped.
+
+The ``schemas`` table lists the tables with the keys of their records, and the ``records`` view lists the event ID,
+time and record ID of the records in all tables.
+
+Values are stored as follows:
+
+- Integers, floats and strings as they are, except for integers outside the range of a signed 64-bit integer, such as
+  ``uint64`` values above ``2**63 - 1``, which SQLite can't store as integers. These are stored as text.
+- Datetimes as ISO 8601 in UTC with microseconds, e.g. ``2021-07-22T15:50:23.212521Z``, which sorts in time order and
+  is understood by the date and time functions of SQLite.
+- Lists as JSON, which can be queried with the JSON functions of SQLite.
+- Binary values that are hexlified, as they are parsed by default, as text. All other bytes, such as the binary values
+  that are parsed with ``raw_types``, as blobs, or as hex in lists.
+- GUIDs that were parsed with ``raw_types`` like Windows formats them.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any
+
+from dissect.eventlog.bxml.bxml import BxmlSub, HexBytes, format_guid
+from dissect.eventlog.evt.evt import Record
+from dissect.eventlog.output import format_bytes
+from dissect.eventlog.utils import DEFAULT_BATCH_SIZE, CompactRecord
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Mapping
+    from pathlib import Path
+
+    from typing_extensions import Self
+
+    from dissect.eventlog.utils import RecordSchema
+
+log = logging.getLogger(__name__)
+log.setLevel(os.getenv("DISSECT_LOG_SQLITE", "CRITICAL"))
+
+# Records with more keys than this are stored in the long record_values table, SQLite allows 2000 columns by default
+MAX_COLUMNS = 1000
+
+# The keys of the values that are indexed and listed in the records view, the first key that a schema has is used
+EVENT_ID_KEYS = ("EventID",)
+TIME_KEYS = ("TimeCreated_SystemTime", "TimeGenerated")
+RECORD_ID_KEYS = ("EventRecordID", "RecordNumber")
+
+# The largest integer that SQLite can store, larger integers are stored as text
+_INT64_MAX = 2**63 - 1
+
+# The keys of EVT records, without the raw record header that is their last field
+_EVT_KEYS = Record._fields[:-1]
+
+
+def format_time(dt: datetime) -> str:
+    """Format a datetime as ISO 8601 in UTC with microseconds. Naive datetimes are assumed to be in UTC."""
+    if dt.tzinfo is None:
+        return dt.isoformat(timespec="microseconds") + "Z"
+    if dt.tzinfo is not timezone.utc:
+        dt = dt.astimezone(timezone.utc)
+    return dt.isoformat(timespec="microseconds")[:-6] + "Z"
+
+
+def _convert(value: Any) -> Any:
+    """Convert a value to a type that SQLite can store."""
+    return _get_converter(type(value))(value)
+
+
+def _get_converter(cls: type) -> Callable[[Any], Any]:
+    converter = _CONVERTERS.get(cls)
+    if converter is None:
+        if issubclass(cls, bool):
+            converter = int
+        elif issubclass(cls, int):
+            converter = _convert_int
+        elif issubclass(cls, str):
+            converter = str.__str__
+        elif issubclass(cls, float):
+            converter = float
+        elif issubclass(cls, datetime):
+            converter = format_time
+        elif issubclass(cls, HexBytes):
+            converter = bytes.decode
+        elif issubclass(cls, (bytes, bytearray)):
+            converter = bytes
+        elif issubclass(cls, uuid.UUID):
+            converter = format_guid
+        elif issubclass(cls, BxmlSub):
+            converter = _convert_sub
+        elif issubclass(cls, (list, tuple)):
+            converter = _encode_json
+        else:
+            converter = str
+        _CONVERTERS[cls] = converter
+    return converter
+
+
+def _convert_int(value: int) -> int | str:
+    value = int(value)
+    return value if -_INT64_MAX - 1 <= value <= _INT64_MAX else str(value)
+
+
+def _convert_sub(value: BxmlSub) -> Any:
+    return _convert(value.value)
+
+
+def _json_default(value: Any) -> Any:
+    """Convert a value in a list that :mod:`json` can't encode by itself."""
+    if isinstance(value, (bytes, bytearray)):
+        return format_bytes(value)
+    return _convert(value)
+
+
+_encode_json = json.JSONEncoder(
+    ensure_ascii=False, check_circular=False, separators=(",", ":"), default=_json_default
+).encode
+
+_CONVERTERS: dict[type, Callable[[Any], Any]] = {
+    type(None): lambda value: None,
+    str: str.__str__,
+    int: _convert_int,
+    datetime: format_time,
+}
+
+
+def _quote(name: str) -> str:
+    """Quote an identifier, e.g. a table or column name."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _column_names(keys: tuple[str, ...]) -> list[str]:
+    """Return the column names of ``keys``, of which the names that only differ in case are made unique."""
+    seen = set()
+    columns = []
+    for key in keys:
+        column = key
+        index = 0
+        while column.lower() in seen:
+            index += 1
+            column = f"{key}_{index}"
+        seen.add(column.lower())
+        columns.append(column)
+    return columns
+
+
+def _key_condition(keys: tuple[str, ...]) -> str:
+    return "key IN (" + ", ".join("'" + key.replace("'", "''") + "'" for key in keys) + ")"
+
+
+def _find_column(keys: tuple[str, ...], columns: list[str], candidates: tuple[str, ...]) -> str | None:
+    for candidate in candidates:
+        if candidate in keys:
+            return columns[keys.index(candidate)]
+    return None
+
+
+class _Table:
+    """A table of records that have the same keys, with the rows that are not inserted yet."""
+
+    __slots__ = ("columns", "insert", "keys", "name", "rows")
+
+    def __init__(self, name: str, keys: tuple[str, ...]):
+        self.name = name
+        self.keys = keys
+        self.columns = _column_names(keys)
+        self.insert = f"INSERT INTO {_quote(name)} VALUES ({', '.join('?' * len(keys))})"
+        self.rows = []
+
+    def create(self, db: sqlite3.Connection) -> None:
+        db.execute(f"CREATE TABLE {_quote(self.name)} ({', '.join(map(_quote, self.columns))})")
+
+    def index_columns(self) -> tuple[str | None, str | None, str | None]:
+        """Return the columns of the event ID, time and record ID of the records, if they have them."""
+        return (
+            _find_column(self.keys, self.columns, EVENT_ID_KEYS),
+            _find_column(self.keys, self.columns, TIME_KEYS),
+            _find_column(self.keys, self.columns, RECORD_ID_KEYS),
+        )
+
+
+class SqliteSink:
+    """Writes records into a SQLite database, see the module documentation for the layout of the database.
+
+    Rows are inserted with :meth:`sqlite3.Cursor.executemany` in batches of ``batch_size`` rows per table, and every
+    call to :meth:`write` is a single transaction. The indexes on the event ID, time and record ID are created when
+    the sink is closed, which is a lot faster than updating them for every row. Records can be added to an existing
+    database, they are added to the tables of their schemas.
+
+    Example:
+        >>> with SqliteSink("records.db") as sink:
+        ...     sink.write(Evtx(evtx_fh))
+        >>> sqlite3.connect("records.db").execute("SELECT * FROM records WHERE event_id = 4624").fetchall()
+    """
+
+    def __init__(self, path: str | Path, batch_size: int = DEFAULT_BATCH_SIZE, max_columns: int = MAX_COLUMNS):
+        self.path = path
+        self.batch_size = batch_size
+        self.max_columns = max_columns
+
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS schemas (name TEXT PRIMARY KEY, keys TEXT NOT NULL)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS record_values (record INTEGER NOT NULL, key TEXT NOT NULL, value)")
+        self.db.commit()
+        self._load()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Create the indexes and the ``records`` view, and close the database."""
+        self.db.execute("CREATE INDEX IF NOT EXISTS record_values_key ON record_values (key, value)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS record_values_record ON record_values (record)")
+
+        selects = []
+        for table in self._tables.values():
+            columns = table.index_columns()
+            for column in columns:
+                if column is not None:
+                    self.db.execute(
+                        f"CREATE INDEX IF NOT EXISTS {_quote(f'{table.name}_{column}')} "
+                        f"ON {_quote(table.name)} ({_quote(column)})"
+                    )
+
+            values = ", ".join("NULL" if column is None else _quote(column) for column in columns)
+            selects.append(f"SELECT '{table.name}', rowid, {values} FROM {_quote(table.name)}")
+
+        values = ", ".join(
+            f"MAX(CASE WHEN {_key_condition(keys)} THEN value END)"
+            for keys in (EVENT_ID_KEYS, TIME_KEYS, RECORD_ID_KEYS)
+        )
+        selects.append(f"SELECT 'record_values', record, {values} FROM record_values GROUP BY record")
+
+        self.db.execute("DROP VIEW IF EXISTS records")
+        self.db.execute("CREATE VIEW records (source, id, event_id, time, record_id) AS " + " UNION ALL ".join(selects))
+        self.db.commit()
+        self.db.close()
+
+    def write(self, records: Iterable[Mapping[str, Any] | Record]) -> int:
+        """Write ``records`` to the database in a single transaction. Returns the number of records that were written.
+
+        Records are :class:`~collections.abc.Mapping` objects, such as those of :class:`~dissect.eventlog.evtx.Evtx`,
+        or the records of :class:`~dissect.eventlog.evt.Evt`.
+        """
+        count = 0
+        try:
+            for record in records:
+                self._add(record)
+                count += 1
+
+            for table in self._tables.values():
+                self._flush(table)
+            self._flush_values()
+        except BaseException:
+            # Forget the rows and tables of this transaction
+            self.db.rollback()
+            self._load()
+            raise
+
+        self.db.commit()
+        return count
+
+    def _load(self) -> None:
+        self._tables: dict[tuple[str, ...], _Table] = {}
+        for name, keys in self.db.execute("SELECT name, keys FROM schemas ORDER BY rowid"):
+            keys = tuple(json.loads(keys))
+            self._tables[keys] = _Table(name, keys)
+
+        self._schema_tables: dict[RecordSchema, tuple[_Table | None, tuple[int, ...] | None]] = {}
+        self._values: list[tuple[int, str, Any]] = []
+        self._next_record = (self.db.execute("SELECT MAX(record) FROM record_values").fetchone()[0] or 0) + 1
+
+    def _add(self, record: Mapping[str, Any] | Record) -> None:
+        converters = _CONVERTERS
+
+        if isinstance(record, CompactRecord):
+            table, positions = self._get_schema_table(record.schema)
+            row = record.row
+            if positions is not None:
+                row = [row[position] for position in positions]
+            if table is None:
+                self._add_values(record.schema.keys, row)
+                return
+        elif isinstance(record, Record):
+            keys = _EVT_KEYS
+            row = record[:-1]
+            table = self._get_table(keys)
+        else:
+            keys = tuple(record)
+            row = record.values()
+            table = self._get_table(keys)
+
+        if table is None:
+            self._add_values(keys, row)
+            return
+
+        table.rows.append(tuple([(converters.get(type(value)) or _get_converter(type(value)))(value) for value in row]))
+        if len(table.rows) >= self.batch_size:
+            self._flush(table)
+
+    def _add_values(self, keys: tuple[str, ...], row: Iterable[Any]) -> None:
+        if not keys:
+            return
+
+        record = self._next_record
+        self._next_record += 1
+
+        self._values.extend((record, key, _convert(value)) for key, value in zip(keys, row, strict=False))
+        if len(self._values) >= self.batch_size:
+            self._flush_values()
+
+    def _get_table(self, keys: tuple[str, ...]) -> _Table | None:
+        """Return the table of records with ``keys``, or ``None`` if they are stored in the long table or skipped."""
+        table = self._tables.get(keys)
+        if table is None:
+            if not keys or len(keys) > self.max_columns:
+                return None
+
+            name = f"template_{len(self._tables) + 1}"
+            log.debug("Creating table %s for keys %s", name, keys)
+
+            # The schema is inserted first, so the table is created in the transaction that is rolled back on errors
+            table = _Table(name, keys)
+            self.db.execute("INSERT INTO schemas (name, keys) VALUES (?, ?)", (name, json.dumps(keys)))
+            table.create(self.db)
+            self._tables[keys] = table
+        return table
+
+    def _get_schema_table(self, schema: RecordSchema) -> tuple[_Table | None, tuple[int, ...] | None]:
+        """Return the table of the records of a schema, and the positions of their values if they are not in order."""
+        result = self._schema_tables.get(schema)
+        if result is None:
+            positions = tuple(schema.index[key] for key in schema.keys)
+            if positions == tuple(range(len(schema.raw_keys))):
+                positions = None
+            result = self._schema_tables[schema] = (self._get_table(schema.keys), positions)
+        return result
+
+    def _flush(self, table: _Table) -> None:
+        if table.rows:
+            self.db.executemany(table.insert, table.rows)
+            table.rows = []
+
+    def _flush_values(self) -> None:
+        if self._values:
+            self.db.executemany("INSERT INTO record_values VALUES (?, ?, ?)", self._values)
+            self._values = []
+
+
+def write_sqlite(records: Iterable[Mapping[str, Any] | Record], path: str | Path) -> int:
+    """Write ``records`` into the SQLite database at ``path``, see :class:`SqliteSink`."""
+    with SqliteSink(path) as sink:
+        return sink.write(records)
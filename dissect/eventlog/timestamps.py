@@ -0,0 +1,123 @@
+"""Conversion of the FILETIME, SYSTEMTIME and epoch timestamps of event logs.
+
+The datetimes are exactly the same as those of :func:`dissect.util.ts.wintimestamp` and :func:`datetime.fromtimestamp`.
+Timestamps can also be converted to integer nanoseconds or microseconds since the epoch, without creating a datetime
+at all. The microseconds are rounded like the datetimes are, so both representations always agree.
+"""
+
+from __future__ import annotations
+
+import array
+import math
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# The number of FILETIME ticks of 100 nanoseconds between 1601-01-01 and 1970-01-01
+FILETIME_EPOCH_TICKS = 116_444_736_000_000_000
+
+UNIX_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+UNITS = ("ns", "us")
+
+# The maximum number of seconds of which the datetime is cached
+CACHE_SIZE = 1024
+
+_SECONDS: dict[int, datetime] = {}
+
+_fromtimestamp = datetime.fromtimestamp
+
+
+def filetime_to_ns(ticks: int) -> int:
+    """Convert a FILETIME to nanoseconds since the epoch, in full precision."""
+    return (ticks - FILETIME_EPOCH_TICKS) * 100
+
+
+def filetime_to_us(ticks: int) -> int:
+    """Convert a FILETIME to microseconds since the epoch.
+
+    The result is rounded exactly like the datetimes of :func:`~dissect.util.ts.wintimestamp`, which converts the
+    timestamp to a float number of seconds first.
+    """
+    frac, whole = math.modf(float(ticks) * 1e-7 - 11_644_473_600)
+    return int(whole) * 1_000_000 + round(frac * 1e6)
+
+
+def _filetime_to_datetime(ticks: int) -> datetime:
+    """Convert a FILETIME to the same aware datetime as :func:`~dissect.util.ts.wintimestamp`."""
+    return _fromtimestamp(float(ticks) * 1e-7 - 11_644_473_600, timezone.utc)
+
+
+def _filetime_to_datetime_relative(ticks: int) -> datetime:
+    """Convert a FILETIME to the same aware datetime as :func:`~dissect.util.ts.wintimestamp`, relative to the epoch."""
+    return UNIX_EPOCH + timedelta(seconds=float(ticks) * 1e-7 - 11_644_473_600)
+
+
+# Like dissect.util.ts, calculate timestamps relative to the epoch on platforms that can't calculate timestamps before
+# 1970 (Windows, WASM)
+try:
+    _fromtimestamp(-6969696969, timezone.utc)
+    filetime_to_datetime = _filetime_to_datetime
+except (OSError, OverflowError):
+    filetime_to_datetime = _filetime_to_datetime_relative
+
+
+def epoch_to_datetime(seconds: int) -> datetime:
+    """Convert seconds since the epoch to the same aware datetime as ``datetime.fromtimestamp(seconds, timezone.utc)``.
+
+    Records are often written within the same second, so the datetimes of the last seconds are cached.
+    """
+    dt = _SECONDS.get(seconds)
+    if dt is None:
+        if len(_SECONDS) >= CACHE_SIZE:
+            _SECONDS.clear()
+        dt = _SECONDS[seconds] = UNIX_EPOCH + timedelta(seconds=seconds)
+    return dt
+
+
+def datetime_to_us(dt: datetime) -> int:
+    """Convert a datetime to microseconds since the epoch. Naive datetimes are interpreted as UTC."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - UNIX_EPOCH) // timedelta(microseconds=1)
+
+
+def to_epoch(value: int | datetime | None, unit: str) -> int | None:
+    """Convert a FILETIME or a datetime to an integer timestamp since the epoch in ``unit``, ``ns`` or ``us``."""
+    if value is None:
+        return None
+
+    if isinstance(value, datetime):
+        us = datetime_to_us(value)
+        return us * 1000 if unit == "ns" else us
+
+    return filetime_to_ns(value) if unit == "ns" else filetime_to_us(value)
+
+
+def convert_filetimes(values: Iterable[int | datetime | None], unit: str = "us") -> array.array | list[int | None]:
+    """Convert a column of FILETIMEs or datetimes to integer timestamps since the epoch in ``unit``.
+
+    The result is an ``array("q")``, or a list if there are missing values.
+    """
+    if unit not in UNITS:
+        raise ValueError(f"Unknown timestamp unit: {unit}")
+
+    values = list(values)
+    if all(type(value) is int for value in values):
+        if unit == "ns":
+            return array.array("q", [(value - FILETIME_EPOCH_TICKS) * 100 for value in values])
+        return array.array("q", map(filetime_to_us, values))
+
+    result = [to_epoch(value, unit) for value in values]
+    return result if None in result else array.array("q", result)
+
+
+def convert_epochs(values: Iterable[int], unit: str = "us") -> array.array:
+    """Convert a column of seconds since the epoch to integer timestamps since the epoch in ``unit``."""
+    if unit not in UNITS:
+        raise ValueError(f"Unknown timestamp unit: {unit}")
+
+    scale = 1_000_000_000 if unit == "ns" else 1_000_000
+    return array.array("q", [value * scale for value in values])
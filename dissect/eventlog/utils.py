@@ -1,6 +1,24 @@
 from __future__ import annotations
 
-from typing import Any
+import array
+import io
+import mmap
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, BinaryIO, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, ItemsView, Iterable, Iterator, KeysView, ValuesView
+
+    from typing_extensions import Self
+
+T = TypeVar("T")
+
+SCAN_BLOCK_SIZE = 8 * 1024 * 1024
+
+# The default number of records in a batch of columns
+DEFAULT_BATCH_SIZE = 10_000
 
 
 class KeyValueCollection(dict):
@@ -26,3 +44,423 @@ class KeyValueCollection(dict):
             self.idx[key] = 0
 
         dict.__setitem__(self, key, value)
+
+    def __reduce__(self) -> tuple:
+        # Restore the items and duplicate counters as they are, instead of through __setitem__
+        return self.__class__, (), (dict(self), self.idx)
+
+    def __setstate__(self, state: tuple[dict[str, Any], dict[str, int]]) -> None:
+        data, self.idx = state
+        dict.update(self, data)
+
+
+class DeferredKeyValueCollection(KeyValueCollection):
+    """A :class:`KeyValueCollection` of which the remaining items are only set once they are needed.
+
+    ``fill`` is called with the collection to set the remaining items, the first time a key is looked up that is not
+    set yet, or the first time all items are accessed. Keys that are already set can be looked up without filling the
+    collection, which keeps e.g. nested BinXML fragments from being parsed if only the ``System`` values of a record
+    are used.
+    """
+
+    def __init__(self, fill: Callable[[KeyValueCollection], None] | None = None):
+        super().__init__()
+        self._fill = fill
+
+    def fill(self) -> None:
+        """Set the remaining items, if they are not set yet.
+
+        If ``fill`` raises an exception, the items it did set are removed again, so the collection is filled anew
+        the next time it is needed.
+        """
+        fill = self._fill
+        if fill is None:
+            return
+
+        # Keep fill() from being called again through the methods that are used to set the items
+        self._fill = None
+        items = dict(dict.items(self))
+        idx = dict(self.idx)
+        try:
+            fill(self)
+        except BaseException:
+            dict.clear(self)
+            dict.update(self, items)
+            self.idx = idx
+            self._fill = fill
+            raise
+
+    def __missing__(self, key: str) -> Any:
+        if self._fill is None:
+            raise KeyError(key)
+        self.fill()
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        if self._fill is not None and not dict.__contains__(self, key):
+            self.fill()
+        return dict.__contains__(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if self._fill is not None and not dict.__contains__(self, key):
+            self.fill()
+        return dict.get(self, key, default)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.fill()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self.fill()
+        dict.__delitem__(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        self.fill()
+        return dict.__iter__(self)
+
+    def __reversed__(self) -> Iterator[str]:
+        self.fill()
+        return dict.__reversed__(self)
+
+    def __len__(self) -> int:
+        self.fill()
+        return dict.__len__(self)
+
+    def __eq__(self, other: object) -> bool:
+        self.fill()
+        if isinstance(other, DeferredKeyValueCollection):
+            other.fill()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        self.fill()
+        return dict.__repr__(self)
+
+    def __or__(self, other: Mapping[str, Any]) -> dict[str, Any]:
+        self.fill()
+        return dict.__or__(self, other)
+
+    def __ror__(self, other: Mapping[str, Any]) -> dict[str, Any]:
+        self.fill()
+        return dict.__ror__(self, other)
+
+    def __ior__(self, other: Mapping[str, Any]) -> Self:
+        self.fill()
+        return dict.__ior__(self, other)
+
+    def __reduce__(self) -> tuple:
+        self.fill()
+        return KeyValueCollection, (), (dict(self), self.idx)
+
+    def keys(self) -> KeysView[str]:
+        self.fill()
+        return dict.keys(self)
+
+    def values(self) -> ValuesView[Any]:
+        self.fill()
+        return dict.values(self)
+
+    def items(self) -> ItemsView[str, Any]:
+        self.fill()
+        return dict.items(self)
+
+    def copy(self) -> dict[str, Any]:
+        self.fill()
+        return dict.copy(self)
+
+    def pop(self, key: str, *default: Any) -> Any:
+        self.fill()
+        return dict.pop(self, key, *default)
+
+    def popitem(self) -> tuple[str, Any]:
+        self.fill()
+        return dict.popitem(self)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        self.fill()
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        self.fill()
+        dict.update(self, *args, **kwargs)
+
+    def clear(self) -> None:
+        self._fill = None
+        dict.clear(self)
+
+
+# The maximum number of distinct record schemas that are kept by get_schema
+SCHEMA_CACHE_SIZE = 4096
+
+_SCHEMAS: dict[tuple[str, ...], RecordSchema] = {}
+
+
+class RecordSchema:
+    """The keys of a :class:`CompactRecord`, shared by all records with the same keys.
+
+    Duplicate keys in ``raw_keys`` are renamed like they are by :class:`KeyValueCollection`. ``index`` maps every
+    key to the position of its value in ``raw_keys``.
+    """
+
+    __slots__ = ("_extensions", "index", "keys", "raw_keys")
+
+    def __init__(self, raw_keys: tuple[str, ...]):
+        index = KeyValueCollection()
+        for position, key in enumerate(raw_keys):
+            index[key] = position
+
+        self.raw_keys = raw_keys
+        self.index = dict(index)
+        self.keys = tuple(index)
+        self._extensions: dict[tuple[str, ...], RecordSchema] = {}
+
+    def __reduce__(self) -> tuple:
+        return get_schema, (self.raw_keys,)
+
+    def __repr__(self) -> str:
+        return f"<RecordSchema keys={self.keys}>"
+
+    def extend(self, keys: tuple[str, ...]) -> RecordSchema:
+        """Return the schema of records with ``keys`` appended, for keys that are not in this schema yet."""
+        schema = self._extensions.get(keys)
+        if schema is None:
+            schema = self._extensions[keys] = get_schema(self.raw_keys + keys)
+        return schema
+
+
+def get_schema(raw_keys: tuple[str, ...]) -> RecordSchema:
+    """Return the shared :class:`RecordSchema` of ``raw_keys``."""
+    schema = _SCHEMAS.get(raw_keys)
+    if schema is None:
+        if len(_SCHEMAS) >= SCHEMA_CACHE_SIZE:
+            _SCHEMAS.clear()
+        schema = _SCHEMAS[raw_keys] = RecordSchema(raw_keys)
+    return schema
+
+
+class CompactRecord(Mapping):
+    """A read-only record that stores only its values, with its keys in a shared :class:`RecordSchema`.
+
+    It has the same keys and values as the :class:`KeyValueCollection` that is created for the same data, but records
+    that are parsed from the same template share their keys.
+    """
+
+    __slots__ = ("_values", "schema")
+
+    def __init__(self, schema: RecordSchema, values: tuple[Any, ...]):
+        self.schema = schema
+        self._values = values
+
+    @classmethod
+    def from_mapping(cls, mapping: Mapping[str, Any]) -> CompactRecord:
+        return cls(get_schema(tuple(mapping)), tuple(mapping.values()))
+
+    @property
+    def row(self) -> tuple[Any, ...]:
+        """The values of this record, in the order of the ``raw_keys`` of its schema."""
+        return self._values
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[self.schema.index[key]]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.schema.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.schema.keys)
+
+    def __len__(self) -> int:
+        return len(self.schema.keys)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({dict(self)!r})"
+
+    def __reduce__(self) -> tuple:
+        return self.__class__, (self.schema, self._values)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        position = self.schema.index.get(key)
+        return default if position is None else self._values[position]
+
+    def updated(self, mapping: Mapping[str, Any]) -> CompactRecord:
+        """Return a copy of this record with the keys and values of ``mapping`` set, like :meth:`dict.update`."""
+        index = self.schema.index
+        values = list(self._values)
+        new_keys = []
+
+        for key, value in mapping.items():
+            position = index.get(key)
+            if position is None:
+                new_keys.append(key)
+                values.append(value)
+            else:
+                values[position] = value
+
+        schema = self.schema.extend(tuple(new_keys)) if new_keys else self.schema
+        return CompactRecord(schema, tuple(values))
+
+
+class DeferredCompactRecord(CompactRecord):
+    """A :class:`CompactRecord` of which the remaining keys and values are only determined once they are needed.
+
+    The keys of ``head_schema`` can be looked up without filling the record. ``fill`` is called to return the whole
+    record the first time another key is looked up, or the first time all keys, the schema or the row are accessed.
+    This keeps e.g. nested BinXML fragments from being parsed if only the ``System`` values of a record are used.
+    """
+
+    __slots__ = ("_fill", "_schema")
+
+    def __init__(self, head_schema: RecordSchema, head_values: tuple[Any, ...], fill: Callable[[], CompactRecord]):
+        self._schema = head_schema
+        self._values = head_values
+        self._fill = fill
+
+    def fill(self) -> None:
+        """Set the remaining keys and values, if they are not set yet."""
+        fill = self._fill
+        if fill is None:
+            return
+
+        record = fill()
+        self._schema = record.schema
+        self._values = record.row
+        self._fill = None
+
+    @property
+    def schema(self) -> RecordSchema:
+        self.fill()
+        return self._schema
+
+    @property
+    def row(self) -> tuple[Any, ...]:
+        self.fill()
+        return self._values
+
+    def __getitem__(self, key: str) -> Any:
+        position = self._schema.index.get(key)
+        if position is None:
+            self.fill()
+            position = self._schema.index[key]
+        return self._values[position]
+
+    def __contains__(self, key: object) -> bool:
+        if self._fill is not None and key not in self._schema.index:
+            self.fill()
+        return key in self._schema.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.schema.keys)
+
+    def __len__(self) -> int:
+        return len(self.schema.keys)
+
+    def __reduce__(self) -> tuple:
+        self.fill()
+        return CompactRecord, (self._schema, self._values)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if self._fill is not None and key not in self._schema.index:
+            self.fill()
+        position = self._schema.index.get(key)
+        return default if position is None else self._values[position]
+
+
+def to_array(typecode: str, values: list[Any]) -> array.array | list[Any]:
+    """Convert a column of values to an :class:`array.array`, or return it as is if not all values fit."""
+    try:
+        return array.array(typecode, values)
+    except (TypeError, OverflowError):
+        return values
+
+
+def open_mmap(fh: BinaryIO) -> mmap.mmap | None:
+    """Try to memory map the file backing ``fh``, returns ``None`` if ``fh`` is not backed by a regular file."""
+    try:
+        fileno = fh.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+    try:
+        return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+
+def get_size(fh: BinaryIO) -> int:
+    """Return the size of ``fh``."""
+    if hasattr(fh, "size"):
+        return fh.size
+
+    pos = fh.tell()
+    size = fh.seek(0, io.SEEK_END)
+    fh.seek(pos)
+    return size
+
+
+def iter_windows(
+    fh: BinaryIO, start: int = 0, end: int | None = None, block_size: int = SCAN_BLOCK_SIZE, overlap: int = 0
+) -> Iterator[tuple[int, bytes, int, int]]:
+    """Yield buffers that together cover the range ``[start, end)`` of ``fh``, for signature scanning.
+
+    Every item is a tuple of ``(base, buffer, lo, hi)``, where ``base`` is the offset of ``buffer`` in ``fh`` and
+    ``[lo, hi)`` is the window of buffer positions the caller is responsible for. The buffer continues for up to
+    ``overlap`` bytes past ``hi``, so structures that start inside the window can be read in full.
+
+    Buffers are blocks of ``block_size`` bytes. If ``fh`` is backed by a regular file, they are sliced from a memory
+    map of the file instead of read from ``fh``, so only one block is in memory at a time either way.
+    """
+    mm = open_mmap(fh)
+    if mm is not None:
+        with mm:
+            end = len(mm) if end is None else min(end, len(mm))
+            yield from _iter_blocks(lambda offset, size: mm[offset : offset + size], start, end, block_size, overlap)
+        return
+
+    def read(offset: int, size: int) -> bytes:
+        fh.seek(offset)
+        return fh.read(size)
+
+    end = get_size(fh) if end is None else end
+    yield from _iter_blocks(read, start, end, block_size, overlap)
+
+
+def _iter_blocks(
+    read: Callable[[int, int], bytes], start: int, end: int, block_size: int, overlap: int
+) -> Iterator[tuple[int, bytes, int, int]]:
+    offset = start
+    while offset < end:
+        size = min(block_size, end - offset)
+
+        buf = read(offset, size + overlap)
+        if not buf:
+            break
+
+        yield offset, buf, 0, min(size, len(buf))
+        offset += size
+
+
+def split_ranges(start: int, end: int, range_size: int) -> list[tuple[int, int]]:
+    """Split the range ``[start, end)`` into consecutive ranges of at most ``range_size`` bytes."""
+    return [(offset, min(offset + range_size, end)) for offset in range(start, end, range_size)]
+
+
+def iter_parallel(func: Callable[..., T], args: Iterable[tuple[Any, ...]], workers: int) -> Iterator[T]:
+    """Call ``func`` for every item in ``args`` in a pool of ``workers`` processes.
+
+    Results are yielded in the order of ``args``. At most ``2 * workers`` calls are in flight at any time,
+    so results that are not consumed yet don't pile up in memory.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for arg in args:
+            pending.append(executor.submit(func, *arg))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+from dissect.eventlog.wevt.cache import ManifestCache
+from dissect.eventlog.wevt.enrich import ManifestEnricher
+from dissect.eventlog.wevt.extract import extract_manifests
+from dissect.eventlog.wevt.manifest import ProviderManifest
 from dissect.eventlog.wevt.wevt import CRIM, MAPS_WEVT_TYPE, TTBL_WEVT_TYPE, WEVT, WEVT_TYPE
 from dissect.eventlog.wevt.wevt_object import WevtObject
 
@@ -9,5 +13,9 @@ __all__ = (
     "TTBL_WEVT_TYPE",
     "WEVT",
     "WEVT_TYPE",
+    "ManifestCache",
+    "ManifestEnricher",
+    "ProviderManifest",
     "WevtObject",
+    "extract_manifests",
 )
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import zlib
+from typing import TYPE_CHECKING, Any
+from uuid import UUID
+
+from dissect.eventlog.bxml import BxmlType
+from dissect.eventlog.wevt.manifest import ProviderManifest
+from dissect.eventlog.wevt.wevt_object import parse_template_bxml
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from typing_extensions import Self
+
+    from dissect.eventlog.utils import KeyValueCollection
+
+log = logging.getLogger(__name__)
+log.setLevel(os.getenv("DISSECT_LOG_WEVT", "CRITICAL"))
+
+FORMAT_VERSION = 1
+
+
+def content_hash(data: bytes) -> str:
+    """Return the key under which the manifests of the CRIM blob ``data`` are cached."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ManifestCache:
+    """A persistent cache of parsed provider manifests, stored in a single SQLite database.
+
+    The manifests of a ``WEVT_TEMPLATE`` resource are stored under the hash of its CRIM blob, so unchanged binaries
+    don't have to be parsed again. Pass the cache to :meth:`~dissect.eventlog.wevt.CRIM.manifests` to use it.
+
+    Manifests that are loaded from the cache contain :class:`CachedEvent`, :class:`CachedTemplate` and
+    :class:`CachedMap` objects, which have the same attributes as the WEVT objects they were created from.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS manifests (hash TEXT PRIMARY KEY, version INTEGER NOT NULL, data BLOB NOT NULL)"
+        )
+        self.db.commit()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __contains__(self, key: str) -> bool:
+        return self._read(key) is not None
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM manifests WHERE version = ?", (FORMAT_VERSION,)).fetchone()[0]
+
+    def close(self) -> None:
+        self.db.close()
+
+    def get(self, key: str) -> dict[UUID, ProviderManifest] | None:
+        """Return the manifests that are cached under ``key``, or ``None`` if there are none."""
+        data = self._read(key)
+        if data is None:
+            return None
+
+        try:
+            providers = json.loads(zlib.decompress(data))
+        except (zlib.error, ValueError):
+            log.warning("Corrupt manifest cache entry %s", key)
+            return None
+
+        manifests = (decode_manifest(provider) for provider in providers)
+        return {manifest.provider_id: manifest for manifest in manifests}
+
+    def put(self, key: str, manifests: dict[UUID, ProviderManifest]) -> None:
+        """Store the manifests of a CRIM blob under ``key``."""
+        providers = [encode_manifest(manifest) for manifest in manifests.values()]
+        data = zlib.compress(json.dumps(providers, separators=(",", ":")).encode())
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO manifests (hash, version, data) VALUES (?, ?, ?)", (key, FORMAT_VERSION, data)
+        )
+        self.db.commit()
+
+    def _read(self, key: str) -> bytes | None:
+        row = self.db.execute(
+            "SELECT data FROM manifests WHERE hash = ? AND version = ?", (key, FORMAT_VERSION)
+        ).fetchone()
+        return None if row is None else row[0]
+
+
+class CachedEvent:
+    """An event that was loaded from a :class:`ManifestCache`."""
+
+    __slots__ = (
+        "channel",
+        "flags",
+        "id",
+        "keyword",
+        "level",
+        "message_table_id",
+        "opcode",
+        "task",
+        "template_offset",
+        "version",
+    )
+
+    def __init__(self, *values: int):
+        for name, value in zip(self.__slots__, values, strict=True):
+            setattr(self, name, value)
+
+    def __repr__(self) -> str:
+        return f"<CachedEvent id={self.id} version={self.version}>"
+
+
+class CachedDescriptor:
+    """A template descriptor that was loaded from a :class:`ManifestCache`."""
+
+    __slots__ = ("inType", "input_type", "name", "outType", "output_type")
+
+    def __init__(self, name: str, input_type: int, output_type: int):
+        self.name = name
+        self.input_type = input_type
+        self.output_type = output_type
+        self.inType = str(BxmlType(input_type))
+        self.outType = str(BxmlType(output_type))
+
+    def __repr__(self) -> str:
+        return f"<CachedDescriptor name={self.name} inType={self.inType} outType={self.outType}>"
+
+
+class CachedTemplate:
+    """A template that was loaded from a :class:`ManifestCache`.
+
+    Like :class:`~dissect.eventlog.wevt.wevt_object.TEMP`, the BinXML is only parsed when it is first accessed.
+    """
+
+    __slots__ = ("_template", "bxml", "identifier", "names", "offset")
+
+    def __init__(self, offset: int, identifier: UUID, bxml: bytes, names: list[CachedDescriptor]):
+        self.offset = offset
+        self.identifier = identifier
+        self.bxml = bxml
+        self.names = names
+        self._template = None
+
+    def __repr__(self) -> str:
+        return f"<CachedTemplate identifier={self.identifier} offset={self.offset}>"
+
+    @property
+    def template(self) -> KeyValueCollection:
+        if self._template is None:
+            self._template = parse_template_bxml(self.bxml)
+        return self._template
+
+
+class CachedMap:
+    """A value or bitmap map that was loaded from a :class:`ManifestCache`."""
+
+    __slots__ = ("name", "signature")
+
+    def __init__(self, name: str, signature: str):
+        self.name = name
+        self.signature = signature
+
+    def __repr__(self) -> str:
+        return f"<CachedMap name={self.name} signature={self.signature}>"
+
+
+def encode_manifest(manifest: ProviderManifest) -> dict[str, Any]:
+    """Encode a provider manifest to JSON compatible types."""
+    return {
+        "provider_id": str(manifest.provider_id),
+        "events": [[int(getattr(event, name)) for name in CachedEvent.__slots__] for event in manifest.events.values()],
+        "templates": [
+            [
+                offset,
+                str(template.identifier),
+                template.bxml.hex(),
+                [[desc.name, desc.input_type, desc.output_type] for desc in template.names],
+            ]
+            for offset, template in manifest.templates.items()
+        ],
+        "maps": [[name, _map_signature(value_map)] for name, value_map in manifest.maps.items()],
+        "channels": list(manifest.channels.items()),
+        "levels": list(manifest.levels.items()),
+        "tasks": list(manifest.tasks.items()),
+        "opcodes": [[task, value, name] for (task, value), name in manifest.opcodes.items()],
+        "keywords": list(manifest.keywords.items()),
+    }
+
+
+def decode_manifest(obj: dict[str, Any]) -> ProviderManifest:
+    """Create a provider manifest from the output of :func:`encode_manifest`."""
+    manifest = ProviderManifest(UUID(obj["provider_id"]))
+
+    for values in obj["events"]:
+        event = CachedEvent(*values)
+        manifest.events[(event.id, event.version)] = event
+
+    for offset, identifier, bxml, names in obj["templates"]:
+        template = CachedTemplate(offset, UUID(identifier), bytes.fromhex(bxml), [CachedDescriptor(*n) for n in names])
+        manifest.templates[offset] = template
+        manifest.template_ids.setdefault(template.identifier, template)
+
+    manifest.maps = {name: CachedMap(name, signature) for name, signature in obj["maps"]}
+    manifest.channels = dict(obj["channels"])
+    manifest.levels = dict(obj["levels"])
+    manifest.tasks = dict(obj["tasks"])
+    manifest.opcodes = {(task, value): name for task, value, name in obj["opcodes"]}
+    manifest.keywords = dict(obj["keywords"])
+
+    return manifest
+
+
+def _map_signature(value_map: Any) -> str:
+    return value_map.signature if isinstance(value_map, CachedMap) else value_map.__class__.__name__
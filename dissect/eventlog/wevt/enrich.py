@@ -0,0 +1,268 @@
+"""Enrichment of parsed event records with the names and output types of WEVT provider manifests."""
+
+from __future__ import annotations
+
+import ipaddress
+from collections import OrderedDict
+from enum import IntEnum
+from typing import TYPE_CHECKING, Any
+from uuid import UUID
+
+from dissect.eventlog.bxml import BxmlSub
+from dissect.eventlog.utils import CompactRecord, DeferredKeyValueCollection
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Mapping
+
+    from dissect.eventlog.wevt.manifest import ProviderManifest
+
+# The maximum number of events of which the decoder is cached
+DECODER_CACHE_SIZE = 4096
+
+
+class OutType(IntEnum):
+    """The output types of template values in a provider manifest."""
+
+    NULL = 0x00
+    STRING = 0x01
+    DATETIME = 0x02
+    BYTE = 0x03
+    UNSIGNED_BYTE = 0x04
+    SHORT = 0x05
+    UNSIGNED_SHORT = 0x06
+    INT = 0x07
+    UNSIGNED_INT = 0x08
+    LONG = 0x09
+    UNSIGNED_LONG = 0x0A
+    FLOAT = 0x0B
+    DOUBLE = 0x0C
+    BOOLEAN = 0x0D
+    GUID = 0x0E
+    HEX_BINARY = 0x0F
+    HEXINT8 = 0x10
+    HEXINT16 = 0x11
+    HEXINT32 = 0x12
+    HEXINT64 = 0x13
+    PID = 0x14
+    TID = 0x15
+    PORT = 0x16
+    IPV4 = 0x17
+    IPV6 = 0x18
+    SOCKET_ADDRESS = 0x19
+    CIM_DATETIME = 0x1A
+    ETW_TIME = 0x1B
+    XML = 0x1C
+    ERROR_CODE = 0x1D
+    WIN32_ERROR = 0x1E
+    NTSTATUS = 0x1F
+    HRESULT = 0x20
+
+
+def _format_hex(value: Any) -> Any:
+    return f"0x{value:x}" if isinstance(value, int) else value
+
+
+def _format_status(value: Any) -> Any:
+    return f"0x{value & 0xFFFFFFFF:08x}" if isinstance(value, int) else value
+
+
+def _format_boolean(value: Any) -> Any:
+    return bool(value) if isinstance(value, int) else value
+
+
+def _format_port(value: Any) -> Any:
+    # Ports are stored in network byte order
+    return ((value & 0xFF) << 8) | ((value >> 8) & 0xFF) if isinstance(value, int) else value
+
+
+def _format_ipv4(value: Any) -> Any:
+    # Addresses are stored in network byte order, which is read as a little endian integer
+    return str(ipaddress.IPv4Address(value.to_bytes(4, "little"))) if isinstance(value, int) else value
+
+
+def _format_ipv6(value: Any) -> Any:
+    # Binary values are read as hexlified bytes, or as is when parsing with raw_types
+    if isinstance(value, bytes) and len(value) == 32:
+        return str(ipaddress.IPv6Address(bytes.fromhex(value.decode())))
+    if isinstance(value, bytes) and len(value) == 16:
+        return str(ipaddress.IPv6Address(value))
+    return value
+
+
+FORMATTERS: dict[OutType, Callable[[Any], Any]] = {
+    OutType.BOOLEAN: _format_boolean,
+    OutType.HEXINT8: _format_hex,
+    OutType.HEXINT16: _format_hex,
+    OutType.HEXINT32: _format_hex,
+    OutType.HEXINT64: _format_hex,
+    OutType.PORT: _format_port,
+    OutType.IPV4: _format_ipv4,
+    OutType.IPV6: _format_ipv6,
+    OutType.ERROR_CODE: _format_status,
+    OutType.WIN32_ERROR: _format_status,
+    OutType.NTSTATUS: _format_status,
+    OutType.HRESULT: _format_status,
+}
+
+
+class EventDecoder:
+    """Enriches the records of a single event of a provider.
+
+    Everything that only depends on the event definition is looked up in the manifest once, when the decoder is
+    created. The names that are added to a record are:
+
+    * ``Level_Name``, ``Task_Name``, ``Opcode_Name`` and ``Channel_Name``, if the manifest defines them.
+    * ``Keywords_Names``, the names of the keywords that are set in the ``Keywords`` of the record.
+
+    Values of the event data are formatted according to the output type of the template of the event.
+    """
+
+    __slots__ = ("decode_keywords", "fields", "formatters")
+
+    def __init__(self, manifest: ProviderManifest, event: Any):
+        fields = {
+            "Level_Name": manifest.levels.get(event.level),
+            "Task_Name": manifest.tasks.get(event.task),
+            "Opcode_Name": manifest.get_opcode(event.opcode, event.task),
+            "Channel_Name": manifest.channels.get(event.channel),
+        }
+        self.fields = {key: value for key, value in fields.items() if value is not None}
+        self.decode_keywords = manifest.decode_keywords
+
+        self.formatters: list[tuple[str, Callable[[Any], Any]]] = []
+        template = manifest.templates.get(event.template_offset)
+        if template is not None:
+            for descriptor in template.names:
+                formatter = FORMATTERS.get(descriptor.output_type)
+                if formatter is not None:
+                    self.formatters.append((descriptor.name, formatter))
+
+    def __call__(self, record: dict[str, Any] | CompactRecord) -> dict[str, Any] | CompactRecord:
+        updates = dict(self.fields)
+
+        keywords = _get_value(record.get("Keywords"))
+        if keywords is not None:
+            updates["Keywords_Names"] = self.decode_keywords(keywords)
+
+        for name, formatter in self.formatters:
+            value = record.get(name)
+            if value is not None:
+                updates[name] = formatter(_get_value(value))
+
+        if isinstance(record, CompactRecord):
+            return record.updated(updates)
+
+        if isinstance(record, DeferredKeyValueCollection):
+            # Set the remaining items first, so the enriched items come after them like they do for other records
+            record.fill()
+
+        # Use dict methods directly, so a KeyValueCollection doesn't turn these into duplicate keys
+        dict.update(record, updates)
+        return record
+
+
+class ManifestEnricher:
+    """Enriches parsed EVTX records with the provider manifests that are parsed by :mod:`dissect.eventlog.wevt`.
+
+    Records are matched with their event definition by the ``Provider_Guid``, ``EventID`` and ``Version`` of the
+    record. One :class:`EventDecoder` is created per event, so enriching a record only costs a dictionary lookup
+    once its event has been seen. The decoders of at most ``cache_size`` events are kept, the least recently used
+    are evicted. Events that are not in any manifest are cached as well, until a manifest is added.
+
+    The GUIDs of EVTX records are read in big endian, so the first three fields of the ``Provider_Guid`` are byte
+    swapped compared to the provider GUIDs of the manifests. Records match with either form of the GUID.
+
+    Example:
+        >>> enricher = ManifestEnricher(CRIM(fh).manifests())
+        >>> for record in enricher.enrich_records(Evtx(evtx_fh)):
+        ...     print(record.get("Level_Name"))
+    """
+
+    def __init__(
+        self,
+        manifests: Mapping[UUID, ProviderManifest] | Iterable[ProviderManifest] = (),
+        cache_size: int = DECODER_CACHE_SIZE,
+    ):
+        self.manifests: dict[UUID, ProviderManifest] = {}
+        self.cache_size = cache_size
+        self._providers: dict[UUID, ProviderManifest] = {}
+        self._decoders: OrderedDict[tuple[Any, int, int], EventDecoder | None] = OrderedDict()
+        self.update(manifests.values() if hasattr(manifests, "values") else manifests)
+
+    def add(self, manifest: ProviderManifest) -> None:
+        """Add the manifest of a provider."""
+        provider_id = manifest.provider_id
+        self.manifests[provider_id] = manifest
+        self._providers[provider_id] = manifest
+        self._providers[UUID(bytes=provider_id.bytes_le)] = manifest
+        self._decoders.clear()
+
+    def update(self, manifests: Iterable[ProviderManifest]) -> None:
+        """Add the manifests of multiple providers."""
+        for manifest in manifests:
+            self.add(manifest)
+
+    def get_decoder(self, provider_guid: UUID | str, event_id: int, version: int = 0) -> EventDecoder | None:
+        """Return the decoder of an event, or ``None`` if the event is not in any of the manifests."""
+        key = (provider_guid, event_id, version)
+        decoders = self._decoders
+        try:
+            decoder = decoders[key]
+        except KeyError:
+            pass
+        else:
+            decoders.move_to_end(key)
+            return decoder
+
+        decoder = None
+        manifest = self._providers.get(_parse_guid(provider_guid))
+        if manifest is not None:
+            event = manifest.get_event(event_id, version)
+            if event is not None:
+                decoder = EventDecoder(manifest, event)
+
+        decoders[key] = decoder
+        if len(decoders) > self.cache_size:
+            decoders.popitem(last=False)
+        return decoder
+
+    def enrich(self, record: dict[str, Any] | CompactRecord) -> dict[str, Any] | CompactRecord:
+        """Enrich a record in place and return it. Records of unknown events are returned unchanged.
+
+        A :class:`~dissect.eventlog.utils.CompactRecord` can't be changed, so an enriched copy of it is returned.
+        """
+        provider_guid = _get_value(record.get("Provider_Guid"))
+        if provider_guid is None:
+            return record
+
+        decoder = self.get_decoder(
+            provider_guid,
+            _get_value(record.get("EventID")),
+            _get_value(record.get("Version")) or 0,
+        )
+        if decoder is None:
+            return record
+
+        return decoder(record)
+
+    def enrich_records(
+        self, records: Iterable[dict[str, Any] | CompactRecord]
+    ) -> Iterator[dict[str, Any] | CompactRecord]:
+        """Enrich every record in ``records``."""
+        enrich = self.enrich
+        for record in records:
+            yield enrich(record)
+
+
+def _get_value(value: Any) -> Any:
+    return value.get() if isinstance(value, BxmlSub) else value
+
+
+def _parse_guid(guid: UUID | str) -> UUID | None:
+    if isinstance(guid, UUID):
+        return guid
+
+    try:
+        return UUID(guid)
+    except ValueError:
+        return None
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import io
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from dissect.eventlog.utils import iter_parallel, open_mmap
+from dissect.eventlog.wevt.cache import decode_manifest, encode_manifest
+from dissect.eventlog.wevt.wevt import CRIM
+
+if TYPE_CHECKING:
+    import mmap
+    from collections.abc import Iterable, Iterator
+    from typing import Any
+    from uuid import UUID
+
+    from dissect.eventlog.wevt.manifest import ProviderManifest
+
+log = logging.getLogger(__name__)
+log.setLevel(os.getenv("DISSECT_LOG_WEVT", "CRITICAL"))
+
+CRIM_SIGNATURE = b"CRIM"
+WEVT_SIGNATURE = b"WEVT"
+
+# The file types that can contain a WEVT_TEMPLATE resource
+DEFAULT_SUFFIXES = (".cpl", ".dll", ".drv", ".exe", ".mui", ".ocx", ".sys")
+
+_CRIM_HEADER = struct.Struct("<4sIHHI")
+_EVENT_DESCRIPTOR = struct.Struct("<16sI")
+
+
+def extract_manifests(
+    paths: str | Path | Iterable[str | Path],
+    workers: int | None = None,
+    suffixes: tuple[str, ...] | None = DEFAULT_SUFFIXES,
+) -> Iterator[tuple[Path, UUID, ProviderManifest]]:
+    """Find and parse the provider manifests in a directory or a list of PE and MUI files.
+
+    Directories are searched recursively for files that end with one of ``suffixes``, or for all files if
+    ``suffixes`` is ``None``. Every file is scanned for ``WEVT_TEMPLATE`` resources by their CRIM signature.
+
+    If ``workers`` is given, files are parsed in a pool of ``workers`` processes. The manifests are then passed
+    back as they are stored in a :class:`~dissect.eventlog.wevt.ManifestCache`.
+
+    Yields tuples of the path of the file, the provider GUID and the manifest of the provider, in order of path.
+    """
+    files = _iter_files(paths, suffixes)
+
+    if workers and workers > 1:
+        for path, providers in iter_parallel(_extract_encoded, ((path,) for path in files), workers):
+            for provider in providers:
+                manifest = decode_manifest(provider)
+                yield path, manifest.provider_id, manifest
+        return
+
+    for path in files:
+        for manifest in iter_file_manifests(path):
+            yield path, manifest.provider_id, manifest
+
+
+def iter_file_manifests(path: Path) -> Iterator[ProviderManifest]:
+    """Yield the manifests of all providers in the ``WEVT_TEMPLATE`` resources of a file."""
+    try:
+        fh = path.open("rb")
+    except OSError as e:
+        log.warning("Can't open %s: %s", path, e)
+        return
+
+    with fh:
+        buf = open_mmap(fh)
+        if buf is None:
+            buf = fh.read()
+
+        try:
+            for offset in find_crim(buf):
+                yield from _parse_crim(buf, offset, path)
+        finally:
+            if not isinstance(buf, bytes):
+                buf.close()
+
+
+def find_crim(buf: bytes | mmap.mmap) -> list[int]:
+    """Return the offsets of all plausible CRIM blobs in ``buf``."""
+    result = []
+
+    pos = buf.find(CRIM_SIGNATURE)
+    while pos != -1:
+        if _is_valid_crim(buf, pos):
+            result.append(pos)
+        pos = buf.find(CRIM_SIGNATURE, pos + 1)
+
+    return result
+
+
+def _is_valid_crim(buf: bytes | mmap.mmap, pos: int) -> bool:
+    if pos + _CRIM_HEADER.size > len(buf):
+        return False
+
+    _, size, _, _, providers = _CRIM_HEADER.unpack_from(buf, pos)
+    providers_end = _CRIM_HEADER.size + providers * _EVENT_DESCRIPTOR.size
+    if not providers or providers_end > size or pos + size > len(buf):
+        return False
+
+    for index in range(providers):
+        _, offset = _EVENT_DESCRIPTOR.unpack_from(buf, pos + _CRIM_HEADER.size + index * _EVENT_DESCRIPTOR.size)
+        if not providers_end <= offset <= size - 4 or buf[pos + offset : pos + offset + 4] != WEVT_SIGNATURE:
+            return False
+
+    return True
+
+
+def _parse_crim(buf: bytes | mmap.mmap, offset: int, path: Path) -> list[ProviderManifest]:
+    size = _CRIM_HEADER.unpack_from(buf, offset)[1]
+    try:
+        return list(CRIM(io.BytesIO(buf[offset : offset + size])).manifests().values())
+    except Exception as e:
+        log.warning("Can't parse the CRIM at 0x%x in %s: %s", offset, path, e)
+        log.debug("", exc_info=e)
+        return []
+
+
+def _extract_encoded(path: Path) -> tuple[Path, list[dict[str, Any]]]:
+    return path, [encode_manifest(manifest) for manifest in iter_file_manifests(path)]
+
+
+def _iter_files(paths: str | Path | Iterable[str | Path], suffixes: tuple[str, ...] | None) -> Iterator[Path]:
+    if isinstance(paths, (str, Path)):
+        paths = [paths]
+
+    for path in map(Path, paths):
+        if not path.is_dir():
+            yield path
+            continue
+
+        for root, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if suffixes is None or filename.lower().endswith(suffixes):
+                    yield Path(root, filename)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from uuid import UUID
+
+    from dissect.eventlog.wevt.wevt import WEVT
+    from dissect.eventlog.wevt.wevt_object import BMAP, EVNT, TEMP, VMAP
+
+
+KEYWORD_CACHE_SIZE = 4096
+
+
+class KeywordDecoder:
+    """Decodes 64-bit keyword masks into the names of the keywords that are set.
+
+    The keywords are split into a lookup table per byte of the mask, so decoding a mask takes 8 table lookups
+    instead of testing every keyword. Keywords with a bitmask that spans multiple bytes are tested separately.
+    The names of decoded masks are memoized.
+    """
+
+    __slots__ = ("_cache", "_multi_byte", "_tables")
+
+    def __init__(self, keywords: dict[int, str]):
+        self._tables: list[tuple[tuple[str, ...], ...] | None] = []
+        self._multi_byte: list[tuple[int, str]] = []
+        self._cache: dict[int, tuple[str, ...]] = {}
+
+        per_byte: list[list[tuple[int, str]]] = [[] for _ in range(8)]
+        for bitmask, name in sorted(keywords.items()):
+            if not bitmask:
+                continue
+
+            shift = (bitmask & -bitmask).bit_length() - 1
+            byte = shift // 8
+            if byte < 8 and bitmask >> (byte * 8) <= 0xFF:
+                per_byte[byte].append((bitmask >> (byte * 8), name))
+            else:
+                self._multi_byte.append((bitmask, name))
+
+        for entries in per_byte:
+            if not entries:
+                self._tables.append(None)
+                continue
+
+            self._tables.append(
+                tuple(tuple(name for mask, name in entries if value & mask == mask) for value in range(256))
+            )
+
+    def __call__(self, keywords: int) -> tuple[str, ...]:
+        try:
+            return self._cache[keywords]
+        except KeyError:
+            pass
+
+        names = ()
+        for byte, table in enumerate(self._tables):
+            if table is not None:
+                names += table[(keywords >> (byte * 8)) & 0xFF]
+
+        if self._multi_byte:
+            names += tuple(name for mask, name in self._multi_byte if keywords & mask == mask)
+
+        if len(self._cache) >= KEYWORD_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[keywords] = names
+
+        return names
+
+
+class ProviderManifest:
+    """The indexed contents of the manifest of a single event provider.
+
+    All objects of the provider are read in one pass over its WEVT types, after which events, templates, maps and
+    the names of channels, levels, tasks, opcodes and keywords can be looked up directly.
+
+    Attributes:
+        provider_id: The GUID of the provider.
+        events: The events of the provider, keyed by their ID and version.
+        templates: The templates of the provider, keyed by their offset in the manifest.
+        template_ids: The templates of the provider, keyed by their GUID. Identical templates can occur multiple
+            times in a manifest, in which case the first one is kept.
+        maps: The value and bitmap maps of the provider, keyed by their name.
+        channels: The channel names, keyed by the channel value.
+        levels: The level names, keyed by the level value.
+        tasks: The task names, keyed by the task value.
+        opcodes: The opcode names, keyed by the task the opcode belongs to (``0`` for any task) and the opcode value.
+        keywords: The keyword names, keyed by the keyword bitmask.
+    """
+
+    def __init__(self, provider_id: UUID):
+        self.provider_id = provider_id
+        self.events: dict[tuple[int, int], EVNT] = {}
+        self.templates: dict[int, TEMP] = {}
+        self.template_ids: dict[UUID, TEMP] = {}
+        self.maps: dict[str, VMAP | BMAP] = {}
+        self.channels: dict[int, str] = {}
+        self.levels: dict[int, str] = {}
+        self.tasks: dict[int, str] = {}
+        self.opcodes: dict[tuple[int, int], str] = {}
+        self.keywords: dict[int, str] = {}
+        self._keyword_decoder: KeywordDecoder | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<ProviderManifest provider_id={self.provider_id} events={len(self.events)} "
+            f"templates={len(self.templates)}>"
+        )
+
+    @classmethod
+    def from_wevt(cls, wevt: WEVT) -> ProviderManifest:
+        """Build the manifest of the provider in ``wevt``."""
+        manifest = cls(wevt.provider_id)
+
+        for wevt_type in wevt:
+            signature = wevt_type.signature
+
+            if signature == "EVNT":
+                for event in wevt_type:
+                    manifest.events.setdefault((event.id, event.version), event)
+            elif signature == "TTBL":
+                for template in wevt_type:
+                    manifest.templates[template.offset] = template
+                    manifest.template_ids.setdefault(template.identifier, template)
+            elif signature == "MAPS":
+                for value_map in wevt_type:
+                    if value_map is not None:
+                        manifest.maps[value_map.name] = value_map
+            elif signature == "CHAN":
+                for channel in wevt_type:
+                    manifest.channels[channel.nr] = channel.name
+            elif signature == "LEVL":
+                for level in wevt_type:
+                    manifest.levels[level.id] = level.name
+            elif signature == "TASK":
+                for task in wevt_type:
+                    manifest.tasks[task.id] = task.name
+            elif signature == "OPCO":
+                for opcode in wevt_type:
+                    manifest.opcodes[(opcode.task_id, opcode.value)] = opcode.name
+            elif signature == "KEYW":
+                for keyword in wevt_type:
+                    manifest.keywords[keyword.bitmask] = keyword.name
+
+        return manifest
+
+    def get_event(self, event_id: int, version: int = 0) -> EVNT | None:
+        """Return the event with the given ID and version."""
+        return self.events.get((event_id, version))
+
+    def get_template(self, event_id: int, version: int = 0) -> TEMP | None:
+        """Return the template of the event with the given ID and version, if it has one."""
+        event = self.events.get((event_id, version))
+        if event is None:
+            return None
+        return self.templates.get(event.template_offset)
+
+    def decode_keywords(self, keywords: int | str) -> tuple[str, ...]:
+        """Return the names of the keywords that are set in a keyword mask, such as the ``Keywords`` of a record.
+
+        Hexadecimal strings, as they are stored in EVTX records, are accepted as well.
+        """
+        if isinstance(keywords, str):
+            keywords = int(keywords, 16)
+
+        if self._keyword_decoder is None:
+            self._keyword_decoder = KeywordDecoder(self.keywords)
+        return self._keyword_decoder(keywords)
+
+    def get_opcode(self, value: int, task: int = 0) -> str | None:
+        """Return the name of an opcode, preferring an opcode that is specific to ``task``."""
+        name = self.opcodes.get((task, value))
+        if name is None and task:
+            name = self.opcodes.get((0, value))
+        return name
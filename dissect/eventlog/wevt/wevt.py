@@ -6,10 +6,14 @@ from uuid import UUID
 import dissect.eventlog.wevt.wevt_object as wevt_objects
 from dissect.eventlog.exceptions import UnknownSignatureException
 from dissect.eventlog.wevt.c_wevt import c_wevt
+from dissect.eventlog.wevt.cache import content_hash
+from dissect.eventlog.wevt.manifest import ProviderManifest
 
 if TYPE_CHECKING:
     from collections.abc import Iterator
 
+    from dissect.eventlog.wevt.cache import ManifestCache
+
 
 class CRIM:
     """Start header of the WEVT_TEMPLATE
@@ -21,6 +25,7 @@ class CRIM:
 
     def __init__(self, fh: BinaryIO):
         self.fh = fh
+        self.offset = fh.tell() if hasattr(fh, "tell") else 0
         self.header = c_wevt.CRIM_HEADER(fh)
         if self.header.signature != b"CRIM":
             raise UnknownSignatureException(f"Invalid signature, expected b'CRIM' got {self.header.signature}")
@@ -35,6 +40,31 @@ class CRIM:
         for event_provider in self.header.event_providers:
             yield WEVT(event_provider, self.fh)
 
+    def manifests(self, cache: ManifestCache | None = None) -> dict[UUID, ProviderManifest]:
+        """Get the indexed manifest of every provider, keyed by the provider GUID.
+
+        If a ``cache`` is given, the manifests are looked up by the hash of the CRIM blob first. Manifests that
+        are not cached yet are parsed and added to the cache.
+        """
+        if cache is None:
+            return self._parse_manifests()
+
+        key = content_hash(self.read())
+        manifests = cache.get(key)
+        if manifests is None:
+            manifests = self._parse_manifests()
+            cache.put(key, manifests)
+
+        return manifests
+
+    def _parse_manifests(self) -> dict[UUID, ProviderManifest]:
+        return {wevt.provider_id: ProviderManifest.from_wevt(wevt) for wevt in self.wevt_headers()}
+
+    def read(self) -> bytes:
+        """Read the whole CRIM blob."""
+        self.fh.seek(self.offset)
+        return self.fh.read(self.file_size)
+
 
 class WEVT:
     """Parse WEVT format and reads the files data into memory.
@@ -171,3 +201,14 @@ class TTBL_WEVT_TYPE(WEVT_TYPE):
             test_header = wevt_objects.TEMP(start_offset + offset, self.payload[offset:])
             yield test_header
             offset += test_header.size
+
+    def templates_by_offset(self) -> dict[int, wevt_objects.TEMP]:
+        """Return the templates keyed by their offset, which is how events refer to them."""
+        return {template.offset: template for template in self}
+
+    def templates_by_identifier(self) -> dict[UUID, wevt_objects.TEMP]:
+        """Return the templates keyed by their GUID, keeping the first of any duplicate templates."""
+        templates = {}
+        for template in self:
+            templates.setdefault(template.identifier, template)
+        return templates
@@ -17,26 +17,50 @@ if TYPE_CHECKING:
     from dissect.eventlog.utils import KeyValueCollection
 
 
+def parse_template_bxml(data: bytes) -> KeyValueCollection:
+    """Parse the BinXML of a WEVT template."""
+    bxml = Bxml(bxml_stream=BytesIO(data), elf_chunk_stream=None)
+    bxml.set_name_reader(WevtNameReader(bxml))
+    bxml.template = Template()
+    return parse_bxml(bxml)
+
+
 class WevtObject:
-    """Base object that functions as a wrapper for the header."""
+    """Base object that functions as a wrapper for the header.
+
+    The fields in ``_header_fields`` are copied from the header into slots when the object is created. The other
+    fields of the header are read from the header itself.
+    """
+
+    __slots__ = ("data", "data_offset", "data_start", "header", "offset")
+
+    _header_fields: tuple[str, ...] = ()
+    _repr_fields: tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if "_repr_fields" not in cls.__dict__:
+            slots = {slot for klass in cls.__mro__[:-2] for slot in klass.__dict__.get("__slots__", ())}
+            cls._repr_fields = tuple(sorted(slots | {"offset"}))
 
     def __init__(self, offset: int, data: bytes):
         self.offset = offset
-        self.header = getattr(c_wevt, self.__class__.__name__)(data)
-        self.data = data[len(self.header) :]
-        self.data_start = self.offset + len(self.header)
-        self.data_offset = self.header.data_offset - self.data_start
-
-    def __getattribute__(self, name: str) -> Any:
-        try:
-            return super().__getattribute__(name)
-        except AttributeError:
-            pass
+        self.header = header = getattr(c_wevt, self.__class__.__name__)(data)
+        for field in self._header_fields:
+            setattr(self, field, int(getattr(header, field)))
+
+        self.data = data[len(header) :]
+        self.data_start = self.offset + len(header)
+        self.data_offset = header.data_offset - self.data_start
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called if the attribute isn't found otherwise, so the fields in slots are not affected
+        if name.startswith("_") or name == "header":
+            raise AttributeError(f"{self.__class__.__name__!r} object has no attribute {name!r}")
         return getattr(self.header, name)
 
     def __repr__(self) -> str:
-        """Use __slots__ to get all the data we need from the object."""
-        output_data = [item + "=" + str(getattr(self, item)) for item in self.__slots__]
+        output_data = [item + "=" + str(getattr(self, item)) for item in self._repr_fields]
         return f"{self.__class__.__name__} {' '.join(output_data)}"
 
     def extract_name(self, data_offset: int) -> str:
@@ -47,41 +71,44 @@ class WevtObject:
 
 
 class WevtName(WevtObject):
+    __slots__ = ("name",)
+
     def __init__(self, offset: int, data: bytes):
         super().__init__(offset, data)
         self.name = self.extract_name(self.data_offset)
 
 
 class CHAN(WevtName):
-    __slots__ = ("id", "message_table_id", "name", "nr", "offset")
+    __slots__ = _header_fields = ("id", "message_table_id", "nr")
 
 
 class OPCO(WevtName):
-    __slots__ = ("message_table_id", "name", "offset", "task_id", "value")
+    __slots__ = _header_fields = ("message_table_id", "task_id", "value")
 
 
 class LEVL(WevtName):
-    __slots__ = ("id", "message_table_id", "name", "offset")
+    __slots__ = _header_fields = ("id", "message_table_id")
 
 
 class KEYW(WevtName):
-    __slots__ = ("bitmask", "message_table_id", "name", "offset")
+    __slots__ = _header_fields = ("bitmask", "message_table_id")
 
 
 class VMAP(WevtName):
-    __slots__ = ("name", "offset")
+    __slots__ = _header_fields = ("size",)
 
 
 class BMAP(WevtName):
-    __slots__ = ("name", "offset")
+    __slots__ = _header_fields = ("size",)
 
 
 class PRVA(WevtObject):
-    __slots__ = ("offset", "unknown")
+    __slots__ = _header_fields = ("unknown",)
 
 
 class TASK(WevtName):
-    __slots__ = ("id", "message_table_id", "mui_id", "name", "offset")
+    __slots__ = ("id", "message_table_id", "mui_id")
+    _header_fields = ("id", "message_table_id")
 
     def __init__(self, offset: int, data: bytes):
         super().__init__(offset, data)
@@ -89,7 +116,7 @@ class TASK(WevtName):
 
 
 class EVNT(WevtObject):
-    __slots__ = (
+    __slots__ = _header_fields = (
         "channel",
         "flags",
         "id",
@@ -97,7 +124,6 @@ class EVNT(WevtObject):
         "level",
         "level_offset",
         "message_table_id",
-        "offset",
         "opcode",
         "opcode_offset",
         "task",
@@ -108,36 +134,61 @@ class EVNT(WevtObject):
 
 
 class TEMP(WevtObject):
-    __slots__ = ("identifier", "names", "offset", "template")
+    """A template of an event.
+
+    The BinXML template and the descriptors of its values are only parsed when they are first accessed.
+    """
+
+    __slots__ = ("_names", "_template", "identifier", "size")
+    _header_fields = ("size",)
+    _repr_fields = ("identifier", "names", "offset", "size", "template")
 
     def __init__(self, offset: int, data: bytes):
         super().__init__(offset, data)
-        self.template = self._extract_bxml_template()
-
         self.identifier = UUID(bytes_le=self.header.identifier)
-        self.names: list[TEMP_DESCRIPTOR] = []
+        self._template = None
+        self._names = None
+
+    @property
+    def template(self) -> KeyValueCollection:
+        if self._template is None:
+            self._template = self._extract_bxml_template()
+        return self._template
+
+    @property
+    def names(self) -> list[TEMP_DESCRIPTOR]:
+        if self._names is None:
+            self._names = self._extract_names()
+        return self._names
+
+    def _extract_names(self) -> list[TEMP_DESCRIPTOR]:
+        names = []
         offset = self.data_offset
         for _ in range(self.header.nr_of_names):
             desc = TEMP_DESCRIPTOR(self.data_start + offset, self.data[offset:])
-            self.names.append(desc)
+            names.append(desc)
             offset += len(desc.header)
+        return names
 
     def _create_template_descriptor(self, start_offset: int, offset: int) -> TEMP_DESCRIPTOR:
         return TEMP_DESCRIPTOR(start_offset + offset, self.data[offset:])
 
     def _extract_bxml_template(self) -> KeyValueCollection:
-        bxml_datastream = BytesIO(self.data[: self.data_offset])
-        bxml = Bxml(bxml_stream=bxml_datastream, elf_chunk_stream=None)
-        bxml.set_name_reader(WevtNameReader(bxml))
-        bxml.template = Template()
-        return parse_bxml(bxml)
+        return parse_template_bxml(self.bxml)
+
+    @property
+    def bxml(self) -> bytes:
+        """The raw BinXML of the template."""
+        return bytes(self.data[: self.data_offset])
 
 
 class TEMP_DESCRIPTOR(WevtName):
-    __slots__ = ("inType", "name", "outType")
+    __slots__ = ("inType", "input_type", "outType", "output_type")
+    _header_fields = ("input_type", "output_type")
+    _repr_fields = ("inType", "name", "offset", "outType")
 
     def __init__(self, offset: int, data: bytes):
         super().__init__(offset, data)
 
-        self.inType = str(BxmlType(self.header.input_type))
-        self.outType = str(BxmlType(self.header.output_type))
+        self.inType = str(BxmlType(self.input_type))
+        self.outType = str(BxmlType(self.output_type))
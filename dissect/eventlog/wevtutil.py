@@ -1,7 +1,11 @@
 from __future__ import annotations
 
-import itertools
+import io
+import logging
+import os
+import re
 import subprocess
+from itertools import islice
 from typing import TYPE_CHECKING
 
 from defusedxml import ElementTree as ET
@@ -11,9 +15,49 @@ from dissect.eventlog.utils import KeyValueCollection
 if TYPE_CHECKING:
     from collections.abc import Iterator
     from pathlib import Path
+    from typing import BinaryIO
     from xml.etree.ElementTree import Element
 
-CHAR_TRANSLATION = {num: 48 + num for num in range(10)}
+log = logging.getLogger(__name__)
+log.setLevel(os.getenv("DISSECT_LOG_WEVTUTIL", "CRITICAL"))
+
+# The events are written without a root element, in the code page of the console
+STREAM_PREFIX = b'<?xml version="1.0" encoding="windows-1252"?><Events>'
+STREAM_SUFFIX = b"</Events>"
+READ_SIZE = 64 * 1024
+
+# The maximum number of element paths of which the key is cached
+PATH_CACHE_SIZE = 4096
+
+# Control characters that are not allowed in XML are replaced by their number
+CONTROL_CHARACTERS = re.compile(b"[\x00-\x09\x0b\x0c\x0e\x0f]")
+
+EVENT_END = b"</Event>"
+
+# The start of an event, where parsing resumes after a malformed event
+EVENT_START = re.compile(rb"<Event[\s/>]")
+
+
+def _replace_control_character(match: re.Match) -> bytes:
+    return str(match[0][0]).encode()
+
+
+def _iter_segments(fh: BinaryIO) -> Iterator[bytes]:
+    """Read the events written by ``wevtutil`` in segments that end after the last complete event that was read."""
+    read = fh.read1 if hasattr(fh, "read1") else fh.read
+    buf = b""
+
+    while data := read(READ_SIZE):
+        buf += CONTROL_CHARACTERS.sub(_replace_control_character, data)
+
+        end = buf.rfind(EVENT_END)
+        if end != -1:
+            end += len(EVENT_END)
+            yield buf[:end]
+            buf = buf[end:]
+
+    if buf.strip():
+        yield buf
 
 
 class WevtutilWrapper:
@@ -22,65 +66,136 @@ class WevtutilWrapper:
 
     def __init__(self, path: str | Path):
         self.path = path
+        self._path_keys: dict[tuple[str, str], str] = {}
 
     def __iter__(self) -> Iterator[KeyValueCollection]:
         p = subprocess.Popen(
-            ["wevtutil", "qe", "/lf:true", self.path],
+            ["wevtutil", "qe", "/lf:true", str(self.path)],
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
         )
         p.stdin.close()
 
-        buffer = ""
-
-        for line in p.stdout:
-            buffer += line
-
-            if "</Event>" not in buffer:
+        try:
+            yield from self._iter_events(p.stdout)
+        finally:
+            p.stdout.close()
+            if p.poll() is None:
+                p.terminate()
+            p.wait()
+
+    def _iter_events(self, fh: BinaryIO) -> Iterator[KeyValueCollection]:
+        """Parse the events written by ``wevtutil``, skipping the events that are malformed.
+
+        The output is parsed in segments of complete events. If a segment is malformed, the events in it that were
+        not parsed yet are parsed one by one, so only the malformed events are lost.
+        """
+        for segment in _iter_segments(fh):
+            count = 0
+            try:
+                for result in self._parse(segment):
+                    yield result
+                    count += 1
+                continue
+            except ET.ParseError as e:
+                log.warning("Can't parse the output of wevtutil for %s, parsing events one by one: %s", self.path, e)
+
+            starts = [match.start() for match in EVENT_START.finditer(segment)]
+            for start, end in islice(zip(starts, [*starts[1:], len(segment)], strict=False), count, None):
+                yield from self._parse_event(segment[start:end])
+
+    def _parse_event(self, data: bytes) -> Iterator[KeyValueCollection]:
+        try:
+            yield from self._parse(data)
+        except ET.ParseError as e:
+            log.warning("Skipping a malformed event in the output of wevtutil for %s: %s", self.path, e)
+
+    def _parse(self, data: bytes) -> Iterator[KeyValueCollection]:
+        root = None
+        depth = 0
+
+        for event, element in ET.iterparse(io.BytesIO(STREAM_PREFIX + data + STREAM_SUFFIX), events=("start", "end")):
+            if event == "start":
+                if depth == 0:
+                    root = element
+                depth += 1
                 continue
 
-            buffer = buffer.replace(" xmlns='http://schemas.microsoft.com/win/2004/08/events/event'", "")
-            buffer = buffer.translate(CHAR_TRANSLATION)
-            for character in [0xB, 0xC, 0xE, 0xF]:
-                buffer = buffer.replace(chr(character), str(character))
-
-            buffer = buffer.decode("windows-1252").encode("utf-8")
-
-            try:
-                element: Element = ET.fromstring(buffer)
-            except ET.ParseError:
-                buffer = ""
+            depth -= 1
+            element.tag = element.tag.rpartition("}")[2]
+            if depth != 1:
                 continue
 
-            result = KeyValueCollection()
-            self.fullmap(element, [], result)
+            if element.tag == "Event":
+                result = KeyValueCollection()
+                self.fullmap(element, [], result)
 
-            yield result
-            self.count += 1
+                yield result
+                self.count += 1
 
-            buffer = ""
+            # Only keep the event that is currently being parsed in memory
+            root.clear()
 
     def fullmap(
-        self, element: Element, path: list[Element], value_collection: KeyValueCollection
+        self,
+        element: Element,
+        path: list[Element] | None = None,
+        value_collection: KeyValueCollection | None = None,
     ) -> KeyValueCollection:
-        for e in element.iter():
-            if e is element:
-                continue
-            self.fullmap(e, [*path, element], value_collection)
-
-        if element.text:
-            if element.tag == "Data" and "Name" in element.attrib:
-                value_collection[element.attrib["Name"]] = element.text
-            else:
-                pathstr = "_".join(itertools.chain((elem.tag for elem in path[2:]), [element.tag]))
-
-                value_collection[pathstr] = element.text
-
-        for key, value in element.attrib.items():
-            if element.tag == "Data" and key == "Name":
+        """Flatten an ``Event`` element, or an element below it, into ``value_collection``.
+
+        The keys are the same as those of :meth:`~dissect.eventlog.bxml.Template.as_full_map`. Values are named by
+        the path of their element below ``System`` or ``EventData``, or by the ``Name`` of their ``Data`` element.
+        Attributes are named by their element and attribute name. The tree is walked once, with an explicit stack.
+
+        Args:
+            element: The element to flatten.
+            path: The ancestors of ``element``, starting at the ``Event`` element. Empty for an ``Event`` element.
+            value_collection: The collection to add the values to, a new one is created if it's not given.
+        """
+        if path is None:
+            path = []
+        if value_collection is None:
+            value_collection = KeyValueCollection()
+
+        path_keys = self._path_keys
+        if len(path_keys) >= PATH_CACHE_SIZE:
+            path_keys.clear()
+
+        # Items are (element, path key, depth), or (element, None, -1) once all children of the element are mapped
+        key = "_".join([ancestor.tag for ancestor in path[2:]] + [element.tag]) if len(path) >= 2 else ""
+        stack = [(element, key, len(path))]
+        while stack:
+            e, key, depth = stack.pop()
+            tag = e.tag
+            attrib = e.attrib
+
+            if depth < 0:
+                if tag == "Event":
+                    continue
+
+                for name, value in attrib.items():
+                    if tag == "Data" and name == "Name":
+                        continue
+                    value_collection[tag + "_" + name] = value
                 continue
 
-            pathstr = "_".join(itertools.chain((elem.tag for elem in path[2:]), [element.tag, key]))
-            value_collection[pathstr] = value
+            if e.text:
+                if tag == "Data" and "Name" in attrib:
+                    value_collection[attrib["Name"]] = e.text
+                else:
+                    value_collection[key] = e.text
+
+            stack.append((e, None, -1))
+
+            depth += 1
+            for child in reversed(e):
+                child_key = ""
+                if depth >= 2:
+                    try:
+                        child_key = path_keys[key, child.tag]
+                    except KeyError:
+                        child_key = path_keys[key, child.tag] = f"{key}_{child.tag}" if key else child.tag
+                stack.append((child, child_key, depth))
 
         return value_collection
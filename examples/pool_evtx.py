@@ -9,7 +9,7 @@ from typing import TYPE_CHECKING
 
 from fileprocessing import DirectoryWalker
 
-from dissect.eventlog import evtx
+from dissect.eventlog import evtx, output
 
 if TYPE_CHECKING:
     from collections.abc import Iterator
@@ -59,7 +59,7 @@ class EvtxHandler:
                 gzip.open(dstpath, "wb") as output_file,
             ):
                 e = evtx.Evtx(input_file)
-                output_file.writelines(map(evtx.splunkify, e))
+                output.write_splunk(e, output_file)
                 count = e.count
         except KeyboardInterrupt:
             raise
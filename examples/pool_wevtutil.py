@@ -9,7 +9,7 @@ from typing import TYPE_CHECKING, Any
 
 import elasticsearch.helpers
 
-from dissect.eventlog import wevtutil
+from dissect.eventlog import output, wevtutil
 
 if TYPE_CHECKING:
     from collections.abc import Iterator
@@ -61,7 +61,7 @@ class EvtxHandler:
                 dirpath.mkdir(parents=True, exist_ok=True)
 
             with outpath.open("wb") as outf:
-                outf.writelines(map(wevtutil.splunkify, e))
+                output.write_splunk(e, outf)
 
             count = e.count
         except KeyboardInterrupt:
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import TYPE_CHECKING
+
+import pytest
+
+from dissect.eventlog.archive import (
+    _BLOCK_HEADER,
+    _HEADER,
+    ARCHIVE_SIGNATURE,
+    FORMAT_VERSION,
+    ArchiveReader,
+    ArchiveWriter,
+    read_archive,
+    write_archive,
+)
+from dissect.eventlog.bxml import BxmlSub
+from dissect.eventlog.bxml.bxml import HexBytes
+from dissect.eventlog.evt import Evt
+from dissect.eventlog.evtx import Evtx
+from dissect.eventlog.exceptions import Error, UnknownSignatureException
+from dissect.eventlog.utils import CompactRecord, KeyValueCollection
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+
+def _unwrap(record: CompactRecord | KeyValueCollection) -> dict:
+    return {key: value.value if isinstance(value, BxmlSub) else value for key, value in record.items()}
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_archive_evtx(compress: bool, get_absolute_path: Callable[[str], Path]) -> None:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+    expected = [_unwrap(record) for record in Evtx(BytesIO(data))]
+
+    fh = BytesIO()
+    with ArchiveWriter(fh, block_size=2, compress=compress) as writer:
+        assert writer.write(Evtx(BytesIO(data))) == 5
+        assert writer.write(Evtx(BytesIO(data), compact=True)) == 5
+
+    records = list(read_archive(fh))
+    assert len(records) == 10
+    assert all(isinstance(record, CompactRecord) for record in records)
+    assert [dict(record) for record in records] == expected * 2
+    assert records[0].schema is records[9].schema
+
+    record = records[3]
+    assert record["EventID"] == 65534
+    assert record["TimeCreated_SystemTime"] == datetime(2021, 7, 22, 15, 50, 23, 212521, tzinfo=timezone.utc)
+    assert record["Data"] == ["Test log message, failure audit"]
+    assert type(record["Binary"]) is HexBytes
+
+    # The archive can be read again
+    assert len(list(ArchiveReader(fh))) == 10
+
+
+def test_archive_evt(get_absolute_path: Callable[[str], Path]) -> None:
+    data = get_absolute_path("_data/TestLog.evt").read_bytes()
+    expected = [record._asdict() for record in Evt(BytesIO(data))]
+    for record in expected:
+        del record["record"]
+
+    archive = BytesIO()
+    assert write_archive(Evt(BytesIO(data)), archive) == 5
+
+    assert [dict(record) for record in read_archive(archive)] == expected
+
+
+def test_archive_values() -> None:
+    record = KeyValueCollection()
+    record["Aware"] = datetime(2021, 7, 22, 15, 50, 23, 212521, tzinfo=timezone.utc)
+    record["Naive"] = datetime(2021, 7, 22, 15, 50, 23)  # noqa: DTZ001
+    record["Guid"] = uuid.UUID("6b4d8d16-b0a7-4ab1-a1a4-9ae6d1de4f3e")
+    record["Sub"] = BxmlSub(0)
+    record["Large"] = 2**64 - 1
+    record["Bytes"] = b"\x00\xff"
+    record["Hex"] = HexBytes(b"00ff")
+    record["Float"] = 1.5
+    record["Bool"] = True
+    record["List"] = ["a", datetime(2021, 7, 22, tzinfo=timezone.utc), None]
+    record["List"] = ["b", "c"]
+    record["Other"] = object
+
+    fh = BytesIO()
+    write_archive([record], fh)
+    (result,) = read_archive(fh)
+
+    assert dict(result) == {
+        "Aware": datetime(2021, 7, 22, 15, 50, 23, 212521, tzinfo=timezone.utc),
+        "Naive": datetime(2021, 7, 22, 15, 50, 23),  # noqa: DTZ001
+        "Guid": uuid.UUID("6b4d8d16-b0a7-4ab1-a1a4-9ae6d1de4f3e"),
+        "Sub": None,
+        "Large": 2**64 - 1,
+        "Bytes": b"\x00\xff",
+        "Hex": b"00ff",
+        "Float": 1.5,
+        "Bool": True,
+        "List": ["a", datetime(2021, 7, 22, tzinfo=timezone.utc), None],
+        "List_1": ["b", "c"],
+        "Other": str(object),
+    }
+    assert type(result["Bytes"]) is bytes
+    assert type(result["Hex"]) is HexBytes
+
+
+def test_archive_batches() -> None:
+    records = [{"EventID": i, "A": i} if i % 3 else {"EventID": i, "B": str(i)} for i in range(10)]
+
+    fh = BytesIO()
+    with ArchiveWriter(fh, block_size=4) as writer:
+        writer.write(records)
+
+    batches = list(ArchiveReader(fh).iter_batches())
+    assert [len(batch["EventID"]) for batch in batches] == [4, 4, 2]
+    assert batches[0] == {"EventID": [0, 1, 2, 3], "B": ["0", None, None, "3"], "A": [None, 1, 2, None]}
+    assert batches[2] == {"EventID": [8, 9], "A": [8, None], "B": [None, "9"]}
+
+    batches = list(ArchiveReader(fh).iter_batches(columns=["A", "Missing"]))
+    assert batches[1] == {"A": [4, 5, None, 7], "Missing": [None] * 4}
+    assert batches[2] == {"A": [8, None], "Missing": [None, None]}
+
+
+def test_archive_empty_record() -> None:
+    # A record without keys has no columns, the records after it in the block must not be lost
+    records = [{"A": 1}, {}, {"A": 2}, {"A": 3}, {}]
+
+    fh = BytesIO()
+    assert write_archive(records, fh) == 5
+
+    assert [dict(record) for record in ArchiveReader(fh)] == records
+    assert list(ArchiveReader(fh).iter_batches()) == [{"A": [1, None, 2, 3, None]}]
+
+
+def test_archive_invalid() -> None:
+    with pytest.raises(UnknownSignatureException):
+        ArchiveReader(BytesIO(b"\x00" * 16))
+
+    fh = BytesIO()
+    write_archive([{"EventID": 1}], fh)
+    data = fh.getvalue()
+
+    with pytest.raises(Error, match="Truncated archive"):
+        list(read_archive(BytesIO(data[:-1])))
+
+    with pytest.raises(Error, match="Corrupt block"):
+        list(read_archive(BytesIO(data[:-4] + b"\x00" * 4)))
+
+    with pytest.raises(Error, match="Unsupported archive version 1"):
+        ArchiveReader(BytesIO(_HEADER.pack(ARCHIVE_SIGNATURE, 1)))
+
+    for block in (b'[[[0,["A"]]],[0],[[0,1,[[{"pickle":"x"}]]]]]', b"[[[0,[1]]],[0],[[0,1,[[1]]]]]", b"[1,2]"):
+        archive = _HEADER.pack(ARCHIVE_SIGNATURE, FORMAT_VERSION) + _BLOCK_HEADER.pack(0, len(block), 1) + block
+        with pytest.raises(Error, match="Corrupt block"):
+            list(read_archive(BytesIO(archive)))
@@ -1,21 +1,41 @@
 from __future__ import annotations
 
+import os
 import sys
+import tracemalloc
+import uuid
 from functools import partial
-from typing import TYPE_CHECKING
+from io import BytesIO
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any
 from unittest.mock import Mock, patch
 
 import pytest
+from dissect.util.ts import wintimestamp
 
+from dissect.eventlog.archive import ArchiveReader, write_archive
+from dissect.eventlog.bxml.bxml import BxmlType, read_array, read_guid
 from dissect.eventlog.evt import Evt
 from dissect.eventlog.evtx import Evtx
-from dissect.eventlog.wevt.wevt_object import TEMP
+from dissect.eventlog.output import JsonLinesSerializer, SplunkSerializer
+from dissect.eventlog.sqlite import write_sqlite
+from dissect.eventlog.timestamps import filetime_to_datetime, filetime_to_us
+from dissect.eventlog.wevt import CRIM
+from dissect.eventlog.wevt.wevt_object import EVNT, TEMP
+from dissect.eventlog.wevtutil import WevtutilWrapper
 from examples.parse_wevt import main as wevt_main
+from tests._utils import create_header_type
 from tests.conftest import absolute_path
+from tests.test_wevtutil import EVENT, write_fake_wevtutil
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
     from pytest_benchmark.fixture import BenchmarkFixture
 
+    from dissect.eventlog.output import Serializer
+
 
 @pytest.mark.benchmark
 @pytest.mark.parametrize(
@@ -60,6 +80,14 @@ def test_benchmark_evtx(benchmark: BenchmarkFixture) -> None:
         benchmark(lambda: list(evtx))
 
 
+@pytest.mark.benchmark
+def test_benchmark_evtx_system(benchmark: BenchmarkFixture) -> None:
+    # Only the System values are used, so the EventData fragments of the records are never parsed
+    with absolute_path("_data/TestLogX.evtx").open("rb") as fh:
+        evtx = Evtx(fh)
+        benchmark(lambda: [(record["EventID"], record["TimeCreated_SystemTime"]) for record in evtx])
+
+
 @pytest.mark.benchmark
 def test_benchmark_evtx_scrape(monkeypatch: pytest.MonkeyPatch, benchmark: BenchmarkFixture) -> None:
     with monkeypatch.context() as m:
@@ -104,3 +132,145 @@ def test_benchmark_binxml_wevt(path: str, start_offset: int, size: int, benchmar
         fh.seek(start_offset)
         temp = partial(TEMP, offset=start_offset, data=fh.read(size))
         benchmark(temp)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    "path",
+    [
+        "_data/mpengine_etw.wevt",
+        "_data/services.wevt",
+    ],
+)
+def test_benchmark_wevt_manifests(path: str, benchmark: BenchmarkFixture) -> None:
+    data = absolute_path(path).read_bytes()
+    benchmark(lambda: CRIM(BytesIO(data)).manifests())
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    "path",
+    [
+        "_data/mpengine_etw.wevt",
+        "_data/services.wevt",
+    ],
+)
+def test_benchmark_wevt_manifests_memory(path: str, benchmark: BenchmarkFixture) -> None:
+    """Measure the memory of the manifests, which is saved in the extra info of the benchmark results."""
+    data = absolute_path(path).read_bytes()
+
+    tracemalloc.start()
+    try:
+        manifests = CRIM(BytesIO(data)).manifests()
+        size, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    benchmark.extra_info["memory_size"] = size
+    benchmark.extra_info["memory_peak"] = peak
+    benchmark(lambda: CRIM(BytesIO(data)).manifests())
+    assert manifests
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("field", ["id", "data_counter"])
+def test_benchmark_wevt_header_field(field: str, benchmark: BenchmarkFixture) -> None:
+    """Compare a header field that is copied into a slot, ``id``, with one that is read from the header."""
+    event = EVNT(0, create_header_type("EVNT", id=1, data_counter=1))
+    assert benchmark(attrgetter(field), event) == 1
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(sys.platform == "win32", reason="fake wevtutil is a POSIX script")
+def test_benchmark_wevtutil(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, benchmark: BenchmarkFixture) -> None:
+    events = (EVENT.format(event_id=4624, record_id=i, name=f"User{i}") for i in range(5000))
+    write_fake_wevtutil(tmp_path, "\r\n".join(events).encode())
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    benchmark(lambda: list(WevtutilWrapper("Security.evtx")))
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(sys.platform == "win32", reason="fake wevtutil is a POSIX script")
+def test_benchmark_wevtutil_large_events(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, benchmark: BenchmarkFixture
+) -> None:
+    data = "".join(f"<Data Name='Field{i}'>Value{i}</Data>" for i in range(200))
+    events = (
+        EVENT.format(event_id=4624, record_id=i, name="Admin").replace("</EventData>", data + "</EventData>")
+        for i in range(500)
+    )
+    write_fake_wevtutil(tmp_path, "\r\n".join(events).encode())
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    benchmark(lambda: list(WevtutilWrapper("Security.evtx")))
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("convert", [wintimestamp, filetime_to_datetime, filetime_to_us])
+def test_benchmark_filetime(convert: Callable[[int], Any], benchmark: BenchmarkFixture) -> None:
+    filetimes = range(132714422614167183, 132714422614167183 + 10_000_000_000, 1_000_000)
+    benchmark(lambda: list(map(convert, filetimes)))
+
+
+@pytest.mark.benchmark
+def test_benchmark_guid(benchmark: BenchmarkFixture) -> None:
+    # Every System block has the same provider GUID, and activity IDs that repeat within a few records
+    provider = uuid.uuid4().bytes_le
+    activities = [uuid.uuid4().bytes_le for _ in range(100)]
+    values = [BytesIO(data) for i in range(10_000) for data in (provider, activities[i % 100])]
+
+    def read_guids() -> None:
+        for stream in values:
+            stream.seek(0)
+            read_guid(stream)
+
+    benchmark(read_guids)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    ("type_id", "data"),
+    [
+        (BxmlType.UINT32, bytes(range(256)) * 64),
+        (BxmlType.STRING, "\x00".join(f"value {i}" for i in range(1000)).encode("utf-16-le") + b"\x00\x00"),
+    ],
+)
+def test_benchmark_read_array(type_id: BxmlType, data: bytes, benchmark: BenchmarkFixture) -> None:
+    benchmark(read_array, data, type_id)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("serializer", [JsonLinesSerializer(), SplunkSerializer()])
+def test_benchmark_output(serializer: Serializer, benchmark: BenchmarkFixture) -> None:
+    with absolute_path("_data/TestLogX.evtx").open("rb") as fh:
+        records = list(Evtx(fh)) * 200
+
+    benchmark(lambda: serializer.write(records, BytesIO()))
+
+
+@pytest.mark.benchmark
+def test_benchmark_sqlite(tmp_path: Path, benchmark: BenchmarkFixture) -> None:
+    with absolute_path("_data/TestLogX.evtx").open("rb") as fh:
+        records = list(Evtx(fh)) * 200
+
+    benchmark(lambda: write_sqlite(records, tmp_path / "records.db"))
+
+
+@pytest.mark.benchmark
+def test_benchmark_archive_write(benchmark: BenchmarkFixture) -> None:
+    with absolute_path("_data/TestLogX.evtx").open("rb") as fh:
+        records = list(Evtx(fh)) * 200
+
+    benchmark(lambda: write_archive(records, BytesIO()))
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("batches", [False, True])
+def test_benchmark_archive_read(batches: bool, benchmark: BenchmarkFixture) -> None:
+    with absolute_path("_data/TestLogX.evtx").open("rb") as fh:
+        archive = BytesIO()
+        write_archive(list(Evtx(fh)) * 200, archive)
+
+    reader = ArchiveReader(archive)
+    benchmark(lambda: list(reader.iter_batches() if batches else reader))
@@ -1,15 +1,30 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
 from io import BytesIO
 from typing import TYPE_CHECKING
 from unittest.mock import Mock, patch
+from uuid import UUID
 
 import pytest
 
-from dissect.eventlog.bxml import Bxml, BxmlToken
+from dissect.eventlog.bxml import Bxml, BxmlSub, BxmlToken, Template, TemplateDictionary
+from dissect.eventlog.bxml.bxml import (
+    RAW_TYPE_READERS,
+    TYPE_READERS,
+    BxmlTag,
+    BxmlType,
+    format_guid,
+    format_value,
+    read_array,
+    read_descriptor_array,
+    read_guid,
+)
 from dissect.eventlog.exceptions import BxmlException
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
     from types import FunctionType
 
 
@@ -144,3 +159,162 @@ def test_parse_entity_more() -> None:
         patch.object(Bxml, Bxml.read_token.__name__, return_value=" World"),
     ):
         assert Bxml(None, None).read_entity_reference(True, Mock()) == "&Hello; World"
+
+
+def create_template(identifier: UUID) -> Template:
+    tag = BxmlTag("Event")
+    tag.add_attributes({"Name": BxmlSub(0)})
+    tag.add_children(["text", BxmlSub(1)])
+
+    template = Template()
+    template.identifier = identifier
+    template.element = tag
+    return template
+
+
+def test_template_dictionary() -> None:
+    template_dictionary = TemplateDictionary()
+    identifier = UUID("406c665f-7934-5303-7648-8e8950058505")
+    template_dictionary.add(create_template(identifier))
+
+    template = template_dictionary.get_by_id(0x406C665F)
+    assert template is template_dictionary.get(identifier)
+    assert template.identifier == identifier
+    assert str(template) == '<Event Name="None">textNone</Event>'
+    assert sorted(template.subs) == [0, 1]
+    assert template.mapping == {"Name": 0}
+
+    assert template_dictionary.get_by_id(0x12345678) is None
+
+    loaded = TemplateDictionary.loads(template_dictionary.dumps())
+    assert list(loaded) == [identifier]
+    assert str(loaded.get(identifier)) == str(template)
+
+
+def test_template_dictionary_lru() -> None:
+    template_dictionary = TemplateDictionary(max_size=2)
+    identifiers = [UUID(int=i << 96) for i in range(1, 4)]
+
+    template_dictionary.add(create_template(identifiers[0]))
+    template_dictionary.add(create_template(identifiers[1]))
+    template_dictionary.get(identifiers[0])
+    template_dictionary.add(create_template(identifiers[2]))
+
+    assert list(template_dictionary) == [identifiers[0], identifiers[2]]
+    assert template_dictionary.get_by_id(identifiers[1].time_low) is None
+
+
+def test_template_dictionary_collision() -> None:
+    template_dictionary = TemplateDictionary(max_size=2)
+    identifiers = [UUID(int=(1 << 96) | i) for i in range(3)]
+
+    template_dictionary.add(create_template(identifiers[0]))
+    assert template_dictionary.get_by_id(1).identifier == identifiers[0]
+
+    # Templates that start with the same 4 bytes are only found by their full identifier
+    template_dictionary.add(create_template(identifiers[1]))
+    assert template_dictionary.get_by_id(1) is None
+    assert template_dictionary.get(identifiers[1]).identifier == identifiers[1]
+
+    template_dictionary.add(create_template(identifiers[2]))
+    template_dictionary.get(identifiers[1])
+    template_dictionary.add(create_template(UUID(int=2 << 96)))
+    assert list(template_dictionary) == [identifiers[1], UUID(int=2 << 96)]
+    assert template_dictionary.get_by_id(1).identifier == identifiers[1]
+
+
+@pytest.mark.parametrize(
+    ("type_id", "data", "raw", "formatted"),
+    [
+        (BxmlType.HEXINT32, b"\xff\x00\x00\x00", 0xFF, "0xff"),
+        (BxmlType.HEXINT64, b"\x00\x00\x00\x00\x00\x00\x80\x00", 0x80000000000000, "0x80000000000000"),
+        (BxmlType.SIZET, b"\x10\x00\x00\x00", 0x10, "0x10"),
+        (BxmlType.SIZET, b"\x10\x00\x00\x00\x00\x00\x00\x00", 0x10, "0x10"),
+        (BxmlType.BINARY, b"\x01\xab", b"\x01\xab", b"01ab"),
+        (
+            BxmlType.GUID,
+            bytes.fromhex("2596845478549449a5ba3e3b0328c30d"),
+            UUID("25968454-7854-9449-a5ba-3e3b0328c30d"),
+            "{25968454-7854-9449-A5BA-3E3B0328C30D}",
+        ),
+        (
+            BxmlType.FILETIME,
+            (132714422614167183).to_bytes(8, "little"),
+            132714422614167183,
+            datetime(2021, 7, 22, 15, 44, 21, 416718, tzinfo=timezone.utc),
+        ),
+        (
+            BxmlType.SYSTEMTIME,
+            bytes.fromhex("e5070700040016000f002c0015009f01"),
+            132714422614150000,
+            datetime(2021, 7, 22, 15, 44, 21, 415000),  # noqa: DTZ001
+        ),
+    ],
+)
+def test_raw_types(type_id: BxmlType, data: bytes, raw: object, formatted: object) -> None:
+    assert TYPE_READERS[type_id](BytesIO(data)) == formatted
+    assert RAW_TYPE_READERS[type_id](BytesIO(data)) == raw
+    assert format_value(type_id, raw) == formatted
+    assert format_value(type_id, [raw, raw]) == [formatted, formatted]
+
+
+def test_read_guid() -> None:
+    data = bytes.fromhex("2596845478549449a5ba3e3b0328c30d")
+
+    guid = read_guid(BytesIO(data))
+    assert guid == "{25968454-7854-9449-A5BA-3E3B0328C30D}"
+    assert read_guid(BytesIO(data)) is guid
+
+    for data in (bytes(range(16)), b"\xff" * 16, bytes(16)):
+        assert read_guid(BytesIO(data)) == format_guid(UUID(bytes=data))
+
+    with pytest.raises(ValueError, match="Expected 16 bytes for a GUID, got 4"):
+        read_guid(BytesIO(b"\x00" * 4))
+
+
+def test_read_guid_provider(get_absolute_path: Callable[[str], Path]) -> None:
+    # The provider GUIDs in the WEVT resource of services.exe, as Windows stores them and EVTX records contain them.
+    # They are read in big endian, so the first three fields are byte swapped compared to how Windows shows them.
+    data = get_absolute_path("_data/services.wevt").read_bytes()
+    assert read_guid(BytesIO(data[0x10:0x20])) == "{5B716300-DAEE-0740-9429-AD526F62696E}"
+    assert read_guid(BytesIO(data[0x38:0x48])) == "{D1085955-D7A6-9546-8E1E-26931D2012F4}"
+    assert UUID(read_guid(BytesIO(data[0x38:0x48]))).bytes == data[0x38:0x48]
+
+
+@pytest.mark.parametrize(
+    ("type_id", "item_size"),
+    [
+        (BxmlType.INT8, 1),
+        (BxmlType.UINT16, 2),
+        (BxmlType.INT32, 4),
+        (BxmlType.UINT64, 8),
+        (BxmlType.FLOAT, 4),
+        (BxmlType.DOUBLE, 8),
+        (BxmlType.BOOL, 1),
+        (BxmlType.GUID, 16),
+        (BxmlType.FILETIME, 8),
+        (BxmlType.HEXINT32, 4),
+        (BxmlType.HEXINT64, 8),
+    ],
+)
+@pytest.mark.parametrize("raw_types", [False, True])
+def test_read_array(type_id: BxmlType, item_size: int, raw_types: bool) -> None:
+    data = bytes(range(1, 8 * item_size + 1))
+    if type_id == BxmlType.FILETIME:
+        data = b"".join((132714422614167183 + i * 123456789).to_bytes(8, "little") for i in range(8))
+    descriptor = Mock(size=len(data))
+    reader = (RAW_TYPE_READERS if raw_types else TYPE_READERS)[type_id]
+
+    expected = list(read_descriptor_array(BytesIO(data), descriptor, reader))
+    assert len(expected) == 8
+    assert read_array(data, type_id, raw_types) == expected
+
+
+def test_read_array_strings() -> None:
+    assert read_array("first\x00\x00third\x00".encode("utf-16-le"), BxmlType.STRING) == ["first", "", "third"]
+    assert read_array(b"", BxmlType.STRING) == []
+    assert read_array(b"first\x00second\x00", BxmlType.ANSITRING) == [b"first", b"second"]
+
+    # Values that can't be decoded in bulk are read one by one
+    assert read_array(b"\x00" * 3, BxmlType.UINT16) is None
+    assert read_array(b"\x00" * 8, BxmlType.SID) is None
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import array
+from datetime import datetime, timezone
+from io import BytesIO
 from typing import TYPE_CHECKING
+from unittest.mock import patch
 
 import pytest
 
+from dissect.eventlog.evt import carve
 from dissect.eventlog.evt.evt import Evt
+from dissect.eventlog.exceptions import Error
 
 if TYPE_CHECKING:
     from collections.abc import Callable
@@ -61,3 +67,128 @@ def test_evt_parsing(get_absolute_path: Callable[[str], Path], log_filename: str
 
         assert events_with_data[1].Data
         assert events_with_data[1].Data.decode("utf-16") == "Test Binary Data 2"
+
+
+@pytest.mark.parametrize("log_filename", ["_data/TestLog.evt", "_data/TestLog-dirty.evt"])
+def test_evt_get(get_absolute_path: Callable[[str], Path], log_filename: str) -> None:
+    with get_absolute_path(log_filename).open("rb") as fh:
+        evt = Evt(fh)
+        records = list(evt)
+
+        evt.build_index()
+        assert sorted(evt._index) == [1, 2, 3, 4, 5]
+
+        for record in reversed(records):
+            assert evt.get(record.RecordNumber) == record
+
+        with pytest.raises(Error):
+            evt.get(6)
+
+
+@pytest.mark.parametrize("log_filename", ["_data/TestLog.evt", "_data/TestLog-dirty.evt"])
+def test_evt_iter_between(get_absolute_path: Callable[[str], Path], log_filename: str) -> None:
+    with get_absolute_path(log_filename).open("rb") as fh:
+        evt = Evt(fh)
+
+        assert [rec.RecordNumber for rec in evt.iter_between()] == [1, 2, 3, 4, 5]
+
+        start = datetime(2021, 7, 21, 2, 40, 46, tzinfo=timezone.utc)
+        end = datetime(2021, 7, 21, 3, 16, 51, tzinfo=timezone.utc)
+        assert [rec.RecordNumber for rec in evt.iter_between(start, end)] == [2, 3, 4]
+        assert [rec.RecordNumber for rec in evt.iter_between(start=end)] == [5]
+        assert [rec.RecordNumber for rec in evt.iter_between(end=start.replace(tzinfo=None))] == [1]
+
+
+@pytest.fixture
+def evt_image(get_absolute_path: Callable[[str], Path]) -> bytes:
+    data = get_absolute_path("_data/TestLog.evt").read_bytes()
+    # Surround the log with some noise, including a bogus record signature
+    return b"\xaa" * 1001 + data + b"\x00\x00\x00\x00LfLe" + b"\xbb" * 777 + data[:300]
+
+
+def test_evt_carve(evt_image: bytes) -> None:
+    records = list(carve(BytesIO(evt_image), block_size=256))
+
+    assert [(offset, record.RecordNumber) for offset, record in records] == [
+        (1049, 1),
+        (1217, 2),
+        (1373, 3),
+        (1533, 4),
+        (1737, 5),
+        # The second record of the truncated copy is incomplete
+        (2818, 1),
+    ]
+    assert records[3][1].Strings == ["Test log entry, failure audit"]
+    assert records[3][1].Data.decode("utf-16") == "Test Binary Data"
+
+
+def test_evt_carve_corrupt_body(evt_image: bytes) -> None:
+    # The strings of the second record are not terminated, so reading them runs past the end of the record
+    image = bytearray(evt_image)
+    image[1217 + 56 : 1373 - 4] = b"A" * (1373 - 4 - 1217 - 56)
+
+    records = list(carve(BytesIO(image), block_size=256))
+    assert [(offset, record.RecordNumber) for offset, record in records] == [
+        (1049, 1),
+        (1373, 3),
+        (1533, 4),
+        (1737, 5),
+        (2818, 1),
+    ]
+
+
+def test_evt_carve_workers(evt_image: bytes, tmp_path: Path) -> None:
+    path = tmp_path.joinpath("image.bin")
+    path.write_bytes(evt_image)
+
+    with path.open("rb") as fh:
+        expected = [(offset, record.RecordNumber) for offset, record in carve(fh)]
+        assert [(offset, record.RecordNumber) for offset, record in carve(fh, workers=2, range_size=512)] == expected
+
+    with pytest.raises(ValueError, match="file on disk"):
+        next(carve(BytesIO(evt_image), workers=2))
+
+
+@pytest.mark.parametrize("log_filename", ["_data/TestLog.evt", "_data/TestLog-dirty.evt"])
+def test_evt_iter_batches(get_absolute_path: Callable[[str], Path], log_filename: str) -> None:
+    with get_absolute_path(log_filename).open("rb") as fh:
+        evt = Evt(fh)
+        records = list(evt)
+
+        batches = list(evt.iter_batches(batch_size=3))
+        assert [len(batch["RecordNumber"]) for batch in batches] == [3, 2]
+        assert "record" not in batches[0]
+
+        event_ids = [event_id for batch in batches for event_id in batch["EventID"]]
+        assert event_ids == [rec.EventID for rec in records]
+        assert isinstance(batches[0]["EventID"], array.array)
+        assert list(batches[0]["TimeGenerated"]) == [int(rec.TimeGenerated.timestamp()) for rec in records[:3]]
+        assert batches[0]["Strings"] == [rec.Strings for rec in records[:3]]
+
+        (batch,) = evt.iter_batches(columns=["SourceName", "EventType"])
+        assert list(batch) == ["SourceName", "EventType"]
+        assert batch["SourceName"] == ["TestApp"] * 5
+
+        # Columns of the record header are read without reading the record bodies
+        with patch.object(Evt, "_read_record", side_effect=AssertionError("body read")):
+            (batch,) = evt.iter_batches(columns=["EventCode", "EventSeverity", "RecordNumber"])
+        assert list(batch["EventCode"]) == [rec.EventCode for rec in records]
+        assert list(batch["EventSeverity"]) == [rec.EventSeverity for rec in records]
+        assert list(batch["RecordNumber"]) == [rec.RecordNumber for rec in records]
+
+        with pytest.raises(ValueError, match="Unknown columns: Nope"):
+            next(evt.iter_batches(columns=["Nope"]))
+
+        for batch_size in (0, -1):
+            with pytest.raises(ValueError, match=f"Invalid batch size: {batch_size}"):
+                next(evt.iter_batches(batch_size=batch_size))
+
+
+def test_evt_iter_batches_timestamps(get_absolute_path: Callable[[str], Path]) -> None:
+    with get_absolute_path("_data/TestLog.evt").open("rb") as fh:
+        evt = Evt(fh)
+        records = list(evt)
+
+        (batch,) = evt.iter_batches(columns=["TimeGenerated", "TimeWritten"], timestamp_unit="ns")
+        assert list(batch["TimeGenerated"]) == [int(rec.TimeGenerated.timestamp()) * 10**9 for rec in records]
+        assert list(batch["TimeWritten"]) == [int(rec.TimeWritten.timestamp()) * 10**9 for rec in records]
@@ -1,8 +1,17 @@
 from __future__ import annotations
 
+import array
 import typing
+from io import BytesIO
+from unittest.mock import patch
 
-from dissect.eventlog.evtx import Evtx
+import pytest
+from dissect.util.ts import to_unix_us
+
+from dissect.eventlog.bxml import Bxml, BxmlType, TemplateDictionary
+from dissect.eventlog.bxml.bxml import BxmlFragment, format_value
+from dissect.eventlog.evtx import Evtx, carve
+from dissect.eventlog.utils import CompactRecord, DeferredCompactRecord, DeferredKeyValueCollection
 
 if typing.TYPE_CHECKING:
     from collections.abc import Callable
@@ -60,3 +69,261 @@ def test_evtx_parsing(get_absolute_path: Callable[[str], Path]) -> None:
         assert events_with_data[1]["Binary"]
         data2 = events_with_data[1]["Binary"]
         assert bytearray.fromhex(data2.decode()).decode("utf-16") == "Test Binary Data"
+
+
+def test_evtx_resync(get_absolute_path: Callable[[str], Path]) -> None:
+    data = bytearray(get_absolute_path("_data/TestLogX.evtx").read_bytes())
+
+    # Damage the BinXML of the second record, which starts at offset 2128 in the first chunk
+    data[0x1000 + 2128 + 24] = 0x1F
+    evtx = Evtx(BytesIO(data))
+    records = list(evtx)
+
+    assert [r["EventID"] for r in records] == [1, 3, 65534, 5]
+    assert evtx.skipped_records == 1
+    assert evtx.skipped_bytes == 256
+
+    # A record with a mismatching size copy is skipped as well
+    data = bytearray(get_absolute_path("_data/TestLogX.evtx").read_bytes())
+    data[0x1000 + 2384 + 4] ^= 0x01
+    evtx = Evtx(BytesIO(data))
+
+    assert [r["EventID"] for r in evtx] == [1, 2, 65534, 5]
+    assert evtx.skipped_records == 1
+    assert evtx.skipped_bytes == 256
+
+
+@pytest.fixture
+def evtx_image(get_absolute_path: Callable[[str], Path]) -> bytes:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+
+    # A copy of the log with a damaged chunk header, so its records can only be carved on their own
+    damaged = bytearray(data)
+    damaged[0x1000 + 16] ^= 0xFF
+
+    return b"\xaa" * 1000 + data + bytes(damaged) + data[:0x2000]
+
+
+def test_evtx_carve(evtx_image: bytes) -> None:
+    records = list(carve(BytesIO(evtx_image), block_size=0x4000))
+
+    offsets = [offset for offset, _ in records]
+    assert offsets == sorted(set(offsets))
+
+    # The first copy, the damaged copy and the truncated copy
+    live = [(offset, record) for offset, record in records if evtx_image[offset + 8] in (1, 2, 3, 4, 5)]
+    assert [offset for offset, _ in live[:5]] == [0x1000 + 1000 + 512 + pos for pos in (0, 1616, 1872, 2128, 2432)]
+    assert [record["EventID"] for _, record in live] == [1, 2, 3, 65534, 5] * 3
+
+    for _, record in live:
+        assert record["Provider_Name"] == "TestAppX"
+        assert record["Computer"] == "DESKTOP-PJOQLJS"
+
+    # Old records in the free space of the chunks are carved as well
+    assert len(records) > len(live)
+
+
+def test_evtx_carve_timestamps(get_absolute_path: Callable[[str], Path]) -> None:
+    with get_absolute_path("_data/TestLogX.evtx").open("rb") as fh:
+        expected = [str(record["TimeCreated_SystemTime"]) for record in Evtx(fh)]
+        records = [record for _, record in carve(fh)][:5]
+
+    assert [str(record["TimeCreated_SystemTime"]) for record in records] == expected
+    assert len(set(expected)) == 4
+
+
+def test_evtx_carve_workers(evtx_image: bytes, tmp_path: Path) -> None:
+    path = tmp_path.joinpath("image.bin")
+    path.write_bytes(evtx_image)
+
+    with path.open("rb") as fh:
+        expected = [(offset, {key: str(value) for key, value in record.items()}) for offset, record in carve(fh)]
+        result = [
+            (offset, {key: str(value) for key, value in record.items()})
+            for offset, record in carve(fh, workers=2, range_size=0x8000)
+        ]
+
+    assert result == expected
+
+
+def test_evtx_carve_template_dictionary(get_absolute_path: Callable[[str], Path]) -> None:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+
+    template_dictionary = TemplateDictionary()
+    records = list(Evtx(BytesIO(data), template_dictionary=template_dictionary))
+    assert len(template_dictionary) == 2
+
+    # The second record refers to a template that is defined in the first record of the chunk
+    orphan = b"\x00" * 100 + data[0x1000 + 0x850 : 0x1000 + 0x950] + b"\x00" * 100
+    assert list(carve(BytesIO(orphan))) == []
+
+    template_dictionary = TemplateDictionary.loads(template_dictionary.dumps())
+    ((offset, record),) = carve(BytesIO(orphan), template_dictionary=template_dictionary)
+
+    assert offset == 100
+    assert record["EventID"] == records[1]["EventID"] == 2
+    assert record["Data"] == records[1]["Data"] == ["Test log message, error"]
+    assert str(record["TimeCreated_SystemTime"]) == str(records[1]["TimeCreated_SystemTime"])
+
+
+def test_evtx_known_templates(get_absolute_path: Callable[[str], Path]) -> None:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+
+    template_dictionary = TemplateDictionary()
+    records = list(Evtx(BytesIO(data), template_dictionary=template_dictionary))
+
+    template_dictionary = TemplateDictionary.loads(template_dictionary.dumps(), skip_definitions=True)
+    with patch.object(Bxml, "_create_and_fill_template") as mocked_create:
+        known_records = list(Evtx(BytesIO(data), template_dictionary=template_dictionary))
+        mocked_create.assert_not_called()
+
+    assert [{key: str(value) for key, value in record.items()} for record in known_records] == [
+        {key: str(value) for key, value in record.items()} for record in records
+    ]
+
+
+def test_evtx_compact(get_absolute_path: Callable[[str], Path]) -> None:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+
+    records = list(Evtx(BytesIO(data)))
+    compact_records = list(Evtx(BytesIO(data), compact=True))
+
+    assert all(isinstance(record, CompactRecord) for record in compact_records)
+    assert [list(record.keys()) for record in compact_records] == [list(record.keys()) for record in records]
+    assert [[str(value) for value in record.values()] for record in compact_records] == [
+        [str(value) for value in record.values()] for record in records
+    ]
+
+    # Records of the same template share their keys
+    schemas = {id(record.schema) for record in compact_records}
+    assert len(schemas) < len(compact_records)
+
+
+def test_evtx_compact_lazy_fragments(get_absolute_path: Callable[[str], Path]) -> None:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+    records = list(Evtx(BytesIO(data), compact=True))
+
+    # The EventData of these records is a BinXML fragment, which is only parsed once its values are needed
+    assert all(isinstance(record, DeferredCompactRecord) for record in records)
+    record = records[1]
+    with patch.object(BxmlFragment, "parse", side_effect=AssertionError("parsed")):
+        assert record["EventID"] == 2
+        assert record.get("Channel") == "TestLogX"
+        assert "Computer" in record
+    assert record._fill is not None
+
+    assert record["Data"] == ["Test log message, error"]
+    assert record._fill is None
+    assert list(record)[-2:] == ["Data", "Binary"]
+
+
+def test_evtx_lazy_fragments(get_absolute_path: Callable[[str], Path]) -> None:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+    records = list(Evtx(BytesIO(data)))
+
+    # The EventData of these records is a BinXML fragment, which is only parsed once its values are needed
+    assert all(isinstance(record, DeferredKeyValueCollection) for record in records)
+    record = records[1]
+    assert record["EventID"] == 2
+    assert record.get("Channel") == "TestLogX"
+    assert "Computer" in record
+    assert record._fill is not None
+
+    # The fragment is parsed in the context of its chunk, even after the other records were parsed
+    assert record["Data"] == ["Test log message, error"]
+    assert record._fill is None
+    assert list(record)[-2:] == ["Data", "Binary"]
+    assert records[3]["Binary"] == b"54006500730074002000420069006e0061007200790020004400610074006100"
+
+
+def test_evtx_lazy_fragments_corrupt(get_absolute_path: Callable[[str], Path]) -> None:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+    records = list(Evtx(BytesIO(data)))
+
+    # Errors of fragments that are parsed later are handled like those of records that are parsed in full
+    with patch.object(BxmlFragment, "parse", side_effect=UnicodeDecodeError("utf-16-le", b"\x00", 0, 1, "invalid")):
+        record = records[1]
+        assert record["EventID"] == 2
+        assert "Data" not in record
+        assert record[""] == "<CORRUPT DATA>"
+        assert record._fill is None
+
+
+def test_evtx_iter_batches(get_absolute_path: Callable[[str], Path]) -> None:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+    records = list(Evtx(BytesIO(data)))
+
+    batches = list(Evtx(BytesIO(data)).iter_batches(batch_size=3))
+    assert [len(batch["EventID"]) for batch in batches] == [3, 2]
+    assert isinstance(batches[0]["EventID"], array.array)
+    assert [event_id for batch in batches for event_id in batch["EventID"]] == [1, 2, 3, 65534, 5]
+    assert batches[0]["Provider_Name"] == ["TestAppX"] * 3
+    assert batches[0]["Binary"] == [None] * 3
+    assert batches[1]["Data"] == [records[3]["Data"], records[4]["Data"]]
+    assert list(batches[0]) == list(records[0])
+
+    (batch,) = Evtx(BytesIO(data)).iter_batches(columns=["EventRecordID", "TimeCreated_SystemTime", "Unknown"])
+    assert list(batch) == ["EventRecordID", "TimeCreated_SystemTime", "Unknown"]
+    assert list(batch["EventRecordID"]) == [1, 2, 3, 4, 5]
+    assert batch["TimeCreated_SystemTime"] == [record["TimeCreated_SystemTime"].get() for record in records]
+    assert batch["Unknown"] == [None] * 5
+
+    for batch_size in (0, -1):
+        with pytest.raises(ValueError, match=f"Invalid batch size: {batch_size}"):
+            next(Evtx(BytesIO(data)).iter_batches(batch_size=batch_size))
+
+
+def test_evtx_iter_batches_columns(get_absolute_path: Callable[[str], Path]) -> None:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+    records = list(Evtx(BytesIO(data)))
+
+    # Columns that come before the BinXML fragments of the records are read without parsing the fragments
+    with patch.object(BxmlFragment, "parse", autospec=True, side_effect=BxmlFragment.parse) as parse:
+        batches = list(Evtx(BytesIO(data)).iter_batches(batch_size=2, columns=["EventID", "Channel"]))
+        assert not parse.called
+
+        (batch,) = Evtx(BytesIO(data)).iter_batches(columns=["Data", "EventID"])
+        assert parse.called
+
+    assert [list(batch["EventID"]) for batch in batches] == [[1, 2], [3, 65534], [5]]
+    assert batches[0]["Channel"] == ["TestLogX"] * 2
+    assert batch["Data"] == [record["Data"] for record in records]
+
+
+def test_evtx_raw_types(get_absolute_path: Callable[[str], Path]) -> None:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+
+    records = list(Evtx(BytesIO(data)))
+    raw_records = list(Evtx(BytesIO(data), raw_types=True))
+
+    assert [record["Keywords"] for record in raw_records] == [
+        0x80000000000000,
+        0x80000000000000,
+        0x80000000000000,
+        0x90000000000000,
+        0xA0000000000000,
+    ]
+    assert raw_records[0]["TimeCreated_SystemTime"].get() == 132714422614167183
+    assert raw_records[4]["Binary"] == b"Test Binary Data".decode().encode("utf-16-le")
+
+    for record, raw_record in zip(records, raw_records, strict=True):
+        assert format_value(BxmlType.HEXINT64, raw_record["Keywords"]) == record["Keywords"]
+        assert format_value(BxmlType.BINARY, raw_record["Binary"]) == record["Binary"]
+        assert (
+            format_value(BxmlType.FILETIME, raw_record["TimeCreated_SystemTime"].get())
+            == record["TimeCreated_SystemTime"].get()
+        )
+
+
+@pytest.mark.parametrize("raw_types", [False, True])
+def test_evtx_iter_batches_timestamps(get_absolute_path: Callable[[str], Path], raw_types: bool) -> None:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+    records = list(Evtx(BytesIO(data)))
+
+    (batch,) = Evtx(BytesIO(data), raw_types=raw_types).iter_batches(
+        columns=["TimeCreated_SystemTime"], timestamp_unit="us"
+    )
+    assert isinstance(batch["TimeCreated_SystemTime"], array.array)
+    assert list(batch["TimeCreated_SystemTime"]) == [
+        to_unix_us(record["TimeCreated_SystemTime"].get()) for record in records
+    ]
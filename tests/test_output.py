@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from typing import TYPE_CHECKING
+
+import pytest
+
+from dissect.eventlog.bxml import BxmlSub
+from dissect.eventlog.bxml.bxml import hexlify
+from dissect.eventlog.evtx import Evtx
+from dissect.eventlog.output import (
+    JsonLinesSerializer,
+    Serializer,
+    SplunkSerializer,
+    format_bytes,
+    format_timestamp,
+    write_jsonl,
+    write_splunk,
+)
+from dissect.eventlog.utils import CompactRecord, KeyValueCollection
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+
+@pytest.mark.parametrize(
+    ("dt", "expected"),
+    [
+        (datetime(2021, 7, 22, 15, 50, 23, 212521, tzinfo=timezone.utc), "2021-07-22T15:50:23.212521Z"),
+        (datetime(2021, 7, 22, 15, 50, 23), "2021-07-22T15:50:23Z"),  # noqa: DTZ001
+        (datetime(2021, 7, 22, 15, 50, 23, tzinfo=timezone(timedelta(0))), "2021-07-22T15:50:23Z"),
+        (datetime(2021, 7, 22, 17, 50, 23, tzinfo=timezone(timedelta(hours=2))), "2021-07-22T17:50:23+02:00"),
+    ],
+)
+def test_format_timestamp(dt: datetime, expected: str) -> None:
+    assert format_timestamp(dt) == expected
+
+
+def test_format_bytes() -> None:
+    assert format_bytes(hexlify(b"T\x00e\x00")) == "54006500"
+    assert format_bytes(b"54006500") == "3534303036353030"
+    assert format_bytes(b"Test\x00\x01") == "546573740001"
+    assert format_bytes(b"\x00\xff") == "00ff"
+
+
+def test_raw_types_binary(get_absolute_path: Callable[[str], Path]) -> None:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+
+    # Raw binary values are written as hex, like the hexlified values that are parsed by default
+    for raw_types in (False, True):
+        fh = BytesIO()
+        write_jsonl(Evtx(BytesIO(data), raw_types=raw_types), fh)
+        record = json.loads(fh.getvalue().splitlines()[3])
+        assert record["Binary"] == "54006500730074002000420069006e0061007200790020004400610074006100"
+
+        fh = BytesIO()
+        write_splunk(Evtx(BytesIO(data), raw_types=raw_types), fh)
+        line = fh.getvalue().decode().splitlines()[3]
+        assert 'Binary="54006500730074002000420069006e0061007200790020004400610074006100"' in line
+
+
+def test_jsonl(get_absolute_path: Callable[[str], Path]) -> None:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+
+    fh = BytesIO()
+    assert write_jsonl(Evtx(BytesIO(data)), fh) == 5
+
+    lines = fh.getvalue().decode().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert len(records) == 5
+
+    record = records[3]
+    assert list(record) == list(next(iter(Evtx(BytesIO(data)))))
+    assert record["EventID"] == 65534
+    assert record["EventID_Qualifiers"] == 0
+    assert record["Channel"] == "TestLogX"
+    assert record["TimeCreated_SystemTime"] == "2021-07-22T15:50:23.212521Z"
+    assert record["Correlation_ActivityID"] is None
+    assert record["Data"] == ["Test log message, failure audit"]
+    assert record["Binary"] == "54006500730074002000420069006e0061007200790020004400610074006100"
+
+    # Compact records are written the same way
+    fh = BytesIO()
+    JsonLinesSerializer().write(Evtx(BytesIO(data), compact=True), fh)
+    assert fh.getvalue().decode().splitlines() == lines
+
+
+def test_jsonl_values() -> None:
+    record = KeyValueCollection()
+    record["Data"] = 'quote " and \\ and \n'
+    record["Data"] = [1, None, True, 1.5]
+    record["Guid"] = uuid.UUID("6b4d8d16-b0a7-4ab1-a1a4-9ae6d1de4f3e")
+    record["Sub"] = BxmlSub(0)
+    record["Unicode"] = "é中"
+
+    line = JsonLinesSerializer().format(record)
+    assert json.loads(line) == {
+        "Data": 'quote " and \\ and \n',
+        "Data_1": [1, None, True, 1.5],
+        "Guid": "{6B4D8D16-B0A7-4AB1-A1A4-9AE6D1DE4F3E}",
+        "Sub": None,
+        "Unicode": "é中",
+    }
+
+    # The values of a compact record are written in the order of its keys
+    compact = CompactRecord.from_mapping({"A": 1, "B": 2})
+    other = compact.updated({"A": 3, "C": 4})
+    assert JsonLinesSerializer().format(other) == '{"A":3,"B":2,"C":4}'
+
+
+def test_splunk(get_absolute_path: Callable[[str], Path]) -> None:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+
+    fh = BytesIO()
+    assert write_splunk(Evtx(BytesIO(data)), fh) == 5
+
+    lines = fh.getvalue().decode().splitlines()
+    assert len(lines) == 5
+    assert lines[3].startswith('2021-07-22T15:50:23.212521Z Provider_Name="TestAppX" EventID="65534" ')
+    assert ' Data_0="Test log message, failure audit" ' in lines[3]
+    assert "TimeCreated_SystemTime" not in lines[3]
+    assert "Correlation_ActivityID" not in lines[3]
+
+    fh = BytesIO()
+    SplunkSerializer().write(Evtx(BytesIO(data), compact=True), fh)
+    assert fh.getvalue().decode().splitlines() == lines
+
+
+def test_splunk_values() -> None:
+    record = KeyValueCollection()
+    record["Plain"] = "it's"
+    record["Quotes"] = 'say "hi"'
+    record["Both"] = 'it\'s "hi"'
+    record["Newline"] = "a\nb\\c"
+    record["Empty"] = []
+
+    assert SplunkSerializer().format(record) == (
+        'Unknown Plain="it\'s" Quotes="say \\"hi\\"" Both="it\\\'s \\"hi\\"" Newline="a\\nb\\\\c"'
+    )
+
+
+def test_serializer_buffer() -> None:
+    records = [{"EventID": i} for i in range(10)]
+
+    class Output(BytesIO):
+        writes = 0
+
+        def write(self, data: bytes) -> int:
+            self.writes += 1
+            return super().write(data)
+
+    fh = Output()
+    assert JsonLinesSerializer(buffer_size=40).write(records, fh) == 10
+    assert fh.writes == 3
+    assert fh.getvalue() == b"".join(b'{"EventID":%d}\n' % i for i in range(10))
+
+
+def test_serializer_abstract() -> None:
+    with pytest.raises(TypeError, match="abstract"):
+        Serializer()
+
+    class CsvSerializer(Serializer):
+        def format(self, record: dict) -> str:
+            return ",".join(prefix + str(value) for prefix, value in self._iter_items(record))
+
+        def _format_prefix(self, key: str) -> str:
+            return ""
+
+    fh = BytesIO()
+    assert CsvSerializer().write([{"A": 1, "B": 2}], fh) == 1
+    assert fh.getvalue() == b"1,2\n"
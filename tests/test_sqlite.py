@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from typing import TYPE_CHECKING
+
+import pytest
+
+from dissect.eventlog.evt import Evt
+from dissect.eventlog.evtx import Evtx
+from dissect.eventlog.sqlite import SqliteSink, format_time, write_sqlite
+from dissect.eventlog.utils import KeyValueCollection
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+
+
+@pytest.mark.parametrize(
+    ("dt", "expected"),
+    [
+        (datetime(2021, 7, 22, 15, 50, 23, 212521, tzinfo=timezone.utc), "2021-07-22T15:50:23.212521Z"),
+        (datetime(2021, 7, 22, 15, 50, 23, tzinfo=timezone.utc), "2021-07-22T15:50:23.000000Z"),
+        (datetime(2021, 7, 22, 15, 50, 23), "2021-07-22T15:50:23.000000Z"),  # noqa: DTZ001
+        (datetime(2021, 7, 22, 17, 50, 23, tzinfo=timezone(timedelta(hours=2))), "2021-07-22T15:50:23.000000Z"),
+    ],
+)
+def test_format_time(dt: datetime, expected: str) -> None:
+    assert format_time(dt) == expected
+
+
+def test_sqlite_evtx(tmp_path: Path, get_absolute_path: Callable[[str], Path]) -> None:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+    path = tmp_path / "records.db"
+
+    assert write_sqlite(Evtx(BytesIO(data)), path) == 5
+
+    # Compact records of the same template are added to the same table
+    with SqliteSink(path, batch_size=2) as sink:
+        assert sink.write(Evtx(BytesIO(data), compact=True)) == 5
+
+    db = sqlite3.connect(path)
+    assert db.execute("SELECT name FROM schemas").fetchall() == [("template_1",)]
+
+    db.row_factory = sqlite3.Row
+    rows = db.execute("SELECT * FROM template_1 WHERE EventRecordID = 4").fetchall()
+    assert len(rows) == 2
+    assert dict(rows[0]) == dict(rows[1])
+
+    row = rows[0]
+    assert list(row.keys()) == list(next(iter(Evtx(BytesIO(data)))))
+    assert row["EventID"] == 65534
+    assert row["EventID_Qualifiers"] == 0
+    assert row["TimeCreated_SystemTime"] == "2021-07-22T15:50:23.212521Z"
+    assert row["Correlation_ActivityID"] is None
+    assert row["Data"] == '["Test log message, failure audit"]'
+    assert row["Binary"] == "54006500730074002000420069006e0061007200790020004400610074006100"
+    assert db.execute("SELECT typeof(Binary) FROM template_1 WHERE EventRecordID = 4").fetchone()[0] == "text"
+
+    assert db.execute("SELECT json_extract(Data, '$[0]') FROM template_1 WHERE EventID = 65534").fetchone()[0] == (
+        "Test log message, failure audit"
+    )
+
+    indexes = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"template_1_EventID", "template_1_TimeCreated_SystemTime", "template_1_EventRecordID"} <= indexes
+
+
+def test_sqlite_evt(tmp_path: Path, get_absolute_path: Callable[[str], Path]) -> None:
+    path = tmp_path / "records.db"
+    with get_absolute_path("_data/TestLog.evt").open("rb") as fh:
+        assert write_sqlite(Evt(fh), path) == 5
+
+    db = sqlite3.connect(path)
+    db.row_factory = sqlite3.Row
+    row = db.execute("SELECT * FROM template_1 WHERE RecordNumber = 4").fetchone()
+    assert "record" not in list(row.keys())
+    assert row["EventID"] == 65534
+    assert row["TimeGenerated"] == "2021-07-21T03:11:38.000000Z"
+
+    rows = db.execute("SELECT event_id, time, record_id FROM records WHERE record_id = 4").fetchall()
+    assert [tuple(row) for row in rows] == [(65534, "2021-07-21T03:11:38.000000Z", 4)]
+
+
+def test_sqlite_values(tmp_path: Path) -> None:
+    records = []
+    for i in range(3):
+        record = KeyValueCollection()
+        record["EventID"] = i
+        record["EventRecordID"] = 2**64 - 1
+        record["Name"] = "value"
+        record["name"] = "other"
+        record["Name"] = "duplicate"
+        records.append(record)
+
+    wide = KeyValueCollection()
+    for i in range(10):
+        wide[f"Field{i}"] = i
+    wide["EventID"] = 4624
+
+    path = tmp_path / "records.db"
+    with SqliteSink(path, max_columns=5) as sink:
+        assert sink.write([*records, wide]) == 4
+
+    db = sqlite3.connect(path)
+
+    # Keys that only differ in case become unique columns, and integers that don't fit in SQLite are stored as text
+    cursor = db.execute("SELECT * FROM template_1 ORDER BY EventID")
+    assert [column[0] for column in cursor.description] == ["EventID", "EventRecordID", "Name", "name_1", "Name_1_1"]
+    assert cursor.fetchall() == [(i, str(2**64 - 1), "value", "other", "duplicate") for i in range(3)]
+
+    # Records with more keys than max_columns are stored in the long table
+    assert db.execute("SELECT COUNT(*) FROM record_values").fetchone()[0] == 11
+    assert db.execute("SELECT value FROM record_values WHERE key = 'Field7'").fetchone()[0] == 7
+    assert db.execute("SELECT source, event_id FROM records WHERE source = 'record_values'").fetchall() == [
+        ("record_values", 4624)
+    ]
+
+
+def test_sqlite_evtx_raw_types(tmp_path: Path, get_absolute_path: Callable[[str], Path]) -> None:
+    data = get_absolute_path("_data/TestLogX.evtx").read_bytes()
+    path = tmp_path / "records.db"
+
+    assert write_sqlite(Evtx(BytesIO(data), raw_types=True), path) == 5
+
+    # Raw binary values are stored as blobs
+    db = sqlite3.connect(path)
+    assert db.execute("SELECT Binary FROM template_1 WHERE EventRecordID = 4").fetchone()[0] == (
+        b"T\x00e\x00s\x00t\x00 \x00B\x00i\x00n\x00a\x00r\x00y\x00 \x00D\x00a\x00t\x00a\x00"
+    )
+
+
+def test_sqlite_empty_record(tmp_path: Path) -> None:
+    records = [{"EventID": 1}, {}, KeyValueCollection(), {"EventID": 2, "List": [b"\x00\xff"]}]
+
+    path = tmp_path / "records.db"
+    with SqliteSink(path) as sink:
+        assert sink.write(records) == 4
+
+    # Records without keys are skipped
+    db = sqlite3.connect(path)
+    assert db.execute("SELECT name FROM schemas").fetchall() == [("template_1",), ("template_2",)]
+    assert db.execute("SELECT COUNT(*) FROM record_values").fetchone()[0] == 0
+    assert db.execute("SELECT List FROM template_2").fetchone()[0] == '["00ff"]'
+    assert db.execute("SELECT event_id FROM records").fetchall() == [(1,), (2,)]
+
+
+def test_sqlite_rollback(tmp_path: Path) -> None:
+    def records() -> Iterator[dict[str, int]]:
+        yield {"EventID": 1}
+        yield {"Other": 1}
+        raise ValueError("Broken")
+
+    path = tmp_path / "records.db"
+    with SqliteSink(path) as sink:
+        with pytest.raises(ValueError, match="Broken"):
+            sink.write(records())
+
+        assert sink.write([{"Other": 2}]) == 1
+
+    db = sqlite3.connect(path)
+    assert db.execute("SELECT * FROM schemas").fetchall() == [("template_1", '["Other"]')]
+    assert db.execute("SELECT * FROM template_1").fetchall() == [(2,)]
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timezone
+
+import pytest
+from dissect.util.ts import wintimestamp
+
+from dissect.eventlog.timestamps import (
+    _filetime_to_datetime_relative,
+    convert_epochs,
+    convert_filetimes,
+    datetime_to_us,
+    epoch_to_datetime,
+    filetime_to_datetime,
+    filetime_to_ns,
+    filetime_to_us,
+)
+
+
+def test_filetime_bit_exact() -> None:
+    rng = random.Random(0x1601)
+    filetimes = [
+        116444736000000000,
+        116444736000000005,
+        132714422614167183,
+        132714422614167185,
+        *(rng.randrange(116444736000000000, 150000000000000000) for _ in range(10000)),
+    ]
+
+    for filetime in filetimes:
+        expected = wintimestamp(filetime)
+        assert filetime_to_datetime(filetime) == expected
+        assert filetime_to_us(filetime) == datetime_to_us(expected)
+
+
+def test_filetime_before_epoch() -> None:
+    for filetime in (0, 1, 116444735999999999, 94354848000000000):
+        assert filetime_to_datetime(filetime) == wintimestamp(filetime)
+        assert _filetime_to_datetime_relative(filetime) == wintimestamp(filetime)
+
+    assert filetime_to_datetime(0) == datetime(1601, 1, 1, tzinfo=timezone.utc)
+    assert _filetime_to_datetime_relative(132714422614167183) == wintimestamp(132714422614167183)
+
+
+def test_filetime_to_epoch() -> None:
+    assert filetime_to_ns(132714422614167183) == 1626968661416718300
+    assert filetime_to_us(132714422614167183) == 1626968661416718
+    assert filetime_to_datetime(132714422614167183) == datetime(2021, 7, 22, 15, 44, 21, 416718, tzinfo=timezone.utc)
+
+
+def test_epoch_to_datetime() -> None:
+    for seconds in (0, 1626835216, 1626835216, 2**31):
+        assert epoch_to_datetime(seconds) == datetime.fromtimestamp(seconds, tz=timezone.utc)
+    assert epoch_to_datetime(1626835216) is epoch_to_datetime(1626835216)
+
+
+def test_convert_filetimes() -> None:
+    filetimes = [132714422614167183, 132714423446638803]
+    assert list(convert_filetimes(filetimes)) == [1626968661416718, 1626968744663879]
+    assert list(convert_filetimes(filetimes, "ns")) == [1626968661416718300, 1626968744663880300]
+
+    datetimes = [wintimestamp(filetime) for filetime in filetimes]
+    assert list(convert_filetimes(datetimes)) == [1626968661416718, 1626968744663879]
+    assert convert_filetimes([datetimes[0], None], "ns") == [1626968661416718000, None]
+
+    assert list(convert_epochs([1626835216], "ns")) == [1626835216000000000]
+
+    with pytest.raises(ValueError, match="Unknown timestamp unit: ms"):
+        convert_filetimes(filetimes, "ms")
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import pickle
+from io import BytesIO
+from typing import TYPE_CHECKING
+
+import pytest
+
+from dissect.eventlog.utils import (
+    CompactRecord,
+    DeferredCompactRecord,
+    DeferredKeyValueCollection,
+    KeyValueCollection,
+    get_schema,
+    iter_windows,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_compact_record() -> None:
+    collection = KeyValueCollection()
+    for key, value in (("Data", "a"), ("Data", "b"), ("EventID", 1), ("Data_1", "c")):
+        collection[key] = value
+
+    record = CompactRecord.from_mapping(collection)
+    assert record == collection
+    assert list(record.items()) == list(collection.items())
+    assert "Data_1" in record
+    assert "Data_2" not in record
+    assert record.get("Data_2", 0) == 0
+
+    schema = get_schema(("Data", "Data", "EventID", "Data_1"))
+    assert schema.keys == ("Data", "Data_1", "EventID")
+    assert schema.index == {"Data": 0, "Data_1": 3, "EventID": 2}
+
+    other = CompactRecord(schema, ("d", "e", 2, "f"))
+    assert other.schema is get_schema(("Data", "Data", "EventID", "Data_1"))
+    assert dict(other) == {"Data": "d", "Data_1": "f", "EventID": 2}
+
+    updated = other.updated({"EventID": 3, "Level_Name": "Error"})
+    assert dict(updated) == {"Data": "d", "Data_1": "f", "EventID": 3, "Level_Name": "Error"}
+    assert updated.schema is other.updated({"Level_Name": "Warning"}).schema
+    assert dict(other) == {"Data": "d", "Data_1": "f", "EventID": 2}
+
+    restored = pickle.loads(pickle.dumps(updated))
+    assert restored == updated
+    assert restored.schema is updated.schema
+
+
+def test_deferred_key_value_collection() -> None:
+    calls = []
+
+    def fill(collection: KeyValueCollection) -> None:
+        calls.append(collection)
+        collection["Data"] = "b"
+        collection["Binary"] = None
+
+    collection = DeferredKeyValueCollection(fill)
+    dict.update(collection, {"EventID": 1, "Data": "a"})
+    collection.idx = {"EventID": 0, "Data": 0}
+
+    assert collection["EventID"] == 1
+    assert collection.get("Data") == "a"
+    assert "EventID" in collection
+    assert calls == []
+
+    # Keys that are not set yet fill the collection, in the order and with the names of a KeyValueCollection
+    assert collection["Data_1"] == "b"
+    assert calls == [collection]
+    assert list(collection.items()) == [("EventID", 1), ("Data", "a"), ("Data_1", "b"), ("Binary", None)]
+    assert "Missing" not in collection
+    assert calls == [collection]
+
+    collection = DeferredKeyValueCollection(fill)
+    assert len(collection) == 2
+    assert collection == {"Data": "b", "Binary": None}
+
+    # A fill that fails is undone, and done again the next time the collection is used
+    def broken_fill(collection: KeyValueCollection) -> None:
+        collection["Data"] = "b"
+        if len(calls) < 2:
+            calls.append(collection)
+            raise ValueError("Broken")
+
+    calls.clear()
+    collection = DeferredKeyValueCollection(broken_fill)
+    dict.update(collection, {"Data": "a"})
+    collection.idx = {"Data": 0}
+    with pytest.raises(ValueError, match="Broken"):
+        len(collection)
+    assert dict(dict.items(collection)) == {"Data": "a"}
+    assert collection.idx == {"Data": 0}
+    with pytest.raises(ValueError, match="Broken"):
+        collection.get("Missing")
+    assert collection == {"Data": "a", "Data_1": "b"}
+
+    collection = DeferredKeyValueCollection(fill)
+    restored = pickle.loads(pickle.dumps(collection))
+    assert type(restored) is KeyValueCollection
+    assert restored == {"Data": "b", "Binary": None}
+    restored["Data"] = "c"
+    assert restored["Data_1"] == "c"
+
+
+def test_deferred_compact_record() -> None:
+    calls = []
+
+    def fill() -> CompactRecord:
+        calls.append(1)
+        return CompactRecord.from_mapping({"EventID": 1, "Data": "a"})
+
+    record = DeferredCompactRecord(get_schema(("EventID",)), (1,), fill)
+    assert record["EventID"] == 1
+    assert "EventID" in record
+    assert not calls
+
+    assert record.get("Data") == "a"
+    assert record.row == (1, "a")
+    assert list(record) == ["EventID", "Data"]
+    assert calls == [1]
+
+    record = DeferredCompactRecord(get_schema(("EventID",)), (1,), fill)
+    assert record.updated({"Data": "b"}) == {"EventID": 1, "Data": "b"}
+
+    restored = pickle.loads(pickle.dumps(DeferredCompactRecord(get_schema(("EventID",)), (1,), fill)))
+    assert type(restored) is CompactRecord
+    assert restored == {"EventID": 1, "Data": "a"}
+
+
+@pytest.mark.parametrize(("start", "end"), [(0, None), (3, 95), (0, 1000), (50, 50)])
+def test_iter_windows(tmp_path: Path, start: int, end: int | None) -> None:
+    data = bytes(range(100))
+    path = tmp_path / "data.bin"
+    path.write_bytes(data)
+
+    stop = len(data) if end is None else min(end, len(data))
+    expected = []
+    for offset in range(start, stop, 16):
+        size = min(16, stop - offset)
+        expected.append((offset, data[offset : offset + size + 4], 0, size))
+
+    # Memory mapped files are yielded in blocks with the same overlap as files that are read
+    assert list(iter_windows(BytesIO(data), start, end, 16, 4)) == expected
+    with path.open("rb") as fh:
+        windows = list(iter_windows(fh, start, end, 16, 4))
+    assert windows == expected
+    assert all(type(buf) is bytes for _, buf, _, _ in windows)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import os
+import sys
+from io import BytesIO
+from typing import TYPE_CHECKING
+
+import pytest
+from defusedxml import ElementTree as ET
+
+from dissect.eventlog.utils import KeyValueCollection
+from dissect.eventlog.wevtutil import WevtutilWrapper
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+EVENT = (
+    "<Event xmlns='http://schemas.microsoft.com/win/2004/08/events/event'><System>"
+    "<Provider Name='Microsoft-Windows-Security-Auditing' Guid='{{54849625-5478-4994-a5ba-3e3b0328c30d}}'/>"
+    "<EventID>{event_id}</EventID><Level>0</Level><TimeCreated SystemTime='2024-01-01T00:00:00.000000000Z'/>"
+    "<EventRecordID>{record_id}</EventRecordID><Channel>Security</Channel></System>"
+    "<EventData><Data Name='TargetUserName'>{name}</Data><Data Name='Empty'></Data></EventData></Event>"
+)
+
+
+def write_fake_wevtutil(path: Path, data: bytes) -> None:
+    """Write a fake ``wevtutil`` that replays ``data`` in small writes."""
+    (path / "events.xml").write_bytes(data)
+    script = path / "wevtutil"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import sys, pathlib\n"
+        "data = pathlib.Path(__file__).with_name('events.xml').read_bytes()\n"
+        "for offset in range(0, len(data), 100):\n"
+        "    sys.stdout.buffer.write(data[offset : offset + 100])\n"
+        "    sys.stdout.buffer.flush()\n"
+    )
+    script.chmod(0o755)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake wevtutil is a POSIX script")
+def test_wevtutil_stream(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    events = [
+        EVENT.format(event_id=4624, record_id=1, name="Administrator"),
+        EVENT.format(event_id=4625, record_id=2, name="Us\xe9r\x01"),
+        EVENT.format(event_id=4634, record_id=3, name="Guest"),
+    ]
+    write_fake_wevtutil(tmp_path, "\r\n".join(events).encode("windows-1252"))
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    wrapper = WevtutilWrapper(tmp_path / "Security.evtx")
+    records = list(wrapper)
+
+    assert wrapper.count == 3
+    assert [record["EventID"] for record in records] == ["4624", "4625", "4634"]
+    assert [record["EventRecordID"] for record in records] == ["1", "2", "3"]
+    assert [record["TargetUserName"] for record in records] == ["Administrator", "Us\xe9r1", "Guest"]
+    assert records[0]["Provider_Name"] == "Microsoft-Windows-Security-Auditing"
+    assert records[0]["TimeCreated_SystemTime"] == "2024-01-01T00:00:00.000000000Z"
+    assert "Empty" not in records[0]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake wevtutil is a POSIX script")
+def test_wevtutil_stream_truncated(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    data = EVENT.format(event_id=4624, record_id=1, name="Administrator") + "<Event><System><EventID>"
+    write_fake_wevtutil(tmp_path, data.encode())
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    assert [record["EventID"] for record in WevtutilWrapper("Security.evtx")] == ["4624"]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake wevtutil is a POSIX script")
+def test_wevtutil_stream_malformed(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    events = [EVENT.format(event_id=4624 + i, record_id=i, name=f"User{i}") for i in range(5)]
+    events[2] = events[2].replace("</EventRecordID>", "</EventRecord>")
+    data = "\r\n".join(events).encode()
+    write_fake_wevtutil(tmp_path, data)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    # Only the malformed event is skipped, parsing continues at the next event
+    wrapper = WevtutilWrapper("Security.evtx")
+    assert [record["EventRecordID"] for record in wrapper] == ["0", "1", "3", "4"]
+    assert wrapper.count == 4
+
+    # Also if all events are read at once
+    records = WevtutilWrapper("Security.evtx")._iter_events(BytesIO(data))
+    assert [record["EventRecordID"] for record in records] == ["0", "1", "3", "4"]
+
+
+def test_wevtutil_fullmap() -> None:
+    element = ET.fromstring(
+        "<Event><System><Provider Name='Service Control Manager'/><EventID Qualifiers='16384'>7036</EventID>"
+        "<Execution ProcessID='4' ThreadID='8'/><Security/></System>"
+        "<EventData><Data Name='param1'>Windows Update</Data><Data>running</Data><Data>stopped</Data>"
+        "<Binary>570075</Binary></EventData>"
+        "<UserData><LogFileCleared><SubjectUserName>Admin</SubjectUserName></LogFileCleared></UserData></Event>"
+    )
+
+    assert dict(WevtutilWrapper("Security.evtx").fullmap(element)) == {
+        "Provider_Name": "Service Control Manager",
+        "EventID": "7036",
+        "EventID_Qualifiers": "16384",
+        "Execution_ProcessID": "4",
+        "Execution_ThreadID": "8",
+        "param1": "Windows Update",
+        "Data": "running",
+        "Data_1": "stopped",
+        "Binary": "570075",
+        "LogFileCleared_SubjectUserName": "Admin",
+    }
+
+    # Elements below the Event element are flattened with the path of their ancestors
+    result = KeyValueCollection()
+    user_data = element.find("UserData")
+    assert WevtutilWrapper("Security.evtx").fullmap(user_data[0], [element, user_data], result) is result
+    assert result == {"LogFileCleared_SubjectUserName": "Admin"}
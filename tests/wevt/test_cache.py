@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+from dissect.eventlog.wevt import CRIM, ManifestCache
+from dissect.eventlog.wevt.cache import CachedTemplate, content_hash
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+
+def test_manifest_cache(get_absolute_path: Callable[[str], Path], tmp_path: Path) -> None:
+    path = get_absolute_path("_data/services.wevt")
+
+    with path.open("rb") as fh:
+        expected = CRIM(fh).manifests()
+
+    with ManifestCache(tmp_path / "manifests.db") as cache, path.open("rb") as fh:
+        crim = CRIM(fh)
+        crim.manifests(cache)
+
+        assert len(cache) == 1
+        assert content_hash(path.read_bytes()[: crim.file_size]) in cache
+
+    with (
+        ManifestCache(tmp_path / "manifests.db") as cache,
+        path.open("rb") as fh,
+        patch.object(CRIM, "_parse_manifests") as mocked_parse,
+    ):
+        manifests = CRIM(fh).manifests(cache)
+        mocked_parse.assert_not_called()
+
+    assert manifests.keys() == expected.keys()
+    for provider_id, manifest in manifests.items():
+        expected_manifest = expected[provider_id]
+
+        assert manifest.events.keys() == expected_manifest.events.keys()
+        assert manifest.templates.keys() == expected_manifest.templates.keys()
+        assert manifest.template_ids.keys() == expected_manifest.template_ids.keys()
+        assert manifest.maps.keys() == expected_manifest.maps.keys()
+        assert manifest.channels == expected_manifest.channels
+        assert manifest.levels == expected_manifest.levels
+        assert manifest.tasks == expected_manifest.tasks
+        assert manifest.opcodes == expected_manifest.opcodes
+        assert manifest.keywords == expected_manifest.keywords
+
+        for key, event in manifest.events.items():
+            expected_event = expected_manifest.events[key]
+            assert (event.level, event.task, event.opcode, event.keyword, event.template_offset) == (
+                expected_event.level,
+                expected_event.task,
+                expected_event.opcode,
+                expected_event.keyword,
+                expected_event.template_offset,
+            )
+
+        for offset, template in manifest.templates.items():
+            expected_template = expected_manifest.templates[offset]
+            assert isinstance(template, CachedTemplate)
+            assert template.identifier == expected_template.identifier
+            assert template.template == expected_template.template
+            assert [(d.name, d.inType, d.outType) for d in template.names] == [
+                (d.name, d.inType, d.outType) for d in expected_template.names
+            ]
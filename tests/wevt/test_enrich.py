@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from io import BytesIO
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+from uuid import UUID
+
+import pytest
+
+from dissect.eventlog.bxml import BxmlSub
+from dissect.eventlog.bxml.bxml import read_guid
+from dissect.eventlog.utils import CompactRecord, DeferredKeyValueCollection, KeyValueCollection
+from dissect.eventlog.wevt import CRIM, ManifestEnricher
+from dissect.eventlog.wevt.enrich import FORMATTERS, EventDecoder, OutType
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+
+@pytest.fixture
+def enricher(get_absolute_path: Callable[[str], Path]) -> ManifestEnricher:
+    manifests = {}
+    for path in ("_data/services.wevt", "_data/mpengine_etw.wevt"):
+        with get_absolute_path(path).open("rb") as fh:
+            manifests.update(CRIM(fh).manifests())
+    return ManifestEnricher(manifests)
+
+
+def create_record(**values: object) -> KeyValueCollection:
+    record = KeyValueCollection()
+    for key, value in values.items():
+        record[key] = value
+    return record
+
+
+def test_enrich_names(enricher: ManifestEnricher) -> None:
+    provider_guid = BxmlSub(0)
+    provider_guid.set("{0063715B-EEDA-4007-9429-AD526F62696E}")
+    record = create_record(
+        Provider_Guid=provider_guid,
+        EventID=101,
+        Version=0,
+        Keywords="0x8000000000010000",
+        ServiceName="Dnscache",
+    )
+
+    enricher.enrich(record)
+    assert record["Level_Name"] == "win:Informational"
+    assert record["Task_Name"] == "Autostart"
+    assert record["Opcode_Name"] == "win:Start"
+    assert record["Channel_Name"] == "Microsoft-Windows-Services/Diagnostic"
+    assert record["Keywords_Names"] == ("Performance",)
+    assert record["ServiceName"] == "Dnscache"
+
+
+def test_enrich_evtx_guid(enricher: ManifestEnricher, get_absolute_path: Callable[[str], Path]) -> None:
+    # The provider GUID as it's read from EVTX records, from the bytes that Windows stores
+    data = get_absolute_path("_data/services.wevt").read_bytes()
+    provider_guid = read_guid(BytesIO(data[0x10:0x20]))
+    assert provider_guid == "{5B716300-DAEE-0740-9429-AD526F62696E}"
+
+    record = enricher.enrich(create_record(Provider_Guid=provider_guid, EventID=101, Version=0))
+    assert record["Task_Name"] == "Autostart"
+
+    record = enricher.enrich(create_record(Provider_Guid=UUID(provider_guid), EventID=101, Version=0))
+    assert record["Task_Name"] == "Autostart"
+
+
+def test_enrich_out_types(enricher: ManifestEnricher) -> None:
+    record = create_record(
+        Provider_Guid="{0A002690-3839-4E3A-B3B6-96D8DF868D99}",
+        EventID=1,
+        Version=1,
+        Id=10,
+        Flags="0x20",
+        Type=b"Scan",
+    )
+
+    enricher.enrich(record)
+    assert record["Id"] == "0xa"
+    assert record["Flags"] == "0x20"
+    assert record["Type"] == b"Scan"
+    assert "Id_1" not in record
+    assert record["Task_Name"] == "ScanRequestTask"
+
+
+def test_enrich_unknown(enricher: ManifestEnricher) -> None:
+    record = create_record(Provider_Guid="{00000000-0000-0000-0000-000000000000}", EventID=1, Version=0)
+    assert enricher.enrich(dict(record)) == record
+
+    record = create_record(Provider_Name="TestAppX", EventID=1)
+    assert enricher.enrich(dict(record)) == record
+
+
+def test_enrich_decoder_cache(enricher: ManifestEnricher) -> None:
+    records = [
+        create_record(Provider_Guid="{0063715B-EEDA-4007-9429-AD526F62696E}", EventID=101, Version=0) for _ in range(3)
+    ]
+
+    with patch("dissect.eventlog.wevt.enrich.EventDecoder", wraps=EventDecoder) as mocked_decoder:
+        assert all(r["Task_Name"] == "Autostart" for r in enricher.enrich_records(records))
+        mocked_decoder.assert_called_once()
+
+
+def test_enrich_decoder_cache_size(get_absolute_path: Callable[[str], Path]) -> None:
+    with get_absolute_path("_data/services.wevt").open("rb") as fh:
+        enricher = ManifestEnricher(CRIM(fh).manifests(), cache_size=2)
+
+    provider_guid = "{0063715B-EEDA-4007-9429-AD526F62696E}"
+    decoder = enricher.get_decoder(provider_guid, 101)
+    assert enricher.get_decoder("{00000000-0000-0000-0000-000000000000}", 1) is None
+    assert enricher.get_decoder(provider_guid, 101) is decoder
+    assert enricher.get_decoder(provider_guid, 1) is None
+
+    # The least recently used decoder is evicted
+    assert list(enricher._decoders) == [(provider_guid, 101, 0), (provider_guid, 1, 0)]
+
+
+def test_enrich_deferred(enricher: ManifestEnricher) -> None:
+    def fill(collection: KeyValueCollection) -> None:
+        collection["ServiceName"] = "Dnscache"
+        collection["Binary"] = None
+
+    record = DeferredKeyValueCollection(fill)
+    dict.update(record, {"Provider_Guid": "{0063715B-EEDA-4007-9429-AD526F62696E}", "EventID": 101, "Version": 0})
+    record.idx = dict.fromkeys(record, 0)
+
+    # The remaining items are set before the enriched items, like they are for records that are not deferred
+    enricher.enrich(record)
+    assert list(record)[:6] == ["Provider_Guid", "EventID", "Version", "ServiceName", "Binary", "Level_Name"]
+    assert record["Level_Name"] == "win:Informational"
+
+
+def test_enrich_compact(enricher: ManifestEnricher) -> None:
+    record = CompactRecord.from_mapping(
+        create_record(Provider_Guid="{0A002690-3839-4E3A-B3B6-96D8DF868D99}", EventID=1, Version=1, Id=10)
+    )
+
+    enriched = enricher.enrich(record)
+    assert enriched["Id"] == "0xa"
+    assert enriched["Task_Name"] == "ScanRequestTask"
+    assert record["Id"] == 10
+
+
+def test_enrich_format_ipv6() -> None:
+    address = bytes.fromhex("fe800000000000000000000000000001")
+    assert FORMATTERS[OutType.IPV6](address.hex().encode()) == "fe80::1"
+    assert FORMATTERS[OutType.IPV6](address) == "fe80::1"
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from dissect.eventlog.wevt import CRIM, extract_manifests
+from dissect.eventlog.wevt.extract import find_crim
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+
+@pytest.fixture
+def pe_dir(get_absolute_path: Callable[[str], Path], tmp_path: Path) -> Path:
+    services = get_absolute_path("_data/services.wevt").read_bytes()
+    mpengine = get_absolute_path("_data/mpengine_etw.wevt").read_bytes()
+
+    # Fake PE files with the CRIM blobs somewhere in their resources, and a false positive
+    (tmp_path / "services.dll").write_bytes(b"MZ" + b"\x00" * 1022 + b"CRIM\xff\xff" + services + b"\x00" * 100)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "mpengine.dll.mui").write_bytes(b"MZ" + b"\x00" * 510 + mpengine)
+    (tmp_path / "readme.txt").write_bytes(services)
+    (tmp_path / "empty.exe").write_bytes(b"")
+
+    return tmp_path
+
+
+def test_find_crim(get_absolute_path: Callable[[str], Path]) -> None:
+    services = get_absolute_path("_data/services.wevt").read_bytes()
+    assert find_crim(b"CRIM" + services + b"CRIM\x00\x00\x00\x00" + services[:100]) == [4]
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_extract_manifests(get_absolute_path: Callable[[str], Path], pe_dir: Path, workers: int | None) -> None:
+    expected = {}
+    for name in ("services.wevt", "mpengine_etw.wevt"):
+        with get_absolute_path(f"_data/{name}").open("rb") as fh:
+            expected[name] = CRIM(fh).manifests()
+
+    results = list(extract_manifests(pe_dir, workers=workers))
+
+    assert [(path.name, provider_id) for path, provider_id, _ in results] == [
+        ("services.dll", provider_id) for provider_id in expected["services.wevt"]
+    ] + [("mpengine.dll.mui", provider_id) for provider_id in expected["mpengine_etw.wevt"]]
+
+    for path, provider_id, manifest in results:
+        expected_manifest = expected["services.wevt" if path.name == "services.dll" else "mpengine_etw.wevt"][
+            provider_id
+        ]
+        assert manifest.events.keys() == expected_manifest.events.keys()
+        assert manifest.keywords == expected_manifest.keywords
+
+
+def test_extract_manifests_files(pe_dir: Path) -> None:
+    assert len(list(extract_manifests([pe_dir / "readme.txt", pe_dir / "empty.exe"]))) == 3
+    assert len(list(extract_manifests(pe_dir, suffixes=None))) == 8
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from uuid import UUID
+
+from dissect.eventlog.wevt import CRIM, ProviderManifest
+from dissect.eventlog.wevt.manifest import KeywordDecoder
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+
+def test_manifest_services(get_absolute_path: Callable[[str], Path]) -> None:
+    with get_absolute_path("_data/services.wevt").open("rb") as fh:
+        manifests = CRIM(fh).manifests()
+
+    assert len(manifests) == 3
+
+    manifest = manifests[UUID("0063715b-eeda-4007-9429-ad526f62696e")]
+    assert isinstance(manifest, ProviderManifest)
+    assert len(manifest.events) == 15
+    assert len(manifest.templates) == 7
+
+    assert manifest.channels == {16: "Microsoft-Windows-Services/Diagnostic"}
+    assert manifest.levels == {4: "win:Informational"}
+    assert manifest.tasks[101] == "Autostart"
+    assert manifest.keywords[0x10000] == "Performance"
+    assert manifest.get_opcode(101) == "StatusChange"
+    assert manifest.get_opcode(1, task=101) == "win:Start"
+    assert manifest.get_opcode(42) is None
+
+    event = manifest.get_event(101)
+    assert event.id == 101
+    assert event.task == 101
+    assert manifest.get_event(101, version=1) is None
+
+    system = manifests[UUID("555908d1-a6d7-4695-8e1e-26931d2012f4")]
+    template = system.get_template(7000)
+    assert template is system.templates[system.get_event(7000).template_offset]
+    assert [desc.name for desc in template.names] == ["param1", "param2", "__binLength", "BinaryData"]
+    assert system.template_ids[template.identifier] is template
+
+
+def test_manifest_maps(get_absolute_path: Callable[[str], Path]) -> None:
+    with get_absolute_path("_data/mpengine_etw.wevt").open("rb") as fh:
+        manifests = CRIM(fh).manifests()
+
+    manifest = manifests[UUID("0a002690-3839-4e3a-b3b6-96d8df868d99")]
+    assert list(manifest.maps) == [
+        "SmsScan.MonitoringLevel",
+        "SmsScan.MonitoringRequestOrigin",
+        "SmsScan.MonitoringStopReason",
+        "SmsScan.ScanReason",
+        "SmsScan.ScanResult",
+    ]
+    assert manifest.maps["SmsScan.ScanResult"].name == "SmsScan.ScanResult"
+    assert manifest.get_template(1, version=1).identifier == UUID("1a5a996a-901f-52b2-fb26-e9b134d86821")
+
+
+def test_manifest_ttbl_index(get_absolute_path: Callable[[str], Path]) -> None:
+    with get_absolute_path("_data/services.wevt").open("rb") as fh:
+        wevt = next(CRIM(fh).wevt_headers())
+
+    ttbl = next(wevt_type for wevt_type in wevt if wevt_type.signature == "TTBL")
+    by_offset = ttbl.templates_by_offset()
+    by_identifier = ttbl.templates_by_identifier()
+
+    assert len(by_offset) == len(by_identifier) == 7
+    assert by_offset[276].identifier == UUID("ab19befe-23f0-5f65-2ffd-444c0be74f99")
+    assert by_identifier[UUID("ab19befe-23f0-5f65-2ffd-444c0be74f99")].offset == 276
+
+
+def test_keyword_decoder() -> None:
+    keywords = {
+        0x1: "First",
+        0x80: "Eighth",
+        0x100: "Ninth",
+        0x300: "NinthAndTenth",
+        0x8000: "SixteenthBit",
+        0x18000: "SpansTwoBytes",
+        0x8000000000000000: "Last",
+        0: "None",
+    }
+    decoder = KeywordDecoder(keywords)
+
+    def bit_test(mask: int) -> tuple[str, ...]:
+        return tuple(name for bitmask, name in sorted(keywords.items()) if bitmask and mask & bitmask == bitmask)
+
+    for mask in (0, 0x1, 0x81, 0x300, 0x18000, 0x8000, 0x8000000000000301, 0xFFFFFFFFFFFFFFFF):
+        assert sorted(decoder(mask)) == sorted(bit_test(mask))
+
+    assert decoder(0x8000000000000001) == ("First", "Last")
+    assert decoder(0x8000000000000001) is decoder(0x8000000000000001)
+
+
+def test_manifest_decode_keywords(get_absolute_path: Callable[[str], Path]) -> None:
+    with get_absolute_path("_data/services.wevt").open("rb") as fh:
+        manifests = CRIM(fh).manifests()
+
+    manifest = manifests[UUID("0063715b-eeda-4007-9429-ad526f62696e")]
+    assert manifest.decode_keywords(0x1110000) == ("Performance", "Control")
+    assert manifest.decode_keywords("0x8001000000600000") == ("ConfigChange", "ServiceStart", "win:ResponseTime")
+    assert manifest.decode_keywords(0) == ()
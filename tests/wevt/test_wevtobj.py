@@ -43,9 +43,20 @@ def test_name(signature: str, data_offset: int, expected_name: str) -> None:
     assert wevtobject.name == expected_name
 
 
+@pytest.mark.parametrize("signature", signatures)
+def test_slots(signature: str) -> None:
+    wevtobject = getattr(wevt_object, signature)(0x0, create_header_type(signature) + create_data_item("test"))
+    assert not hasattr(wevtobject, "__dict__")
+    assert wevtobject.message_table_id == 0
+    assert type(wevtobject.message_table_id) is int
+
+
 @patch.object(wevt_object.WevtObject, wevt_object.WevtName.extract_name.__name__)
 def test_template_offset_calls(mocked_extract_name: Mock) -> None:
-    wevt_object.TEMP(0xE84, TEMP_HEADER)
+    template = wevt_object.TEMP(0xE84, TEMP_HEADER)
+    mocked_extract_name.assert_not_called()
+
+    template.names  # noqa: B018
     mocked_extract_name.assert_has_calls([call(20), call(28)], any_order=True)
 
 
@@ -61,3 +72,37 @@ def test_template() -> None:
         assert descriptor.name == expected_values[index]["name"]
         assert descriptor.inType == expected_values[index]["inType"]
         assert descriptor.outType == expected_values[index]["outType"]
+
+
+def test_template_lazy() -> None:
+    template = wevt_object.TEMP(0xE84, TEMP_HEADER)
+
+    with patch.object(wevt_object.TEMP, "_extract_bxml_template") as mocked_extract:
+        assert template.template is mocked_extract.return_value
+        assert template.template is mocked_extract.return_value
+        mocked_extract.assert_called_once()
+
+    assert template.names is template.names
+
+
+def test_header_fields() -> None:
+    # The header fields that are not copied into slots are read from the header
+    template = wevt_object.TEMP(0xE84, TEMP_HEADER)
+    assert template.signature == b"TEMP"
+    assert template.size == 0x12C
+    assert template.nr_of_items == 2
+    assert template.nr_of_names == 2
+    assert template.binxml_fragments == 1
+
+    event = wevt_object.EVNT(0x0, create_header_type("EVNT", data_counter=3))
+    assert event.data_counter == 3
+
+    for signature in ("VMAP", "BMAP"):
+        value_map = getattr(wevt_object, signature)(
+            0x0, create_header_type(signature, signature=signature.encode()) + create_data_item("test")
+        )
+        assert value_map.signature == signature.encode()
+
+    with pytest.raises(AttributeError):
+        template.missing  # noqa: B018
+    assert not hasattr(template, "__dict__")